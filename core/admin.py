@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Company, Department, Position, Supplier, ProductCategory, Product, PendingProduct
+from .models import Company, Department, IdempotencyKey, KitTemplate, KitTemplateItem, OcrOutbox, Position, Supplier, ProductCategory, Product, PendingProduct
 
 
 @admin.register(Company)
@@ -45,4 +45,33 @@ class ProductAdmin(admin.ModelAdmin):
 class PendingProductAdmin(admin.ModelAdmin):
     list_display = ["code", "name", "category", "size", "unit_price", "description"]
     list_filter = ["category", "category__type"]
-    search_fields = ["code", "name"]
\ No newline at end of file
+    search_fields = ["code", "name"]
+
+
+@admin.register(IdempotencyKey)
+class IdempotencyKeyAdmin(admin.ModelAdmin):
+    list_display = ["key", "endpoint", "status_code", "created_at"]
+    list_filter = ["endpoint"]
+    search_fields = ["key"]
+
+
+
+@admin.register(OcrOutbox)
+class OcrOutboxAdmin(admin.ModelAdmin):
+    list_display = ["id", "status", "attempts", "next_attempt_at", "created_at", "sent_at"]
+    list_filter = ["status"]
+    readonly_fields = ["created_at", "sent_at"]
+
+
+class KitTemplateItemInline(admin.TabularInline):
+    model = KitTemplateItem
+    extra = 1
+    fields = ["product", "quantity", "period_days"]
+    autocomplete_fields = ["product"]
+
+
+@admin.register(KitTemplate)
+class KitTemplateAdmin(admin.ModelAdmin):
+    list_display = ["name", "position"]
+    search_fields = ["name", "position__name"]
+    inlines = [KitTemplateItemInline]
@@ -1,108 +1,152 @@
 from core.api.serializer import FlexibleInvoiceSerializer
-from core.models import PendingProduct, Product, ProductCategory
+from core.models import IdempotencyKey, PendingProduct, Product, ProductCategory
+from core.uploads import get_cached_result, record_result
+from core.utils import get_idempotency_key
 from documents.models import InvoiceDocument, InvoiceLineItem
 from decimal import Decimal, InvalidOperation
-from django.db import transaction
+from django.db import IntegrityError, transaction
 from rest_framework import generics, status
 from rest_framework.response import Response
 
 
+def parse_quantity(value):
+    try:
+        return int(float(str(value).replace(",", ".")))
+    except (TypeError, ValueError):
+        return 0
+
+
 class InvoiceToPendingProductsAPIView(generics.GenericAPIView):
     serializer_class = FlexibleInvoiceSerializer
+    idempotency_scope = "invoice-pending-products"
 
     @transaction.atomic
     def post(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
+        # retried request (same Idempotency-Key header or identical payload)
+        key = get_idempotency_key(request, self.idempotency_scope)
+        stored = IdempotencyKey.objects.filter(key=key).first()
+        if stored and stored.is_expired:
+            stored.delete()
+            stored = None
+        if stored:
+            return Response(stored.response, status=stored.status_code)
+
+        # the same scan was already imported
+        cached = get_cached_result(request, "extract_fv")
+        if cached is not None:
+            return Response(cached, status=status.HTTP_200_OK)
+
         items = serializer.validated_data.get("items", [])
         order_number = request.data.get("invoice", {}).get("order_number", "unknown")
 
         invoice_doc, _ = InvoiceDocument.objects.get_or_create(order_number=order_number)
         default_category, _ = ProductCategory.objects.get_or_create(name="clothing")
 
-        # 1. Збираємо всі коди
-        codes = [
-            item.get("code") or item.get("sku")
-            for item in items
-            if item.get("code") or item.get("sku")
-        ]
-
-        # 2. Отримуємо всі існуючі продукти одним запитом
-        existing_products = {
-            p.code: p for p in Product.objects.filter(code__in=codes)
-        }
-
-        pending_products_to_create = []
-        pending_by_code = {}
-        line_items_to_create = []
-
+        # 1. Зводимо повторні коди в одну позицію
+        lines = {}
         for item in items:
             code = item.get("code") or item.get("sku")
             if not code:
                 continue
 
-            quantity = item.get("quantity", 0)
-            name = item.get("name") or item.get("product_name") or "Unnamed"
-            size = item.get("size") or ""
-            description = item.get("description") or ""
-
             raw_price = item.get("unit_price") or item.get("price") or "0"
             try:
                 unit_price = Decimal(str(raw_price).replace(",", "."))
             except InvalidOperation:
                 unit_price = Decimal("0")
 
-            product = existing_products.get(code)
+            line = lines.setdefault(
+                code,
+                {
+                    "quantity": 0,
+                    "name": item.get("name") or item.get("product_name") or "Unnamed",
+                    "size": item.get("size") or "",
+                    "description": item.get("description") or "",
+                    "unit_price": unit_price,
+                },
+            )
+            line["quantity"] += parse_quantity(item.get("quantity", 0))
 
-            if product:
-                line_items_to_create.append(
-                    InvoiceLineItem(
-                        document=invoice_doc,
-                        product=product,
-                        code=product.code,
-                        quantity_ordered=quantity,
-                        quantity_delivered=0,
-                    )
-                )
+        # 2. Отримуємо існуючі продукти, очікувані продукти та позиції фактури
+        existing_products = Product.objects.in_bulk(lines.keys(), field_name="code")
+
+        existing_pending = {}
+        for pending in PendingProduct.objects.filter(code__in=lines.keys()).order_by("id"):
+            existing_pending.setdefault(pending.code, pending)
+
+        existing_lines = {}
+        for line_item in invoice_doc.line_items.order_by("id"):
+            if line_item.code:
+                existing_lines.setdefault(line_item.code, line_item)
+
+        # 3. Upsert PendingProduct
+        pending_to_create = []
+        pending_to_update = []
+        for code, line in lines.items():
+            if code in existing_products:
+                continue
+            pending = existing_pending.get(code)
+            if pending is None:
+                pending = PendingProduct(code=code, category=default_category)
+                pending_to_create.append(pending)
+                existing_pending[code] = pending
             else:
-                pending = PendingProduct(
-                    code=code,
-                    name=name,
-                    unit_price=unit_price,
-                    category=default_category,
-                    description=description,
-                    size=size,
-                )
-                pending_products_to_create.append(pending)
-                pending_by_code[code] = (pending, quantity)
-
-        # 4. bulk_create PendingProduct
-        created_pending = PendingProduct.objects.bulk_create(
-            pending_products_to_create
-        )
-
-        # 5. Створюємо InvoiceLineItem для PendingProduct
-        for pending in created_pending:
-            quantity = pending_by_code[pending.code][1]
-            line_items_to_create.append(
-                InvoiceLineItem(
-                    document=invoice_doc,
-                    pending_product=pending,
-                    product=None,
-                    code=pending.code,
-                    quantity_ordered=quantity,
-                    quantity_delivered=0,
-                )
+                pending_to_update.append(pending)
+            pending.name = line["name"]
+            pending.unit_price = line["unit_price"]
+            pending.description = line["description"]
+            pending.size = line["size"]
+
+        PendingProduct.objects.bulk_create(pending_to_create)
+        if pending_to_update:
+            PendingProduct.objects.bulk_update(
+                pending_to_update, ["name", "unit_price", "description", "size"]
             )
 
-        InvoiceLineItem.objects.bulk_create(line_items_to_create)
+        # 4. Upsert InvoiceLineItem — одна позиція на код у фактурі
+        lines_to_create = []
+        lines_to_update = []
+        for code, line in lines.items():
+            product = existing_products.get(code)
+            line_item = existing_lines.get(code)
+            if line_item is None:
+                line_item = InvoiceLineItem(document=invoice_doc, code=code)
+                lines_to_create.append(line_item)
+            else:
+                lines_to_update.append(line_item)
+            line_item.product = product
+            line_item.pending_product = None if product else existing_pending[code]
+            line_item.quantity_ordered = line["quantity"]
+
+        InvoiceLineItem.objects.bulk_create(lines_to_create)
+        if lines_to_update:
+            InvoiceLineItem.objects.bulk_update(
+                lines_to_update, ["product", "pending_product", "quantity_ordered"]
+            )
 
-        return Response(
-            {
-                "status": "ok",
-                "created_pending_products": [p.code for p in created_pending],
-                "used_existing_products": list(existing_products.keys()),
-            },
-            status=status.HTTP_201_CREATED,
-        )
+        body = {
+            "status": "ok",
+            "created_pending_products": [p.code for p in pending_to_create],
+            "updated_pending_products": [p.code for p in pending_to_update],
+            "used_existing_products": list(existing_products.keys()),
+        }
+
+        try:
+            with transaction.atomic():
+                IdempotencyKey.objects.create(
+                    key=key,
+                    endpoint=self.idempotency_scope,
+                    response=body,
+                    status_code=status.HTTP_201_CREATED,
+                )
+        except IntegrityError:
+            # a concurrent identical request won the race - discard this one
+            stored = IdempotencyKey.objects.get(key=key)
+            transaction.set_rollback(True)
+            return Response(stored.response, status=stored.status_code)
+
+        record_result(request, "extract_fv", body)
+        return Response(body, status=status.HTTP_201_CREATED)
@@ -0,0 +1,68 @@
+import json
+import random
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = "Run a local stand-in for the OCR service (point LUSTRO_URL at it)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--port", type=int, default=8765)
+        parser.add_argument(
+            "--delay", type=float, default=0.0, help="Seconds to wait before answering"
+        )
+        parser.add_argument(
+            "--fail-rate",
+            type=float,
+            default=0.0,
+            help="Fraction of requests answered with HTTP 503",
+        )
+
+    def handle(self, *args, **options):
+        stdout = self.stdout
+        delay = options["delay"]
+        fail_rate = options["fail_rate"]
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length)
+                if delay:
+                    time.sleep(delay)
+
+                if random.random() < fail_rate:
+                    self.send_response(503)
+                    self.end_headers()
+                    return
+
+                try:
+                    payload = json.loads(body or b"{}")
+                except ValueError:
+                    self.send_response(400)
+                    self.end_headers()
+                    return
+
+                stdout.write(f"Received {payload.get('doc_type')}: {payload.get('file_url')}")
+                answer = json.dumps({"status": "accepted"}).encode()
+                self.send_response(202)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(answer)))
+                self.end_headers()
+                self.wfile.write(answer)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer(("127.0.0.1", options["port"]), Handler)
+        self.stdout.write(
+            self.style.SUCCESS(f"OCR stub listening on http://127.0.0.1:{options['port']}/")
+        )
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
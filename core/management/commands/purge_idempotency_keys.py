@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from core.utils import purge_idempotency_keys
+
+
+class Command(BaseCommand):
+    help = "Delete stored import responses older than IDEMPOTENCY_KEY_TTL (run periodically)"
+
+    def handle(self, *args, **options):
+        deleted = purge_idempotency_keys()
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} idempotency keys"))
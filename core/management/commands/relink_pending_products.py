@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from core.utils import replace_pending_products_safe
+
+
+class Command(BaseCommand):
+    help = "Relink all invoice lines whose pending product has since been approved"
+
+    def handle(self, *args, **options):
+        updated = replace_pending_products_safe()
+        self.stdout.write(self.style.SUCCESS(f"Relinked {updated} invoice lines"))
@@ -0,0 +1,47 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from core.ocr import send_batch
+
+
+class Command(BaseCommand):
+    help = "Deliver queued invoice/WZ submissions to the OCR service"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Send what is due and exit",
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=2.0,
+            help="Seconds to wait when the outbox is empty",
+        )
+
+    def handle(self, *args, **options):
+        sent = failed = 0
+        try:
+            while True:
+                close_old_connections()
+                entries = send_batch()
+                for entry in entries:
+                    if entry.status == "sent":
+                        sent += 1
+                    elif entry.status == "failed":
+                        failed += 1
+                        self.stdout.write(
+                            self.style.ERROR(f"Entry {entry.pk} failed: {entry.last_error}")
+                        )
+
+                if not entries:
+                    if options["once"]:
+                        break
+                    time.sleep(options["sleep"])
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(self.style.SUCCESS(f"Sent: {sent}, Failed: {failed}"))
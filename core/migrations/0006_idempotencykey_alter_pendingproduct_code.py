@@ -0,0 +1,37 @@
+# Generated by Django 5.2.6 on 2026-10-19 02:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0005_alter_pendingproduct_category"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="IdempotencyKey",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("key", models.CharField(max_length=64, unique=True)),
+                ("endpoint", models.CharField(max_length=100)),
+                ("response", models.JSONField()),
+                ("status_code", models.IntegerField(default=200)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name="pendingproduct",
+            name="code",
+            field=models.CharField(db_index=True, max_length=50),
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 5.2.6 on 2026-10-19 02:19
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0007_ocroutbox"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="UploadedDocument",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("content_hash", models.CharField(max_length=64)),
+                ("doc_type", models.CharField(max_length=20)),
+                ("path", models.CharField(max_length=255)),
+                ("original_name", models.CharField(blank=True, max_length=255)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("queued", "W kolejce"),
+                            ("sent", "Wysłane"),
+                            ("done", "Przetworzone"),
+                            ("failed", "Błąd"),
+                        ],
+                        default="queued",
+                        max_length=10,
+                    ),
+                ),
+                ("result", models.JSONField(blank=True, null=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("processed_at", models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                "unique_together": {("content_hash", "doc_type")},
+            },
+        ),
+        migrations.AddField(
+            model_name="ocroutbox",
+            name="upload",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                to="core.uploadeddocument",
+            ),
+        ),
+    ]
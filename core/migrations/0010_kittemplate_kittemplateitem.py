@@ -0,0 +1,77 @@
+# Generated by Django 5.2.6 on 2026-10-19 02:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0009_uploadbatch"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="KitTemplate",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=100)),
+                (
+                    "position",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="kit",
+                        to="core.position",
+                    ),
+                ),
+            ],
+        ),
+        migrations.CreateModel(
+            name="KitTemplateItem",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("quantity", models.PositiveIntegerField(default=1)),
+                (
+                    "period_days",
+                    models.PositiveIntegerField(
+                        blank=True,
+                        help_text="Okres użytkowania; puste = wartość z produktu",
+                        null=True,
+                    ),
+                ),
+                (
+                    "product",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.PROTECT, to="core.product"
+                    ),
+                ),
+                (
+                    "template",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="items",
+                        to="core.kittemplate",
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("template", "product")},
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.6 on 2026-10-19 02:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0010_kittemplate_kittemplateitem"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="ocroutbox",
+            name="lease_until",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name="ocroutbox",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("pending", "Oczekuje"),
+                    ("sending", "Wysyłanie"),
+                    ("sent", "Wysłane"),
+                    ("failed", "Błąd"),
+                ],
+                default="pending",
+                max_length=10,
+            ),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-19 03:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0011_ocroutbox_lease"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="idempotencykey",
+            name="created_at",
+            field=models.DateTimeField(auto_now_add=True, db_index=True),
+        ),
+    ]
@@ -1,4 +1,8 @@
+from datetime import timedelta
+
+from django.conf import settings
 from django.db import models
+from django.utils import timezone
 
 
 class Company(models.Model):
@@ -67,8 +71,32 @@ class Product(models.Model):
         return f"{self.code} - {self.name}{size_display}"
     
 
+class KitTemplate(models.Model):
+    # Standard kit issued to every employee on a position
+    position = models.OneToOneField(Position, on_delete=models.CASCADE, related_name="kit")
+    name = models.CharField(max_length=100)
+
+    def __str__(self):
+        return f"{self.name} ({self.position})"
+
+
+class KitTemplateItem(models.Model):
+    template = models.ForeignKey(KitTemplate, on_delete=models.CASCADE, related_name="items")
+    product = models.ForeignKey(Product, on_delete=models.PROTECT)
+    quantity = models.PositiveIntegerField(default=1)
+    period_days = models.PositiveIntegerField(
+        blank=True, null=True, help_text="Okres użytkowania; puste = wartość z produktu"
+    )
+
+    class Meta:
+        unique_together = ["template", "product"]
+
+    def __str__(self):
+        return f"{self.template.name}: {self.product} x{self.quantity}"
+
+
 class PendingProduct(models.Model):
-    code = models.CharField(max_length=50)
+    code = models.CharField(max_length=50, db_index=True)
     name = models.CharField(max_length=200)
     category = models.ForeignKey(ProductCategory, on_delete=models.PROTECT, default="clothing")
     size = models.CharField(max_length=20, blank=True, null=True)
@@ -82,3 +110,89 @@ class PendingProduct(models.Model):
 
     def __str__(self):
         return f"[PENDING] {self.code} - {self.name}"
+
+
+class IdempotencyKey(models.Model):
+    # Stores the response of an import request so retries are answered without reprocessing
+    key = models.CharField(max_length=64, unique=True)
+    endpoint = models.CharField(max_length=100)
+    response = models.JSONField()
+    status_code = models.IntegerField(default=200)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"{self.endpoint}: {self.key}"
+
+    @property
+    def is_expired(self):
+        # після IDEMPOTENCY_KEY_TTL повтор запиту обробляється як новий
+        return self.created_at <= timezone.now() - timedelta(
+            seconds=settings.IDEMPOTENCY_KEY_TTL
+        )
+
+
+class UploadedDocument(models.Model):
+    # Scan stored under its content hash; result caches the import response for it
+    STATUS_CHOICES = [
+        ("queued", "W kolejce"),
+        ("sent", "Wysłane"),
+        ("done", "Przetworzone"),
+        ("failed", "Błąd"),
+    ]
+
+    content_hash = models.CharField(max_length=64)
+    doc_type = models.CharField(max_length=20)
+    path = models.CharField(max_length=255)
+    original_name = models.CharField(max_length=255, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="queued")
+    result = models.JSONField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        unique_together = ["content_hash", "doc_type"]
+
+    def __str__(self):
+        return f"{self.original_name or self.path} ({self.get_status_display()})"
+
+
+class UploadBatch(models.Model):
+    # Files submitted together from the invoice analysis form
+    doc_type = models.CharField(max_length=20)
+    uploads = models.ManyToManyField(UploadedDocument, related_name="batches")
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, blank=True, null=True
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Batch #{self.pk} ({self.doc_type})"
+
+
+class OcrOutbox(models.Model):
+    # Submissions waiting to be delivered to the OCR service by send_ocr_outbox
+    STATUS_CHOICES = [
+        ("pending", "Oczekuje"),
+        ("sending", "Wysyłanie"),
+        ("sent", "Wysłane"),
+        ("failed", "Błąd"),
+    ]
+
+    payload = models.JSONField()
+    upload = models.ForeignKey(
+        UploadedDocument, on_delete=models.SET_NULL, blank=True, null=True
+    )
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="pending")
+    attempts = models.IntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    # claimed by a sender until this time; after it expires the row can be reclaimed
+    lease_until = models.DateTimeField(blank=True, null=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["status", "next_attempt_at"])]
+
+    def __str__(self):
+        return f"[OCR] {self.payload.get('file_url', '')} ({self.status})"
@@ -0,0 +1,137 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+import requests
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from requests.adapters import HTTPAdapter
+
+from core.models import OcrOutbox, UploadedDocument
+
+logger = logging.getLogger(__name__)
+
+MAX_RETRY_DELAY = 3600
+
+_session = None
+
+
+def get_session():
+    """Process-wide session so connections to the OCR service are reused"""
+    global _session
+    if _session is None:
+        adapter = HTTPAdapter(
+            pool_connections=settings.OCR_POOL_SIZE,
+            pool_maxsize=settings.OCR_POOL_SIZE,
+            max_retries=0,
+        )
+        _session = requests.Session()
+        _session.mount("http://", adapter)
+        _session.mount("https://", adapter)
+    return _session
+
+
+def queue_submission(payload, upload=None):
+    """Store a submission; the upload request returns without waiting for the OCR service"""
+    return OcrOutbox.objects.create(payload=payload, upload=upload)
+
+
+def deliver(entry):
+    """POST one outbox entry and update its state in memory"""
+    entry.attempts += 1
+    try:
+        response = get_session().post(
+            settings.LUSTRO_URL,
+            json=entry.payload,
+            timeout=(settings.LUSTRO_CONNECT_TIMEOUT, settings.LUSTRO_READ_TIMEOUT),
+        )
+        response.raise_for_status()
+    except requests.RequestException as e:
+        entry.last_error = str(e)
+        status_code = getattr(e.response, "status_code", None)
+        # other 4xx answers will not get better on retry
+        permanent = status_code is not None and 400 <= status_code < 500 and status_code != 429
+        if permanent or entry.attempts >= settings.OCR_OUTBOX_MAX_ATTEMPTS:
+            entry.status = "failed"
+        else:
+            delay = settings.OCR_OUTBOX_RETRY_DELAY * 2 ** (entry.attempts - 1)
+            entry.next_attempt_at = timezone.now() + timedelta(
+                seconds=min(delay, MAX_RETRY_DELAY)
+            )
+        logger.warning("OCR submission %s failed: %s", entry.pk, e)
+        return False
+
+    entry.status = "sent"
+    entry.sent_at = timezone.now()
+    entry.last_error = ""
+    return True
+
+
+def claim_batch(batch_size):
+    """Mark due entries as `sending` under a lease in a short transaction.
+
+    Rows locked by another sender are skipped; rows whose lease expired
+    (a sender died mid-delivery) are claimed again.
+    """
+    now = timezone.now()
+    lease_until = now + timedelta(seconds=settings.OCR_OUTBOX_LEASE)
+    with transaction.atomic():
+        entries = list(
+            OcrOutbox.objects.select_for_update(skip_locked=True)
+            .filter(
+                Q(status="pending", next_attempt_at__lte=now)
+                | Q(status="sending", lease_until__lte=now)
+            )
+            .order_by("next_attempt_at", "id")[:batch_size]
+        )
+        OcrOutbox.objects.filter(pk__in=[e.pk for e in entries]).update(
+            status="sending", lease_until=lease_until
+        )
+    # deliver() leaves a retried entry as pending; the lease is cleared on write-back
+    for entry in entries:
+        entry.status = "pending"
+        entry.lease_until = None
+    return entries, lease_until
+
+
+def send_batch(batch_size=None):
+    """Deliver due outbox entries.
+
+    No transaction or row lock is held during the HTTP calls: entries are
+    claimed first, delivered, and the results written back in a second
+    short transaction.
+    """
+    batch_size = batch_size or settings.OCR_OUTBOX_BATCH_SIZE
+    entries, lease_until = claim_batch(batch_size)
+    if not entries:
+        return entries
+
+    workers = min(settings.OCR_POOL_SIZE, len(entries))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(deliver, entries))
+
+    with transaction.atomic():
+        # skip rows reclaimed by another sender after our lease expired
+        owned = set(
+            OcrOutbox.objects.select_for_update()
+            .filter(
+                pk__in=[e.pk for e in entries], status="sending", lease_until=lease_until
+            )
+            .values_list("pk", flat=True)
+        )
+        entries = [e for e in entries if e.pk in owned]
+        OcrOutbox.objects.bulk_update(
+            entries,
+            ["status", "attempts", "next_attempt_at", "lease_until", "last_error", "sent_at"],
+        )
+        for entry_status, upload_status in (("sent", "sent"), ("failed", "failed")):
+            upload_ids = [
+                e.upload_id for e in entries if e.upload_id and e.status == entry_status
+            ]
+            if upload_ids:
+                UploadedDocument.objects.filter(
+                    pk__in=upload_ids, status="queued"
+                ).update(status=upload_status)
+    return entries
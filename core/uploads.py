@@ -0,0 +1,136 @@
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils import timezone
+
+from core.models import UploadBatch, UploadedDocument
+from core.ocr import queue_submission
+
+FORWARD_URL_MAP = {
+    "extract_fv": "/core/api/products/pending/create/",
+    "extract_wz": "/documents/api/documents/pending/create/",
+}
+
+
+def hash_upload(file):
+    """SHA-256 of an uploaded file, read chunk by chunk"""
+    hasher = hashlib.sha256()
+    for chunk in file.chunks():
+        hasher.update(chunk)
+    file.seek(0)
+    return hasher.hexdigest()
+
+
+def write_upload(file, content_hash):
+    """Save the file under its hash unless identical content is already stored"""
+    ext = os.path.splitext(file.name)[1].lower()
+    path = f"uploads/{content_hash[:2]}/{content_hash}{ext}"
+    if not default_storage.exists(path):
+        path = default_storage.save(path, file)
+    return path
+
+
+def store_upload(file):
+    """Save an uploaded file under its SHA-256 and return (hash, path).
+
+    The upload is streamed in chunks (hashing, then copying to storage) and
+    never held in memory as a whole; identical content is stored once.
+    """
+    content_hash = hash_upload(file)
+    return content_hash, write_upload(file, content_hash)
+
+
+def store_uploads(files):
+    """Hash and store many files with a bounded thread pool; returns [(hash, path)]"""
+    workers = max(1, min(settings.UPLOAD_WORKERS, len(files)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        hashes = list(pool.map(hash_upload, files))
+
+        # identical files in one batch are written once
+        unique = {}
+        for file, content_hash in zip(files, hashes):
+            unique.setdefault(content_hash, file)
+        paths = dict(
+            zip(unique, pool.map(write_upload, unique.values(), unique.keys()))
+        )
+    return [(content_hash, paths[content_hash]) for content_hash in hashes]
+
+
+def register_upload(content_hash, path, name, doc_type):
+    """Queue stored content for OCR unless it was already submitted.
+
+    Returns (UploadedDocument, queued) - queued is False for a known duplicate.
+    """
+    upload, created = UploadedDocument.objects.get_or_create(
+        content_hash=content_hash,
+        doc_type=doc_type,
+        defaults={"path": path, "original_name": name},
+    )
+    if not created and upload.status != "failed":
+        return upload, False
+
+    if not created:
+        upload.status = "queued"
+        upload.path = path
+        upload.save(update_fields=["status", "path"])
+
+    forward_url = settings.HOSTING_URL + FORWARD_URL_MAP.get(doc_type, "/")
+    payload = {
+        "doc_type": doc_type,
+        "file_url": settings.HOSTING_URL + default_storage.url(path),
+        "forward_url": f"{forward_url}?upload={content_hash}",
+        "wait_response": False,  # додати конфігурацію
+    }
+    queue_submission(payload, upload=upload)
+    return upload, True
+
+
+def submit_upload(file, doc_type):
+    """Store one file and queue it for OCR, see register_upload"""
+    content_hash, path = store_upload(file)
+    return register_upload(content_hash, path, file.name, doc_type)
+
+
+@transaction.atomic
+def submit_batch(files, doc_type, user=None):
+    """Store files in parallel, queue the new ones and group them in an UploadBatch"""
+    stored = store_uploads(files)
+    batch = UploadBatch.objects.create(
+        doc_type=doc_type,
+        created_by=user if user is not None and user.is_authenticated else None,
+    )
+    queued = 0
+    uploads = []
+    for file, (content_hash, path) in zip(files, stored):
+        upload, is_new = register_upload(content_hash, path, file.name, doc_type)
+        uploads.append(upload)
+        queued += is_new
+    batch.uploads.add(*uploads)
+    return batch, queued
+
+
+def get_cached_result(request, doc_type):
+    """Stored import result of the upload named in ?upload=, if it was processed"""
+    content_hash = request.query_params.get("upload")
+    if not content_hash:
+        return None
+    return (
+        UploadedDocument.objects.filter(
+            content_hash=content_hash, doc_type=doc_type, status="done"
+        )
+        .values_list("result", flat=True)
+        .first()
+    )
+
+
+def record_result(request, doc_type, result):
+    """Remember the import result for the upload named in ?upload="""
+    content_hash = request.query_params.get("upload")
+    if content_hash:
+        UploadedDocument.objects.filter(
+            content_hash=content_hash, doc_type=doc_type
+        ).update(status="done", result=result, processed_at=timezone.now())
@@ -7,6 +7,7 @@ urlpatterns = [
     #api
     path("api/", include("core.api.urls")),
     path("invoice/analyze/", views.InvoiceAnalyzeView.as_view(), name="invoice_analyze"),
+    path("invoice/batch/<int:pk>/", views.UploadBatchDetailView.as_view(), name="upload_batch"),
     # Company
     path("company/", views.CompanyListView.as_view(), name="company_list"),
     path("company/add/", views.CompanyCreateView.as_view(), name="company_add"),
@@ -1,10 +1,38 @@
-from core.models import Product
+from core.models import IdempotencyKey, PendingProduct, Product
 from documents.models import InvoiceLineItem
+from datetime import timedelta
+from django.conf import settings
 from django.db import transaction
+from django.utils import timezone
+from django.db.models import OuterRef, Subquery
+import hashlib
+import json
 import logging
     
 
+def relink_pending_products(codes):
+    """Point invoice lines of the given pending codes at their approved products.
+
+    Only lines whose pending product code now exists as a Product are touched,
+    using a single UPDATE with a correlated subquery.
+    """
+    codes = set(codes)
+    if not codes:
+        return 0
+
+    pending_code = PendingProduct.objects.filter(
+        pk=OuterRef(OuterRef("pending_product_id"))
+    ).values("code")[:1]
+    product_id = Product.objects.filter(code=Subquery(pending_code)).values("pk")[:1]
+
+    return InvoiceLineItem.objects.filter(
+        product__isnull=True,
+        pending_product__code__in=Product.objects.filter(code__in=codes).values("code"),
+    ).update(product_id=Subquery(product_id), pending_product=None)
+
+
 def replace_pending_products_safe():
+    """Full scan of all invoice lines with a pending product, see relink_pending_products"""
     try:
         with transaction.atomic():
         
@@ -55,4 +83,19 @@ def replace_pending_products_safe():
             
     except Exception as e:
         print(f"Error replacing pending_product: {str(e)}")
-        raise
\ No newline at end of file
+        raise
+
+
+def purge_idempotency_keys():
+    """Delete stored import responses older than IDEMPOTENCY_KEY_TTL"""
+    cutoff = timezone.now() - timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL)
+    deleted, _ = IdempotencyKey.objects.filter(created_at__lte=cutoff).delete()
+    return deleted
+
+
+def get_idempotency_key(request, scope):
+    """Key of an import request: the Idempotency-Key header or a hash of the payload"""
+    raw = request.headers.get("Idempotency-Key")
+    if not raw:
+        raw = json.dumps(request.data, sort_keys=True, default=str)
+    return hashlib.sha256(f"{scope}:{raw}".encode()).hexdigest()
@@ -3,8 +3,8 @@ from django.views import View
 from django.urls import reverse
 from django.contrib import messages
 
-from core.utils import replace_pending_products_safe
-from .models import Company, Department, PendingProduct, Position, ProductCategory, Supplier, Product
+from core.utils import relink_pending_products
+from .models import Company, Department, PendingProduct, Position, ProductCategory, Supplier, Product, UploadBatch
 from .forms import (
     CompanyForm,
     DepartmentForm,
@@ -14,10 +14,7 @@ from .forms import (
     ProductForm,
 )
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.core.files.storage import default_storage
-from django.core.files.base import ContentFile
-from szafa import settings
-import requests
+from core.uploads import submit_batch, submit_upload
 
 #Invoice Analyze View
 class InvoiceAnalyzeView(LoginRequiredMixin, View):
@@ -28,34 +25,57 @@ class InvoiceAnalyzeView(LoginRequiredMixin, View):
         return render(request, self.template_name)
 
     def post(self, request, *args, **kwargs):
-        file = request.FILES.get("file")
+        files = request.FILES.getlist("file")
         doc_type = request.POST.get("doc_type")
-        forward_url_map = {
-            "extract_fv": "/core/api/products/pending/create/",
-            "extract_wz": "/documents/api/documents/pending/create/",
-        }
 
-        if file and doc_type:
-            path = default_storage.save(f"uploads/{file.name}", ContentFile(file.read()))
-            file_url = settings.HOSTING_URL + default_storage.url(path)
-
-            payload = {
-                "doc_type": doc_type,
-                "file_url": file_url,
-                "forward_url": settings.HOSTING_URL + forward_url_map.get(doc_type, "/"),
-                "wait_response": False, # додати конфігурацію
-            }
-            print("Payload:", payload)
-
-            try:
-                response = requests.post(settings.LUSTRO_URL, json=payload)
-                response.raise_for_status()
-                return redirect("core:invoice_analyze")
-            except Exception as e:
-                return render(request, self.template_name, {"error": str(e)})
-
-        return render(request, self.template_name, {"error": "Brak pliku lub typu faktury"})
-    
+        if not files or not doc_type:
+            return render(request, self.template_name, {"error": "Brak pliku lub typu faktury"})
+
+        try:
+            if len(files) > 1:
+                batch, queued = submit_batch(files, doc_type, request.user)
+                messages.success(
+                    request,
+                    f"Przesłano {len(files)} plików, do analizy przekazano {queued}.",
+                )
+                return redirect("core:upload_batch", pk=batch.pk)
+
+            upload, queued = submit_upload(files[0], doc_type)
+        except Exception as e:
+            return render(request, self.template_name, {"error": str(e)})
+
+        if queued:
+            messages.success(request, "Plik został przekazany do analizy.")
+        else:
+            messages.info(
+                request,
+                f"Ten plik był już przesłany ({upload.get_status_display()}) — pominięto ponowną analizę.",
+            )
+        return redirect("core:invoice_analyze")
+
+
+class UploadBatchDetailView(LoginRequiredMixin, View):
+    template_name = "core/upload_batch.html"
+
+    def get(self, request, pk):
+        batch = get_object_or_404(UploadBatch, pk=pk)
+        uploads = list(batch.uploads.order_by("original_name"))
+
+        counts = {}
+        for upload in uploads:
+            counts[upload.status] = counts.get(upload.status, 0) + 1
+        finished = counts.get("done", 0) + counts.get("failed", 0)
+
+        return render(request, self.template_name, {
+            "batch": batch,
+            "uploads": uploads,
+            "counts": counts,
+            "finished": finished,
+            "percent": int(finished * 100 / len(uploads)) if uploads else 100,
+            "is_finished": finished == len(uploads),
+            "active": "system",
+        })
+
 # --- reusable base classes ---
 class BaseListView(LoginRequiredMixin, View):
     model = None
@@ -384,15 +404,16 @@ class PendingProductListView(View):
                 ))
 
             Product.objects.bulk_create(new_products)
-            replace_pending_products_safe()
+            relink_pending_products(pending_codes)
             qs.delete()
 
             messages.success(request, f"Zatwierdzono {len(new_products)} produktów.")
             return redirect("core:pending_list")
 
         if action == "delete":
-            count = qs.count()
-            replace_pending_products_safe()
+            pending_codes = list(qs.values_list("code", flat=True))
+            count = len(pending_codes)
+            relink_pending_products(pending_codes)
             qs.delete()
             messages.success(request, f"Usunięto {count} pozycji.")
             return redirect("core:pending_list")
@@ -419,7 +440,7 @@ class PendingProductApproveView(View):
             period_days=item.period_days,
             description=item.description,
         )
-        replace_pending_products_safe()
+        relink_pending_products([item.code])
         item.delete()
         messages.success(request, f"Produkt {item.code} został zatwierdzony.")
         return redirect("core:pending_list")
@@ -427,8 +448,8 @@ class PendingProductApproveView(View):
 
 class PendingProductDeleteView(View):
     def post(self, request, pk):
-        replace_pending_products_safe()
         item = get_object_or_404(PendingProduct, pk=pk)
+        relink_pending_products([item.code])
         item.delete()
         messages.success(request, "Usunięto rekord.")
         return redirect("core:pending_list")
@@ -7,7 +7,8 @@ from .models import (
     DocumentItem, 
     ReceiptItem,
     InvoiceDocument,
-    InvoiceLineItem
+    InvoiceLineItem,
+    Entitlement,
 )
 
 
@@ -129,4 +130,12 @@ class InvoiceLineItemAdmin(admin.ModelAdmin):
         "date_recieved",
     ]
     list_filter = ["document"]
-    search_fields = ["document__order_number", "product__code", "pending_product__code"]
\ No newline at end of file
+    search_fields = ["document__order_number", "product__code", "pending_product__code"]
+
+
+@admin.register(Entitlement)
+class EntitlementAdmin(admin.ModelAdmin):
+    list_display = ["employee", "product", "quantity", "due_date", "last_issue_date"]
+    list_filter = ["due_date", "product__category"]
+    search_fields = ["employee__card_number", "product__code"]
+    readonly_fields = ["employee", "product", "quantity", "due_date", "last_issue_date", "updated_at"]
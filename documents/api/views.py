@@ -1,8 +1,10 @@
 from rest_framework.response import Response
 from core.api.serializer import FlexibleInvoiceSerializer
+from core.uploads import get_cached_result, record_result
 from core.models import Product, Supplier, Company
 from rest_framework import status, generics
 from django.db import transaction
+from django.db.models.functions import Lower
 from datetime import datetime
  
 from documents.models import PendingReceiptDocument, PendingReceiptItem
@@ -34,56 +36,85 @@ class PendingDocumentImportAPIView(generics.GenericAPIView):
         except (ValueError, TypeError):
             return None
 
+    def supplier_key(self, data):
+        """First word of the seller name, used to match Supplier.name"""
+        words = ((data.get("seller") or {}).get("name") or "").split()
+        return words[0].lower() if words else None
+
     @transaction.atomic
     def post(self, request, *args, **kwargs):
-        serializer = self.get_serializer(data=request.data)
+        many = isinstance(request.data, list)
+        serializer = self.get_serializer(data=request.data, many=many)
         serializer.is_valid(raise_exception=True)
-        data = serializer.validated_data
+        documents = serializer.validated_data if many else [serializer.validated_data]
 
-        items = data.get("items", [])
-        
-        suplier_str = data.get("seller", {}).get("name", "").split()[0].lower()
-        
-        # Parse dates before creating the document
-        order_date = self.parse_date(data.get("dates", {}).get("order_date"))
-        delivery_date = self.parse_date(data.get("dates", {}).get("delivery_date"))
-        
-        pending_doc = PendingReceiptDocument.objects.create(
-            supplier=Supplier.objects.filter(name__iexact=suplier_str).first(),
-            recipient=Company.objects.filter(name="Ceva 1").first(),
-            issue_date=order_date,
-            delivery_date=delivery_date,
-            reference_number=data.get("reference_number"),
-            document_number=data.get("document_number"),
-            order_number=data.get("order_number"),
-        )
+        # the same scan was already imported - don't create duplicate pending documents
+        cached = get_cached_result(request, "extract_wz")
+        if cached is not None:
+            return Response(cached, status=status.HTTP_200_OK)
 
-        pending_items = []
-        for item in items:
-            code = item.get("code")
+        # resolve every product code, supplier and the recipient once for the whole batch
+        codes = {
+            item.get("code")
+            for data in documents
+            for item in data.get("items", [])
+            if item.get("code")
+        }
+        products = Product.objects.in_bulk(codes, field_name="code")
 
-            product = None
-            if code:
-                product = Product.objects.filter(code=code).first()
+        supplier_keys = {self.supplier_key(data) for data in documents} - {None}
+        suppliers = {}
+        if supplier_keys:
+            for supplier in (
+                Supplier.objects.annotate(name_lower=Lower("name"))
+                .filter(name_lower__in=supplier_keys)
+                .order_by("id")
+            ):
+                suppliers.setdefault(supplier.name_lower, supplier)
 
-            pending_items.append(
-                PendingReceiptItem(
-                    document=pending_doc,
-                    code=code,
-                    name=item.get("name", "") or "",
-                    quantity_ordered=item.get("quantity_ordered") or 0,
-                    quantity_delivered=item.get("quantity_delivered") or 0,
-                    product=product, 
+        recipient = Company.objects.filter(name="Ceva 1").first()
+
+        pending_docs = []
+        for data in documents:
+            dates = data.get("dates") or {}
+            pending_docs.append(
+                PendingReceiptDocument(
+                    supplier=suppliers.get(self.supplier_key(data)),
+                    recipient=recipient,
+                    issue_date=self.parse_date(dates.get("order_date")),
+                    delivery_date=self.parse_date(dates.get("delivery_date")),
+                    reference_number=data.get("reference_number"),
+                    document_number=data.get("document_number"),
+                    order_number=data.get("order_number"),
+                )
+            )
+        PendingReceiptDocument.objects.bulk_create(pending_docs)
+
+        pending_items = []
+        results = []
+        for pending_doc, data in zip(pending_docs, documents):
+            items = data.get("items", [])
+            for item in items:
+                code = item.get("code")
+                pending_items.append(
+                    PendingReceiptItem(
+                        document=pending_doc,
+                        code=code,
+                        name=item.get("name", "") or "",
+                        quantity_ordered=item.get("quantity_ordered") or 0,
+                        quantity_delivered=item.get("quantity_delivered") or 0,
+                        product=products.get(code) if code else None,
+                    )
                 )
+            results.append(
+                {"pending_document_id": pending_doc.id, "items_created": len(items)}
             )
 
-        PendingReceiptItem.objects.bulk_create(pending_items)
+        PendingReceiptItem.objects.bulk_create(pending_items, batch_size=1000)
 
-        return Response(
-            {
-                "status": "ok",
-                "pending_document_id": pending_doc.id,
-                "items_created": len(pending_items)
-            },
-            status=status.HTTP_201_CREATED,
-        )
\ No newline at end of file
+        if many:
+            body = {"status": "ok", "documents": results}
+        else:
+            body = {"status": "ok", **results[0]}
+        record_result(request, "extract_wz", body)
+        return Response(body, status=status.HTTP_201_CREATED)
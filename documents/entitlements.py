@@ -0,0 +1,170 @@
+import threading
+from datetime import date, timedelta
+
+from django.db import transaction
+from django.db.models import Max
+
+from core.models import KitTemplateItem
+from documents.models import DocumentItem, Entitlement, IssueDocument
+from employees.models import Employee
+
+CHUNK_SIZE = 1000
+
+
+def _chunks(ids):
+    ids = list(ids)
+    for i in range(0, len(ids), CHUNK_SIZE):
+        yield ids[i:i + CHUNK_SIZE]
+
+
+def rebuild_entitlements(employee_ids=None):
+    """Recompute the Entitlement rows of the given employees (all by default).
+
+    Active employees get one row per product of their position's kit, due
+    when the last issue of that product expires, or at the start of the
+    current employment period if it was never issued. Everyone else loses
+    their rows. Work is done per chunk of employees with a fixed number of
+    queries and only changed rows are written. Returns (created, updated, deleted).
+    """
+    if employee_ids is None:
+        employee_ids = Employee.objects.values_list("pk", flat=True)
+
+    totals = [0, 0, 0]
+    for chunk in _chunks(employee_ids):
+        for i, count in enumerate(_rebuild_chunk(chunk)):
+            totals[i] += count
+    return tuple(totals)
+
+
+@transaction.atomic
+def _rebuild_chunk(employee_ids):
+    employees = {
+        e["pk"]: e
+        for e in Employee.objects.with_current_period()
+        .filter(pk__in=employee_ids, is_active=True, position__kit__isnull=False)
+        .values("pk", "position_id", "period_start")
+    }
+
+    kits = {}
+    for item in KitTemplateItem.objects.filter(
+        template__position_id__in={e["position_id"] for e in employees.values()}
+    ).select_related("template", "product"):
+        kits.setdefault(item.template.position_id, []).append(item)
+
+    last_issues = {
+        (row["document__employee_id"], row["product_id"]): row
+        for row in DocumentItem.objects.filter(
+            document__employee_id__in=employees,
+            product_id__in={i.product_id for items in kits.values() for i in items},
+        )
+        .exclude(status="returned")
+        .values("document__employee_id", "product_id")
+        .annotate(
+            last_issue=Max("document__issue_date"),
+            next_issue=Max("next_issue_date"),
+        )
+    }
+
+    today = date.today()
+    wanted = {}
+    for employee_id, employee in employees.items():
+        for item in kits.get(employee["position_id"], []):
+            issue = last_issues.get((employee_id, item.product_id))
+            if issue and issue["last_issue"]:
+                period = item.period_days or item.product.period_days
+                due_date = issue["next_issue"] or issue["last_issue"] + timedelta(days=period)
+                last_issue = issue["last_issue"]
+            else:
+                due_date = employee["period_start"] or today
+                last_issue = None
+            wanted[(employee_id, item.product_id)] = (item.quantity, due_date, last_issue)
+
+    existing = {
+        (e.employee_id, e.product_id): e
+        for e in Entitlement.objects.filter(employee_id__in=employee_ids)
+    }
+
+    to_create = []
+    to_update = []
+    for key, (quantity, due_date, last_issue) in wanted.items():
+        entitlement = existing.get(key)
+        if entitlement is None:
+            to_create.append(
+                Entitlement(
+                    employee_id=key[0],
+                    product_id=key[1],
+                    quantity=quantity,
+                    due_date=due_date,
+                    last_issue_date=last_issue,
+                )
+            )
+        elif (entitlement.quantity, entitlement.due_date, entitlement.last_issue_date) != (
+            quantity, due_date, last_issue
+        ):
+            entitlement.quantity = quantity
+            entitlement.due_date = due_date
+            entitlement.last_issue_date = last_issue
+            to_update.append(entitlement)
+
+    stale = [e.pk for key, e in existing.items() if key not in wanted]
+
+    Entitlement.objects.bulk_create(to_create)
+    Entitlement.objects.bulk_update(to_update, ["quantity", "due_date", "last_issue_date", "updated_at"])
+    if stale:
+        Entitlement.objects.filter(pk__in=stale).delete()
+    return len(to_create), len(to_update), len(stale)
+
+
+# employee ids waiting for the next commit on this thread's connection
+_pending = threading.local()
+
+
+def _flush_pending():
+    employee_ids = getattr(_pending, "ids", None) or set()
+    document_ids = getattr(_pending, "document_ids", None)
+    if document_ids:
+        _pending.document_ids = set()
+        # документи, видалені разом з позиціями, обробляє сигнал IssueDocument
+        employee_ids |= set(
+            IssueDocument.objects.filter(pk__in=document_ids).values_list(
+                "employee_id", flat=True
+            )
+        )
+    if employee_ids:
+        _pending.ids = set()
+        rebuild_entitlements(employee_ids)
+
+
+def schedule_rebuild(employee_ids):
+    """Rebuild entitlements of the employees once the transaction commits.
+
+    Ids are collected in a per-thread set and the first on_commit callback
+    of the transaction rebuilds all of them at once; the rest find the set
+    empty. Ids left over from a rolled back block are rebuilt with the next
+    commit, which is harmless because the rebuild is idempotent. Outside an
+    atomic block the rebuild runs immediately.
+    """
+    employee_ids = {i for i in employee_ids if i}
+    if not employee_ids:
+        return
+
+    if not hasattr(_pending, "ids"):
+        _pending.ids = set()
+    _pending.ids.update(employee_ids)
+    transaction.on_commit(_flush_pending)
+
+
+def schedule_document_rebuild(document_ids):
+    """Like schedule_rebuild, for the employees of the given issue documents.
+
+    The documents are resolved to employees with one query when the
+    transaction commits, instead of one lookup per saved item.
+    """
+    document_ids = {i for i in document_ids if i}
+    if not document_ids:
+        return
+
+    if not hasattr(_pending, "document_ids"):
+        _pending.document_ids = set()
+    _pending.document_ids.update(document_ids)
+    transaction.on_commit(_flush_pending)
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from documents.entitlements import rebuild_entitlements
+from employees.models import Employee
+
+
+class Command(BaseCommand):
+    help = "Rebuild the kit entitlement schedule (all employees or selected card numbers)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("card_numbers", nargs="*", help="Limit to these card numbers")
+
+    def handle(self, *args, **options):
+        employee_ids = None
+        if options["card_numbers"]:
+            employee_ids = Employee.objects.filter(
+                card_number__in=options["card_numbers"]
+            ).values_list("pk", flat=True)
+
+        created, updated, deleted = rebuild_entitlements(employee_ids)
+        self.stdout.write(
+            self.style.SUCCESS(f"Created {created}, updated {updated}, deleted {deleted}")
+        )
@@ -1,23 +1,27 @@
 from django.core.management.base import BaseCommand
+from django.db import transaction
 
 from documents.models import DocumentItem
+from employees.utils import employment_period_cache
 
 
 class Command(BaseCommand):
     help = "Update total_value for all existing DocumentItem records"
 
     def handle(self, *args, **options):
-        items = DocumentItem.objects.all()
-        for item in items:
-            if item.quantity is not None and item.product.unit_price is not None:
-                item.total_value = item.quantity * item.product.unit_price
-                item.unit_price = item.product.unit_price
-                item.size = item.product.size
-            else:
-                item.total_value = None
-                item.unit_price = None
-                item.size = None
-            item.save(update_fields=["total_value", "unit_price", "size"])
+        items = DocumentItem.objects.select_related("product", "document__employee")
+        # one transaction: signal side effects are flushed once on commit
+        with transaction.atomic(), employment_period_cache():
+            for item in items:
+                if item.quantity is not None and item.product.unit_price is not None:
+                    item.total_value = item.quantity * item.product.unit_price
+                    item.unit_price = item.product.unit_price
+                    item.size = item.product.size
+                else:
+                    item.total_value = None
+                    item.unit_price = None
+                    item.size = None
+                item.save(update_fields=["total_value", "unit_price", "size"])
         self.stdout.write(
             self.style.SUCCESS(f"Successfully updated {items.count()} records")
         )
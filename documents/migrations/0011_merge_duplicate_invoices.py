@@ -0,0 +1,37 @@
+# Generated by Django 5.2.6 on 2026-10-19 02:17
+
+from django.db import migrations, models
+
+
+def merge_duplicate_invoices(apps, schema_editor):
+    """Fold invoices sharing an order number into the oldest one"""
+    InvoiceDocument = apps.get_model("documents", "InvoiceDocument")
+    InvoiceLineItem = apps.get_model("documents", "InvoiceLineItem")
+
+    duplicates = (
+        InvoiceDocument.objects.exclude(order_number__isnull=True)
+        .values("order_number")
+        .annotate(count=models.Count("id"), keep_id=models.Min("id"))
+        .filter(count__gt=1)
+    )
+    for row in duplicates:
+        others = InvoiceDocument.objects.filter(
+            order_number=row["order_number"]
+        ).exclude(id=row["keep_id"])
+        InvoiceLineItem.objects.filter(document__in=others).update(
+            document_id=row["keep_id"]
+        )
+        others.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("documents", "0010_pendingreceiptdocument_order_number"),
+    ]
+
+    # окремо від AlterField: на PostgreSQL видалення дублікатів залишає
+    # відкладені тригери FK, і ALTER TABLE в тій самій транзакції падає
+    operations = [
+        migrations.RunPython(merge_duplicate_invoices, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-19 02:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("documents", "0011_merge_duplicate_invoices"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="invoicedocument",
+            name="order_number",
+            field=models.CharField(blank=True, max_length=255, null=True, unique=True),
+        ),
+    ]
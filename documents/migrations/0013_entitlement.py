@@ -0,0 +1,58 @@
+# Generated by Django 5.2.6 on 2026-10-19 02:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0010_kittemplate_kittemplateitem"),
+        ("documents", "0012_alter_invoicedocument_order_number"),
+        ("employees", "0005_employmentperiod_no_overlap"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Entitlement",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("quantity", models.PositiveIntegerField(default=1)),
+                ("due_date", models.DateField()),
+                ("last_issue_date", models.DateField(blank=True, null=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "employee",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="entitlements",
+                        to="employees.employee",
+                    ),
+                ),
+                (
+                    "product",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, to="core.product"
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["due_date"],
+                "indexes": [
+                    models.Index(
+                        fields=["due_date", "product"],
+                        name="documents_e_due_dat_2c8151_idx",
+                    )
+                ],
+                "unique_together": {("employee", "product")},
+            },
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.6 on 2026-10-19 02:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("documents", "0013_entitlement"),
+        ("employees", "0006_employmentperiod_employees_e_employe_d70cf6_idx"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="documentitem",
+            name="status_changed_on",
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="issuedocument",
+            index=models.Index(
+                fields=["employee", "issue_date"], name="documents_i_employe_385f0b_idx"
+            ),
+        ),
+    ]
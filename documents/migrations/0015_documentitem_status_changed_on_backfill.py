@@ -0,0 +1,35 @@
+# Generated by Django 5.2.6 on 2026-10-19 03:11
+
+from django.db import migrations, models
+
+
+def backfill_status_changed_on(apps, schema_editor):
+    """Items without a recorded change date get their document's issue date"""
+    DocumentItem = apps.get_model("documents", "DocumentItem")
+    IssueDocument = apps.get_model("documents", "IssueDocument")
+    DocumentItem.objects.filter(status_changed_on__isnull=True).update(
+        status_changed_on=models.Subquery(
+            IssueDocument.objects.filter(pk=models.OuterRef("document_id")).values(
+                "issue_date"
+            )[:1]
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("documents", "0014_documentitem_status_changed_on_and_more"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="documentitem",
+            index=models.Index(
+                fields=["document", "status_changed_on"],
+                name="documents_d_documen_ffb4e1_idx",
+            ),
+        ),
+        # after AddIndex: no schema change follows the UPDATE in this transaction
+        migrations.RunPython(backfill_status_changed_on, migrations.RunPython.noop),
+    ]
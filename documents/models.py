@@ -24,6 +24,9 @@ class IssueDocument(DocumentBase):
     # Tracks items issued to specific employees with automatic numbering
     employee = models.ForeignKey(Employee, on_delete=models.PROTECT)
 
+    class Meta:
+        indexes = [models.Index(fields=["employee", "issue_date"])]
+
     def save(self, *args, **kwargs):
         if not self.document_number:
             year = self.issue_date.year
@@ -120,13 +123,20 @@ class DocumentItem(models.Model):
         default=False,
         help_text="Was automatically deactivated due to employment termination",
     )
+    # issue date until the status changes, then the day of the change
+    status_changed_on = models.DateField(blank=True, null=True)
 
     class Meta:
         ordering = ["-document__issue_date"]
+        indexes = [models.Index(fields=["document", "status_changed_on"])]
 
     def __str__(self):
         return f"{self.product} - {self.quantity} ({self.status})"
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._loaded_status = self.__dict__.get("status")
+
     def save(self, *args, **kwargs):
         # Automatic calculation of total_value
         if self.quantity is not None and self.unit_price is not None:
@@ -155,6 +165,13 @@ class DocumentItem(models.Model):
                 self.status = "used"
                 self.auto_deactivated = True
 
+        if self.status != self._loaded_status and self.status != "active":
+            self.status_changed_on = date.today()
+        elif self.status_changed_on is None:
+            # дата видачі, доки статус не зміниться (курсор історії працівника)
+            self.status_changed_on = self.document.issue_date
+        self._loaded_status = self.status
+
         super().save(*args, **kwargs)
 
     def mark_as_used(self):
@@ -210,7 +227,7 @@ class PendingReceiptItem(models.Model):
     
 
 class InvoiceDocument(models.Model):
-    order_number = models.CharField(max_length=255, blank=True, null=True)
+    order_number = models.CharField(max_length=255, blank=True, null=True, unique=True)
 
 
 class InvoiceLineItem(models.Model):
@@ -233,5 +250,20 @@ class InvoiceLineItem(models.Model):
             return f"[INVOICE ITEM] No product assigned (ID: {self.id})"
 
 
+class Entitlement(models.Model):
+    # Materialized schedule: which kit product is due for whom and when
+    # (rebuilt by documents.entitlements, do not edit by hand)
+    employee = models.ForeignKey(Employee, on_delete=models.CASCADE, related_name="entitlements")
+    product = models.ForeignKey(Product, on_delete=models.CASCADE)
+    quantity = models.PositiveIntegerField(default=1)
+    due_date = models.DateField()
+    last_issue_date = models.DateField(blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        unique_together = ["employee", "product"]
+        indexes = [models.Index(fields=["due_date", "product"])]
+        ordering = ["due_date"]
 
+    def __str__(self):
+        return f"{self.employee} - {self.product} ({self.due_date})"
@@ -0,0 +1,360 @@
+from datetime import date, timedelta
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from core.models import Product
+from documents.entitlements import schedule_rebuild
+from documents.models import (
+    DocumentItem,
+    InvoiceDocument,
+    InvoiceLineItem,
+    PendingReceiptDocument,
+    ReceiptDocument,
+    ReceiptItem,
+)
+from employees.utils import get_current_periods
+from warehouse.models import StockMovement, WarehouseStock
+from warehouse.utils import apply_stock_deltas, record_movements
+
+
+@transaction.atomic
+def approve_pending_receipt(pending_doc):
+    """Turn a pending WZ into a PZ document.
+
+    Invoice lines are matched by product code with a single query, receipt
+    items, stock and movements are written in bulk and delivered quantities
+    are updated with one bulk_update. Returns the created ReceiptDocument,
+    or None when the document was already approved (double submit, second job).
+    """
+    pending_doc = (
+        PendingReceiptDocument.objects.select_for_update()
+        .filter(pk=pending_doc.pk, approved=False)
+        .first()
+    )
+    if pending_doc is None:
+        return None
+
+    items = [
+        item
+        for item in pending_doc.items.select_related("product").order_by("id")
+        if item.product
+    ]
+
+    receipt_doc = ReceiptDocument.objects.create(
+        supplier=pending_doc.supplier,
+        recipient=pending_doc.recipient,
+        issue_date=pending_doc.delivery_date or date.today(),
+        document_type="PZ",
+    )
+
+    codes = {item.product.code for item in items}
+    invoice_lines = {}
+    for line in (
+        InvoiceLineItem.objects.filter(
+            document__order_number=pending_doc.order_number,
+            product__code__in=codes,
+        )
+        .select_related("product")
+        .order_by("id")
+    ):
+        invoice_lines.setdefault(line.product.code, line)
+
+    today = date.today()
+    new_lines = {}
+    receipt_items = []
+    movements = []
+    deltas = {}
+
+    for item in items:
+        product = item.product
+        unit_price = product.unit_price or 0
+        qty = item.quantity_delivered or 0
+        size = product.size or ""
+
+        line = invoice_lines.get(product.code) or new_lines.get(product.code)
+        if line is None:
+            # no invoice line for this product yet, track the delivery anyway
+            line = InvoiceLineItem(
+                product=product,
+                code=product.code,
+                quantity_ordered=0,
+                quantity_delivered=0,
+            )
+            new_lines[product.code] = line
+        line.quantity_delivered += qty
+        line.date_recieved = today
+
+        receipt_items.append(
+            ReceiptItem(
+                document=receipt_doc,
+                product=product,
+                quantity=qty,
+                size=size,
+                unit_price=unit_price,
+                total_value=unit_price * qty,
+                notes=item.description or "",
+            )
+        )
+        deltas[(product.id, size)] = deltas.get((product.id, size), 0) + qty
+        movements.append(
+            StockMovement(
+                product=product,
+                size=size,
+                movement_type="in",
+                quantity=qty,
+                document_type="PZ",
+                document_id=receipt_doc.id,
+                document_number=receipt_doc.document_number,
+                notes=f"External reception : {receipt_doc.document_number}",
+            )
+        )
+
+    ReceiptItem.objects.bulk_create(receipt_items)
+    apply_stock_deltas(deltas)
+    record_movements(movements)
+
+    if new_lines:
+        invoice_doc, _ = InvoiceDocument.objects.get_or_create(
+            order_number=pending_doc.order_number
+        )
+        for line in new_lines.values():
+            line.document = invoice_doc
+        InvoiceLineItem.objects.bulk_create(new_lines.values())
+
+    if invoice_lines:
+        InvoiceLineItem.objects.bulk_update(
+            invoice_lines.values(), ["quantity_delivered", "date_recieved"]
+        )
+
+    pending_doc.delete()
+    return receipt_doc
+
+
+def _load_items(doc, item_ids):
+    """Fetch the edited items of a document with one query"""
+    items = doc.items.in_bulk(item_ids)
+    missing = set(item_ids) - set(items)
+    if missing:
+        raise doc.items.model.DoesNotExist(
+            f"Pozycje {sorted(missing)} nie należą do dokumentu {doc.document_number}"
+        )
+    return items
+
+
+def _load_products(product_ids):
+    products = Product.objects.in_bulk({int(pid) for pid in product_ids})
+    missing = {int(pid) for pid in product_ids} - set(products)
+    if missing:
+        raise Product.DoesNotExist(f"Nie znaleziono produktów: {sorted(missing)}")
+    return products
+
+
+def _correction(product_id, size, diff, doc, document_type, label):
+    return StockMovement(
+        product_id=product_id,
+        size=size,
+        movement_type="in" if diff > 0 else "out",
+        quantity=abs(diff),
+        document_type=document_type,
+        document_id=doc.id,
+        document_number=doc.document_number,
+        notes=f"Korekta {label}: {doc.document_number}",
+    )
+
+
+@transaction.atomic
+def update_issue_document(doc, items_data, new_items_data):
+    """Apply an edit of a DW document.
+
+    items_data holds (item_id, quantity, size, notes) for existing lines,
+    new_items_data holds (product_id, quantity, size, notes). Items are
+    loaded once and saved with bulk_update, stock changes and movements are
+    posted in bulk, so the number of queries does not grow with the document.
+    """
+    items = _load_items(doc, [item_id for item_id, *_ in items_data])
+
+    # DocumentItem.save deactivates items issued after employment ended
+    period = get_current_periods([doc.employee_id]).get(doc.employee_id)
+    employment_ended = bool(
+        period and period.end_date and period.end_date <= date.today()
+    )
+
+    changed = []
+    deltas = {}
+    movements = []
+
+    for item_id, quantity, size, note in items_data:
+        item = items[item_id]
+        old_quantity = item.quantity
+
+        item.quantity = quantity
+        item.size = size or None
+        item.notes = note
+        item.total_value = (
+            quantity * item.unit_price if item.unit_price is not None else None
+        )
+        if item.status == "active" and employment_ended:
+            item.status = "used"
+            item.auto_deactivated = True
+            item.status_changed_on = date.today()
+        changed.append(item)
+
+        diff = old_quantity - quantity
+        if diff:
+            key = (item.product_id, item.size)
+            deltas[key] = deltas.get(key, 0) + diff
+            movements.append(
+                _correction(item.product_id, item.size, diff, doc, "DW_CORRECTION", "DW")
+            )
+
+    if changed:
+        DocumentItem.objects.bulk_update(
+            changed,
+            [
+                "quantity",
+                "size",
+                "notes",
+                "total_value",
+                "status",
+                "auto_deactivated",
+                "status_changed_on",
+            ],
+        )
+
+    if new_items_data:
+        products = _load_products([pid for pid, *_ in new_items_data])
+
+        # як у сигналі: списуємо з першого запису складу з ненульовою кількістю
+        stock_rows = {}
+        for stock in WarehouseStock.objects.filter(
+            product_id__in=[product.id for product in products.values()],
+            quantity__gt=0,
+        ).order_by("id"):
+            stock_rows.setdefault(stock.product_id, stock.size)
+
+        new_items = []
+        for pid, quantity, size, note in new_items_data:
+            product = products[int(pid)]
+            item = DocumentItem(
+                document=doc,
+                product=product,
+                quantity=quantity,
+                size=size or None,
+                notes=note,
+                next_issue_date=(
+                    doc.issue_date + timedelta(days=product.period_days)
+                    if doc.issue_date
+                    else None
+                ),
+                status_changed_on=doc.issue_date,
+            )
+            if employment_ended:
+                item.status = "used"
+                item.auto_deactivated = True
+                item.status_changed_on = date.today()
+            new_items.append(item)
+
+            if item.status == "active":
+                if product.id not in stock_rows:
+                    raise ValidationError(
+                        f"Brak produktu {product.code} na magazynie"
+                    )
+                key = (product.id, stock_rows[product.id])
+                deltas[key] = deltas.get(key, 0) - quantity
+                movements.append(
+                    StockMovement(
+                        product=product,
+                        size=item.size,
+                        movement_type="out",
+                        quantity=quantity,
+                        document_type="DW",
+                        document_id=doc.id,
+                        document_number=doc.document_number,
+                        notes=f"Employee issuance: {doc.employee}",
+                    )
+                )
+
+        DocumentItem.objects.bulk_create(new_items)
+
+    apply_stock_deltas(deltas)
+    record_movements(movements)
+    # bulk writes skip the DocumentItem signals
+    schedule_rebuild([doc.employee_id])
+
+
+@transaction.atomic
+def update_receipt_document(doc, items_data, new_items_data):
+    """Apply an edit of a PZ document.
+
+    items_data holds (item_id, quantity, size, unit_price, notes) and
+    new_items_data (product_id, quantity, size, unit_price, notes).
+    Works like update_issue_document: one load, one bulk_update and bulk
+    stock and movement writes.
+    """
+    items = _load_items(doc, [item_id for item_id, *_ in items_data])
+
+    changed = []
+    deltas = {}
+    movements = []
+
+    for item_id, quantity, size, unit_price, note in items_data:
+        item = items[item_id]
+        old_quantity = item.quantity
+
+        item.quantity = quantity
+        item.size = size or None
+        item.unit_price = unit_price
+        item.total_value = quantity * unit_price
+        item.notes = note
+        changed.append(item)
+
+        diff = quantity - old_quantity
+        if diff:
+            key = (item.product_id, item.size)
+            deltas[key] = deltas.get(key, 0) + diff
+            movements.append(
+                _correction(item.product_id, item.size, diff, doc, "PZ_CORRECTION", "PZ")
+            )
+
+    if changed:
+        ReceiptItem.objects.bulk_update(
+            changed, ["quantity", "size", "unit_price", "total_value", "notes"]
+        )
+
+    if new_items_data:
+        products = _load_products([pid for pid, *_ in new_items_data])
+
+        new_items = []
+        for pid, quantity, size, unit_price, note in new_items_data:
+            product = products[int(pid)]
+            item = ReceiptItem(
+                document=doc,
+                product=product,
+                quantity=quantity,
+                size=size or None,
+                unit_price=unit_price,
+                total_value=quantity * unit_price,
+                notes=note,
+            )
+            new_items.append(item)
+
+            key = (product.id, item.size)
+            deltas[key] = deltas.get(key, 0) + quantity
+            movements.append(
+                StockMovement(
+                    product=product,
+                    size=item.size,
+                    movement_type="in",
+                    quantity=quantity,
+                    document_type="PZ",
+                    document_id=doc.id,
+                    document_number=doc.document_number,
+                    notes=f"External reception : {doc.document_number}",
+                )
+            )
+
+        ReceiptItem.objects.bulk_create(new_items)
+
+    apply_stock_deltas(deltas)
+    record_movements(movements)
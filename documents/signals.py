@@ -0,0 +1,56 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from documents.entitlements import schedule_document_rebuild, schedule_rebuild
+from employees.models import Employee
+
+# поля DocumentItem, від яких залежить графік видач
+ENTITLEMENT_FIELDS = {
+    "status",
+    "product",
+    "product_id",
+    "next_issue_date",
+    "document",
+    "document_id",
+}
+
+
+@receiver(post_save, sender="documents.DocumentItem")
+@receiver(post_delete, sender="documents.DocumentItem")
+def refresh_entitlements_on_issue(sender, instance, update_fields=None, **kwargs):
+    """Issued or removed items move the employee's due dates"""
+    if update_fields is not None and not ENTITLEMENT_FIELDS & set(update_fields):
+        return
+    # без запиту на кожну позицію: документ беремо з кешу, інакше за document_id
+    document = instance._state.fields_cache.get("document")
+    if document is not None:
+        schedule_rebuild([document.employee_id])
+    else:
+        schedule_document_rebuild([instance.document_id])
+
+
+@receiver(post_delete, sender="documents.IssueDocument")
+def refresh_entitlements_on_document_delete(sender, instance, **kwargs):
+    schedule_rebuild([instance.employee_id])
+
+
+@receiver(post_save, sender="employees.EmploymentPeriod")
+@receiver(post_delete, sender="employees.EmploymentPeriod")
+def refresh_entitlements_on_employment(sender, instance, **kwargs):
+    schedule_rebuild([instance.employee_id])
+
+
+@receiver(post_save, sender="employees.Employee")
+def refresh_entitlements_on_employee(sender, instance, update_fields=None, **kwargs):
+    """Position or status changes switch the kit"""
+    if update_fields is None or {"position", "position_id", "is_active"} & set(update_fields):
+        schedule_rebuild([instance.pk])
+
+
+@receiver(post_save, sender="core.KitTemplateItem")
+@receiver(post_delete, sender="core.KitTemplateItem")
+def refresh_entitlements_on_kit(sender, instance, **kwargs):
+    position_id = instance.template.position_id
+    schedule_rebuild(
+        Employee.objects.filter(position_id=position_id).values_list("pk", flat=True)
+    )
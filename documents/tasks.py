@@ -0,0 +1,22 @@
+from jobs.registry import task
+
+
+@task("documents.approve_pending_receipt")
+def approve_pending_receipt_task(job, pending_document_id):
+    """Approve a large pending WZ outside of the web request"""
+    from documents.models import PendingReceiptDocument
+    from documents.services import approve_pending_receipt
+
+    pending_doc = PendingReceiptDocument.objects.filter(pk=pending_document_id).first()
+    if pending_doc is None:
+        # dokument już zatwierdzono (zatwierdzony dokument jest usuwany)
+        return {"pending_document_id": pending_document_id, "skipped": True}
+    job.set_progress(0, 1, f"Zatwierdzanie {pending_doc}")
+    receipt_doc = approve_pending_receipt(pending_doc)
+    job.set_progress(1)
+    if receipt_doc is None:
+        return {"pending_document_id": pending_document_id, "skipped": True}
+    return {
+        "receipt_document_id": receipt_doc.id,
+        "document_number": receipt_doc.document_number,
+    }
@@ -1,3 +1,224 @@
-from django.test import TestCase
+from datetime import date, timedelta
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core.models import (
+    Company,
+    Department,
+    KitTemplate,
+    KitTemplateItem,
+    Position,
+    Product,
+    ProductCategory,
+    Supplier,
+)
+from documents.models import (
+    DocumentItem,
+    Entitlement,
+    IssueDocument,
+    PendingReceiptDocument,
+    PendingReceiptItem,
+    ReceiptDocument,
+)
+from documents.services import approve_pending_receipt
+from documents.signals import refresh_entitlements_on_issue
+from employees.models import Employee, EmploymentPeriod
+from jobs.models import Job
+from jobs.registry import enqueue
+from jobs.worker import claim_job, run_job
+from warehouse.models import WarehouseStock
+
+
+class DWEditViewTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user("tester", password="x")
+        self.client.force_login(self.user)
+
+        company = Company.objects.create(name="Firma")
+        department = Department.objects.create(name="Dział")
+        self.position = Position.objects.create(name="Magazynier")
+        self.employee, self.colleague = [
+            Employee.objects.create(
+                card_number=card_number,
+                first_name="Jan",
+                last_name="Kowalski",
+                company=company,
+                department=department,
+                position=self.position,
+            )
+            for card_number in ("T001", "T002")
+        ]
+        self.hired = date.today() - timedelta(days=30)
+        for employee in (self.employee, self.colleague):
+            EmploymentPeriod.objects.create(employee=employee, start_date=self.hired)
+
+        category = ProductCategory.objects.create(name="Odzież", type="clothing")
+        self.product = Product.objects.create(
+            code="P1", name="Kurtka", category=category, unit_price=10, period_days=365
+        )
+        self.other = Product.objects.create(
+            code="P2", name="Buty", category=category, unit_price=20, period_days=365
+        )
+        WarehouseStock.objects.create(product=self.product, size="L", quantity=10)
+
+        self.doc = IssueDocument.objects.create(
+            document_type="DW", issue_date=date.today(), employee=self.employee
+        )
+        self.item = DocumentItem.objects.create(
+            document=self.doc, product=self.product, quantity=1, size="L"
+        )
+
+    def post(self, **extra):
+        data = {
+            "employee": str(self.employee.pk),
+            "issue_date": date.today().isoformat(),
+            "item_id[]": [str(self.item.pk)],
+            "quantity[]": ["2"],
+            "size[]": ["L"],
+            "notes[]": [""],
+        }
+        data.update(extra)
+        return self.client.post(reverse("documents:edit_dw", args=[self.doc.pk]), data)
+
+    def test_edit_for_active_employee_saves(self):
+        response = self.post()
+
+        self.assertRedirects(
+            response,
+            reverse("documents:dw_detail", args=[self.doc.pk]),
+            fetch_redirect_response=False,
+        )
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.quantity, 2)
+        self.assertEqual(self.item.status, "active")
+
+    def test_new_item_without_stock_is_rejected(self):
+        response = self.post(
+            **{
+                "new_product_id[]": [str(self.other.pk)],
+                "new_quantity[]": ["1"],
+                "new_size[]": ["42"],
+                "new_notes[]": [""],
+            }
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["errors"]["general"], "Brak produktu P2 na magazynie")
+        self.assertFalse(self.doc.items.filter(product=self.other).exists())
+        self.assertFalse(WarehouseStock.objects.filter(product=self.other).exists())
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.quantity, 1)
+
+    def test_reassigning_employee_rebuilds_both_schedules(self):
+        kit = KitTemplate.objects.create(position=self.position, name="Magazyn")
+        with self.captureOnCommitCallbacks(execute=True):
+            KitTemplateItem.objects.create(template=kit, product=self.product, quantity=1)
+        self.assertEqual(
+            Entitlement.objects.get(employee=self.employee).last_issue_date, date.today()
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post(employee=str(self.colleague.pk))
+
+        previous = Entitlement.objects.get(employee=self.employee)
+        self.assertIsNone(previous.last_issue_date)
+        self.assertEqual(previous.due_date, self.hired)
+        self.assertEqual(
+            Entitlement.objects.get(employee=self.colleague).last_issue_date, date.today()
+        )
+
+    def test_item_signal_does_not_query_document(self):
+        item = DocumentItem.objects.get(pk=self.item.pk)
+
+        with self.captureOnCommitCallbacks() as callbacks, self.assertNumQueries(0):
+            refresh_entitlements_on_issue(DocumentItem, item, update_fields=["status"])
+        self.assertEqual(len(callbacks), 1)
+
+    def test_deleting_document_rebuilds_schedule(self):
+        kit = KitTemplate.objects.create(position=self.position, name="Magazyn")
+        with self.captureOnCommitCallbacks(execute=True):
+            KitTemplateItem.objects.create(template=kit, product=self.product, quantity=1)
+        DocumentItem.objects.create(
+            document=self.doc, product=self.product, quantity=1, size="L"
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            IssueDocument.objects.get(pk=self.doc.pk).delete()
+
+        entitlement = Entitlement.objects.get(employee=self.employee)
+        self.assertIsNone(entitlement.last_issue_date)
+        self.assertEqual(entitlement.due_date, self.hired)
+
+
+class PendingReceiptApprovalTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user("tester", password="x")
+        self.client.force_login(self.user)
+
+        category = ProductCategory.objects.create(name="Odzież", type="clothing")
+        self.product = Product.objects.create(
+            code="P1",
+            name="Kurtka",
+            category=category,
+            unit_price=10,
+            size="L",
+            period_days=365,
+        )
+        self.doc = PendingReceiptDocument.objects.create(
+            supplier=Supplier.objects.create(name="Dostawca"),
+            recipient=Company.objects.create(name="Firma"),
+            order_number="ZAM1",
+        )
+        self.item = PendingReceiptItem.objects.create(
+            document=self.doc, product=self.product, name="Kurtka", quantity_delivered=5
+        )
+
+    def approve(self):
+        return self.client.post(
+            reverse("documents:pending_receipt_detail", args=[self.doc.pk]),
+            {
+                f"product_{self.item.pk}": str(self.product.pk),
+                f"delivered_{self.item.pk}": "5",
+                "approve": "1",
+            },
+        )
+
+    def stock(self):
+        return WarehouseStock.objects.get(product=self.product, size="L").quantity
+
+    def test_second_approval_is_a_noop(self):
+        stale_copy = PendingReceiptDocument.objects.get(pk=self.doc.pk)
+
+        self.assertIsNotNone(approve_pending_receipt(self.doc))
+        self.assertIsNone(approve_pending_receipt(stale_copy))
+
+        self.assertEqual(ReceiptDocument.objects.count(), 1)
+        self.assertEqual(self.stock(), 5)
+
+    @override_settings(PENDING_RECEIPT_ASYNC_THRESHOLD=1)
+    def test_large_document_is_enqueued_once(self):
+        response = self.approve()
+        job = Job.objects.get(task="documents.approve_pending_receipt")
+        self.assertRedirects(
+            response, reverse("jobs:detail", args=[job.pk]), fetch_redirect_response=False
+        )
+
+        response = self.approve()
+        self.assertRedirects(
+            response, reverse("jobs:detail", args=[job.pk]), fetch_redirect_response=False
+        )
+        self.assertEqual(Job.objects.count(), 1)
+
+    @override_settings(PENDING_RECEIPT_ASYNC_THRESHOLD=1)
+    def test_job_for_approved_document_is_skipped(self):
+        job = enqueue(
+            "documents.approve_pending_receipt", {"pending_document_id": self.doc.pk}
+        )
+        approve_pending_receipt(self.doc)
+
+        self.assertTrue(run_job(claim_job()))
+        job.refresh_from_db()
+        self.assertEqual(job.result["skipped"], True)
+        self.assertEqual(self.stock(), 5)
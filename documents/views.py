@@ -4,10 +4,15 @@ from django.views import View
 from django.urls import reverse
 from django.db import transaction
 from django.contrib import messages
+from django.core.exceptions import ValidationError
+from django.conf import settings
 from django.db.models import Q, Prefetch, Sum
 from datetime import datetime, date
 
 from .models import InvoiceDocument, InvoiceLineItem, IssueDocument, PendingReceiptDocument, PendingReceiptItem, ReceiptDocument, DocumentItem, ReceiptItem
+from .services import approve_pending_receipt, update_issue_document, update_receipt_document
+from jobs.registry import active_job, enqueue
+from documents.entitlements import schedule_rebuild
 from core.models import Product, Supplier, Company
 from employees.models import Employee
 from django.contrib.auth.mixins import LoginRequiredMixin
@@ -341,7 +346,9 @@ class DWEditView(LoginRequiredMixin, View):
         new_notes = request.POST.getlist("new_notes[]")
 
         errors = {}
-        if not employee_id:
+        try:
+            employee_id = int(employee_id)
+        except (TypeError, ValueError):
             errors["employee"] = "Wybierz pracownika"
         if not issue_date:
             errors["issue_date"] = "Podaj datę wystawienia"
@@ -388,75 +395,40 @@ class DWEditView(LoginRequiredMixin, View):
         try:
             with transaction.atomic():
                 # Update basic document info
+                previous_employee_id = doc.employee_id
                 doc.issue_date = issue_date
                 doc.employee_id = employee_id
                 doc.save()
 
-                # Update existing items
-                for item_id, quantity, size, note in existing_items_data:
-                    item = DocumentItem.objects.get(id=item_id, document=doc)
-                    old_quantity = item.quantity
-                    
-                    # Update item
-                    item.quantity = quantity
-                    item.size = size or None
-                    item.notes = note
-                    item.save()
-                    
-                    # Update stock if quantity changed
-                    if old_quantity != quantity:
-                        from warehouse.models import WarehouseStock, StockMovement
-                        
-                        warehouse_stock, created = WarehouseStock.objects.get_or_create(
-                            product=item.product, 
-                            size=item.size, 
-                            defaults={"quantity": 0}
-                        )
-                        
-                        # Adjust stock based on difference
-                        quantity_diff = old_quantity - quantity
-                        warehouse_stock.update_stock(quantity_diff)
-                        
-                        # Record movement
-                        StockMovement.objects.create(
-                            product=item.product,
-                            size=item.size,
-                            movement_type="in" if quantity_diff > 0 else "out",
-                            quantity=abs(quantity_diff),
-                            document_type="DW_CORRECTION",
-                            document_id=doc.id,
-                            notes=f"Korekta DW: {doc.document_number}",
-                        )
-
-                # Add new items
-                for pid, qty, size, note in new_items_data:
-                    product = Product.objects.get(pk=pid)
-                    DocumentItem.objects.create(
-                        document=doc,
-                        product=product,
-                        quantity=qty,
-                        size=size or None,
-                        notes=note,
-                    )
+                update_issue_document(doc, existing_items_data, new_items_data)
+                if previous_employee_id != doc.employee_id:
+                    # the items moved away from the previous employee too
+                    schedule_rebuild([previous_employee_id])
 
+        except ValidationError as e:
+            # e.g. "Brak produktu ... na magazynie" from update_issue_document
+            return self.save_error(request, doc, " ".join(e.messages))
         except Exception as e:
-            messages.error(request, f"Błąd zapisu: {e}")
-            items = doc.items.select_related("product").all()
-            context = {
-                "doc": doc,
-                "items": items,
-                "employees": Employee.objects.all(),
-                "products": Product.objects.all(),
-                "errors": {"general": str(e)},
-                "form": request.POST,
-                "active": "documents_dw",
-                "today": date.today().isoformat(),
-            }
-            return render(request, "documents/edit_dw.html", context)
+            return self.save_error(request, doc, str(e))
 
         messages.success(request, f"DW zaktualizowane: {doc.document_number}")
         return redirect(reverse("documents:dw_detail", args=[doc.pk]))
 
+    def save_error(self, request, doc, error):
+        messages.error(request, f"Błąd zapisu: {error}")
+        items = doc.items.select_related("product").all()
+        context = {
+            "doc": doc,
+            "items": items,
+            "employees": Employee.objects.all(),
+            "products": Product.objects.all(),
+            "errors": {"general": error},
+            "form": request.POST,
+            "active": "documents_dw",
+            "today": date.today().isoformat(),
+        }
+        return render(request, "documents/edit_dw.html", context)
+
 
 class PZEditView(LoginRequiredMixin,View):
     """Edit PZ document - basic info and items"""
@@ -555,56 +527,7 @@ class PZEditView(LoginRequiredMixin,View):
                 doc.recipient_id = recipient_id
                 doc.save()
 
-                # Update existing items
-                for item_id, quantity, size, unit_price, note in existing_items_data:
-                    item = ReceiptItem.objects.get(id=item_id, document=doc)
-                    old_quantity = item.quantity
-                    
-                    # Update item
-                    item.quantity = quantity
-                    item.size = size or None
-                    item.unit_price = unit_price
-                    item.total_value = quantity * unit_price
-                    item.notes = note
-                    item.save()
-                    
-                    # Update stock if quantity changed
-                    if old_quantity != quantity:
-                        from warehouse.models import WarehouseStock, StockMovement
-                        
-                        warehouse_stock, created = WarehouseStock.objects.get_or_create(
-                            product=item.product, 
-                            size=item.size, 
-                            defaults={"quantity": 0}
-                        )
-                        
-                        # Adjust stock based on difference
-                        quantity_diff = quantity - old_quantity
-                        warehouse_stock.update_stock(quantity_diff)
-                        
-                        # Record movement
-                        StockMovement.objects.create(
-                            product=item.product,
-                            size=item.size,
-                            movement_type="in" if quantity_diff > 0 else "out",
-                            quantity=abs(quantity_diff),
-                            document_type="PZ_CORRECTION",
-                            document_id=doc.id,
-                            notes=f"Korekta PZ: {doc.document_number}",
-                        )
-
-                # Add new items
-                for pid, qty, size, up, note in new_items_data:
-                    product = Product.objects.get(pk=pid)
-                    ReceiptItem.objects.create(
-                        document=doc,
-                        product=product,
-                        quantity=qty,
-                        size=size or None,
-                        unit_price=up,
-                        total_value=qty * up,
-                        notes=note,
-                    )
+                update_receipt_document(doc, existing_items_data, new_items_data)
 
         except Exception as e:
             messages.error(request, f"Błąd zapisu: {e}")
@@ -782,7 +705,8 @@ class PendingReceiptDetailView(View):
     
     @transaction.atomic
     def post(self, request, pk):
-        doc = get_object_or_404(PendingReceiptDocument, pk=pk)
+        # блокуємо документ, щоб подвійне натискання не затвердило його двічі
+        doc = get_object_or_404(PendingReceiptDocument.objects.select_for_update(), pk=pk)
 
         doc.supplier_id = request.POST.get("supplier") or None
         doc.recipient_id = request.POST.get("recipient") or None
@@ -798,7 +722,11 @@ class PendingReceiptDetailView(View):
         incoming_ids = set()
 
         existing_items = {str(i.id): i for i in doc.items.select_related("product").all()}
+        products = Product.objects.in_bulk(
+            [post[key] for key in post if key.startswith("product_") and post[key].isdigit()]
+        )
         new_pending = []
+        changed_items = []
 
         for key in post:
             if not key.startswith("product_"):
@@ -818,9 +746,8 @@ class PendingReceiptDetailView(View):
             if not product_id:
                 continue
 
-            try:
-                product = Product.objects.get(pk=product_id)
-            except Product.DoesNotExist:
+            product = products.get(int(product_id)) if product_id.isdigit() else None
+            if product is None:
                 continue
 
             if item_id.startswith("new_"):
@@ -836,7 +763,12 @@ class PendingReceiptDetailView(View):
                     continue
                 item.product = product
                 item.quantity_delivered = delivered
-                item.save()
+                changed_items.append(item)
+
+        if changed_items:
+            PendingReceiptItem.objects.bulk_update(
+                changed_items, ["product", "quantity_delivered"]
+            )
 
         if new_pending:
             print("Bulk creating new pending items")
@@ -850,71 +782,23 @@ class PendingReceiptDetailView(View):
             PendingReceiptItem.objects.filter(id__in=to_delete).delete()
 
         if "approve" in post:
-            invoice_raws = InvoiceLineItem.objects.filter(document__order_number=doc.order_number)
-            print(f"Order number: {doc.order_number}")
-            print(f"Approving document {doc.pk}, found {invoice_raws.count()} matching invoice items.")
-            issue_date = doc.delivery_date or date.today()
-            new_doc = ReceiptDocument.objects.create(
-                supplier=doc.supplier,
-                recipient=doc.recipient,
-                issue_date=issue_date,
-                document_type="PZ",
-
-            )
-
-            receipt_items = []
-            invoice_items_to_update = []
-            for item in doc.items.select_related("product").all():
-                if not item.product:
-                    continue
-                print(f"Processing item {item.id} with product code {item.product.code} and delivered quantity {item.quantity_delivered}")
-                
-                unit_price = item.product.unit_price or 0
-                qty = item.quantity_delivered or 0
-                invoice_raw = invoice_raws.filter(product__code=item.product.code).first()
-                # ifn invoice_raw is None than create receipt item without linking to invoice, otherwise link and update delivered quantity
-                if invoice_raw is None:
-                    invoice_doc, _ = InvoiceDocument.objects.get_or_create(
-                        order_number=doc.order_number
-                    )
+            if len(db_ids - to_delete) >= settings.PENDING_RECEIPT_ASYNC_THRESHOLD:
+                job = active_job("documents.approve_pending_receipt", pending_document_id=doc.pk)
+                if job is not None:
+                    messages.info(request, "Dokument jest już zatwierdzany w tle.")
+                    return redirect("jobs:detail", pk=job.pk)
+
+                job = enqueue(
+                    "documents.approve_pending_receipt",
+                    {"pending_document_id": doc.pk},
+                    user=request.user,
+                )
+                messages.info(request, "Dokument zostanie zatwierdzony w tle.")
+                return redirect("jobs:detail", pk=job.pk)
 
-                    invoice_raw = InvoiceLineItem.objects.create(
-                        document=invoice_doc,  # ✅ poprawny typ
-                        product=item.product,
-                        quantity_ordered=0,
-                        quantity_delivered=qty,
-                    )
-                invoice_raw.quantity_delivered += qty
-                invoice_raw.date_recieved = date.today()
-                print(f"Updating invoice item {invoice_raw.pk}: new delivered qty = {invoice_raw.quantity_delivered} date_recieved = {invoice_raw.date_recieved}")
-                invoice_items_to_update.append(invoice_raw)
-                print(f"len recipt items: {len(receipt_items)}, len invoice items to update: {len(invoice_items_to_update)}")
-                receipt_items.append(ReceiptItem(
-                    document=new_doc,
-                    product=item.product,
-                    quantity=qty,
-                    size=item.product.size or "",
-                    unit_price=unit_price,
-                    total_value=unit_price * qty,
-                    notes=getattr(item, "description", "") or "",
-                ))
-                print(f"len recipt items: {len(receipt_items)}, len invoice items to update: {len(invoice_items_to_update)}")
-
-            if receipt_items:
-                for item in receipt_items:
-                    item.save()
-
-            if invoice_items_to_update:
-                print(f"Updating {len(invoice_items_to_update)} invoice items' delivered quantities.")
-                # InvoiceLineItem.objects.bulk_update(
-                #     invoice_items_to_update,
-                #     fields=["quantity_delivered", "date_recieved"]
-                # )
-                for item in invoice_items_to_update:
-                    if item:
-                        item.save()
-            doc.items.all().delete()
-            doc.delete()
+            if approve_pending_receipt(doc) is None:
+                messages.info(request, "Dokument został już zatwierdzony.")
+                return redirect("documents:pending_receipt_list")
 
             messages.success(request, "Dokument został zatwierdzony.")
             return redirect("documents:pending_receipt_list")
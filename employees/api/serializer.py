@@ -0,0 +1,9 @@
+from rest_framework import serializers
+
+
+class TimelineEventSerializer(serializers.Serializer):
+    kind = serializers.CharField()
+    date = serializers.DateField()
+    id = serializers.IntegerField()
+    title = serializers.CharField()
+    details = serializers.DictField()
@@ -0,0 +1,7 @@
+from django.urls import path
+
+from employees.api.views import EmployeeTimelineAPIView
+
+urlpatterns = [
+    path("<int:pk>/timeline/", EmployeeTimelineAPIView.as_view(), name="employee-timeline"),
+]
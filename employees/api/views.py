@@ -0,0 +1,146 @@
+import base64
+import heapq
+import json
+from datetime import date
+
+from django.db.models import Count, F, Q
+from django.shortcuts import get_object_or_404
+from rest_framework import generics, permissions
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+from documents.models import DocumentItem, IssueDocument
+from employees.api.serializer import TimelineEventSerializer
+from employees.models import Employee, EmploymentPeriod
+
+STATUS_LABELS = dict(DocumentItem.ITEM_STATUS)
+
+
+def encode_cursor(event):
+    raw = json.dumps([event["date"].isoformat(), event["kind"], event["id"]])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(value):
+    try:
+        day, kind, pk = json.loads(base64.urlsafe_b64decode(value.encode()))
+        return date.fromisoformat(day), str(kind), int(pk)
+    except (ValueError, TypeError):
+        raise ValidationError({"cursor": "Niepoprawny kursor"})
+
+
+def before_cursor(qs, date_field, kind, cursor):
+    """Rows ordered after the cursor in (date, kind, id) descending order"""
+    if cursor is None:
+        return qs
+    day, cursor_kind, pk = cursor
+    if kind < cursor_kind:
+        return qs.filter(**{f"{date_field}__lte": day})
+    if kind > cursor_kind:
+        return qs.filter(**{f"{date_field}__lt": day})
+    return qs.filter(Q(**{f"{date_field}__lt": day}) | Q(**{date_field: day, "pk__lt": pk}))
+
+
+class EmployeeTimelineAPIView(generics.GenericAPIView):
+    """Employee history (DW issues, item status changes, employment periods).
+
+    Newest first, `?cursor=` from the previous page's `next`, `?page_size=`
+    up to 200. Every source is read with its own ordered, limited query and
+    the results are merged, so a page costs the same for any history length.
+    """
+
+    serializer_class = TimelineEventSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    default_page_size = 50
+    max_page_size = 200
+
+    def get(self, request, pk):
+        employee = get_object_or_404(Employee, pk=pk)
+        cursor = request.query_params.get("cursor")
+        cursor = decode_cursor(cursor) if cursor else None
+        try:
+            page_size = int(request.query_params.get("page_size", self.default_page_size))
+        except ValueError:
+            raise ValidationError({"page_size": "Niepoprawna wartość"})
+        page_size = max(1, min(page_size, self.max_page_size))
+
+        limit = page_size + 1
+        sources = [
+            self.issue_events(employee, cursor, limit),
+            self.item_events(employee, cursor, limit),
+            self.period_events(employee, cursor, limit, "period_end", "end_date"),
+            self.period_events(employee, cursor, limit, "period_start", "start_date"),
+        ]
+        merged = heapq.merge(
+            *sources, key=lambda e: (e["date"], e["kind"], e["id"]), reverse=True
+        )
+        events = [event for _, event in zip(range(limit), merged)]
+
+        next_url = None
+        if len(events) > page_size:
+            events = events[:page_size]
+            next_url = request.build_absolute_uri(
+                f"{request.path}?cursor={encode_cursor(events[-1])}&page_size={page_size}"
+            )
+
+        return Response(
+            {
+                "employee": employee.pk,
+                "results": self.get_serializer(events, many=True).data,
+                "next": next_url,
+            }
+        )
+
+    def issue_events(self, employee, cursor, limit):
+        qs = before_cursor(
+            IssueDocument.objects.filter(employee=employee), "issue_date", "issue", cursor
+        )
+        qs = qs.annotate(item_count=Count("items")).order_by("-issue_date", "-pk")[:limit]
+        for doc in qs:
+            yield {
+                "kind": "issue",
+                "date": doc.issue_date,
+                "id": doc.pk,
+                "title": f"Wydanie {doc.document_number}",
+                "details": {"document_number": doc.document_number, "items": doc.item_count},
+            }
+
+    def item_events(self, employee, cursor, limit):
+        # status_changed_on is always filled (issue date, then the change date)
+        qs = DocumentItem.objects.filter(
+            document__employee=employee, status_changed_on__isnull=False
+        ).exclude(status="active")
+        qs = before_cursor(qs, "status_changed_on", "item", cursor)
+        qs = (
+            qs.select_related("product")
+            .annotate(document_number=F("document__document_number"))
+            .order_by("-status_changed_on", "-pk")[:limit]
+        )
+        for item in qs:
+            yield {
+                "kind": "item",
+                "date": item.status_changed_on,
+                "id": item.pk,
+                "title": f"{STATUS_LABELS.get(item.status, item.status)}: {item.product.name}",
+                "details": {
+                    "status": item.status,
+                    "product_code": item.product.code,
+                    "size": item.size,
+                    "quantity": item.quantity,
+                    "document_number": item.document_number,
+                    "auto_deactivated": item.auto_deactivated,
+                },
+            }
+
+    def period_events(self, employee, cursor, limit, kind, field):
+        qs = EmploymentPeriod.objects.filter(employee=employee, **{f"{field}__isnull": False})
+        qs = before_cursor(qs, field, kind, cursor).order_by(f"-{field}", "-pk")[:limit]
+        title = "Zatrudnienie" if kind == "period_start" else "Koniec zatrudnienia"
+        for period in qs:
+            yield {
+                "kind": kind,
+                "date": getattr(period, field),
+                "id": period.pk,
+                "title": title,
+                "details": {"start_date": period.start_date, "end_date": period.end_date},
+            }
@@ -0,0 +1,26 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from employees.utils import sweep_terminated_products
+
+
+class Command(BaseCommand):
+    help = "Mark active products of employees whose employment has ended as used (run daily)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--date", type=str, help="Day to check, YYYY-MM-DD (default: today)")
+        parser.add_argument("--dry-run", action="store_true", help="Only count the affected items")
+
+    def handle(self, *args, **options):
+        day = None
+        if options["date"]:
+            try:
+                day = datetime.strptime(options["date"], "%Y-%m-%d").date()
+            except ValueError:
+                raise CommandError("Invalid --date, expected YYYY-MM-DD")
+
+        count = sweep_terminated_products(day, dry_run=options["dry_run"])
+
+        prefix = "Would deactivate" if options["dry_run"] else "Deactivated"
+        self.stdout.write(self.style.SUCCESS(f"{prefix} {count} items"))
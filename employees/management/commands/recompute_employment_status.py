@@ -0,0 +1,35 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from employees.utils import recompute_employment_status
+
+
+class Command(BaseCommand):
+    help = "Recompute is_active for all employees from their employment periods (run daily)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--date", type=str, help="Day to check, YYYY-MM-DD (default: today)")
+        parser.add_argument("--dry-run", action="store_true", help="Only report the changes")
+
+    def handle(self, *args, **options):
+        day = None
+        if options["date"]:
+            try:
+                day = datetime.strptime(options["date"], "%Y-%m-%d").date()
+            except ValueError:
+                raise CommandError("Invalid --date, expected YYYY-MM-DD")
+
+        activated, deactivated = recompute_employment_status(day, dry_run=options["dry_run"])
+
+        for card_number in activated:
+            self.stdout.write(f"Activated: {card_number}")
+        for card_number in deactivated:
+            self.stdout.write(f"Deactivated: {card_number}")
+
+        prefix = "Would update" if options["dry_run"] else "Updated"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{prefix}: activated {len(activated)}, deactivated {len(deactivated)}"
+            )
+        )
@@ -0,0 +1,47 @@
+import csv
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from employees.roster import read_roster, sync_roster
+
+
+class Command(BaseCommand):
+    help = "Sync employees and employment periods from an HR roster export (.xlsx or .csv)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("file", type=str, help="Path to the roster file")
+        parser.add_argument(
+            "--terminate",
+            action="store_true",
+            help="Close open employment periods of employees missing from the roster",
+        )
+        parser.add_argument("--dry-run", action="store_true", help="Only report the changes")
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        try:
+            report = sync_roster(
+                read_roster(options["file"]),
+                terminate_missing=options["terminate"],
+                dry_run=options["dry_run"],
+            )
+        except (OSError, ValueError, csv.Error) as e:
+            raise CommandError(str(e))
+
+        for error in report["errors"]:
+            self.stdout.write(self.style.WARNING(error))
+        if options["verbosity"] > 1:
+            for label in ("added", "changed", "terminated"):
+                for card_number in report[label]:
+                    self.stdout.write(f"{label}: {card_number}")
+
+        prefix = "Dry run" if options["dry_run"] else "Synced"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{prefix}: added {len(report['added'])}, changed {len(report['changed'])}, "
+                f"terminated {len(report['terminated'])}, periods created {report['periods_created']}, "
+                f"periods updated {report['periods_updated']}, errors {len(report['errors'])} "
+                f"({time.monotonic() - started:.1f}s)"
+            )
+        )
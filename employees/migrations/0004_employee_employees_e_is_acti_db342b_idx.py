@@ -0,0 +1,20 @@
+# Generated by Django 5.2.6 on 2026-10-19 02:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("employees", "0003_alter_employee__first_name_alter_employee__last_name"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="employee",
+            index=models.Index(
+                fields=["is_active", "card_number"],
+                name="employees_e_is_acti_db342b_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,82 @@
+# Generated by Django 5.2.6 on 2026-10-19 02:29
+
+from django.db import migrations
+
+CONSTRAINT = "employees_employmentperiod_no_overlap"
+
+
+def check_overlapping_periods(apps, schema_editor):
+    """Stop with a readable error instead of a failed ALTER TABLE.
+
+    Before the constraint only EmploymentPeriod.clean guarded overlaps, so
+    existing rows may violate it; they have to be fixed by hand first.
+    """
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    EmploymentPeriod = apps.get_model("employees", "EmploymentPeriod")
+
+    overlapping = {}
+    previous = None
+    for period in EmploymentPeriod.objects.select_related("employee").order_by(
+        "employee_id", "start_date"
+    ):
+        # ті самі межі, що й у daterange(..., '[]'): включно, без кінця = безстроково
+        if (
+            previous is not None
+            and previous.employee_id == period.employee_id
+            and (previous.end_date is None or previous.end_date >= period.start_date)
+        ):
+            overlapping.setdefault(period.employee.card_number, []).append(
+                f"{previous.start_date}..{previous.end_date or ''} / "
+                f"{period.start_date}..{period.end_date or ''}"
+            )
+        if (
+            previous is None
+            or previous.employee_id != period.employee_id
+            or previous.end_date is not None
+            and (period.end_date is None or period.end_date > previous.end_date)
+        ):
+            previous = period
+
+    if overlapping:
+        details = "\n".join(
+            f"  {card_number}: {'; '.join(ranges)}"
+            for card_number, ranges in sorted(overlapping.items())
+        )
+        raise RuntimeError(
+            "Cannot add the no-overlap constraint, these employees have "
+            f"overlapping employment periods (fix or merge them first):\n{details}"
+        )
+
+
+def add_exclusion_constraint(apps, schema_editor):
+    # Only PostgreSQL can enforce non-overlapping ranges; elsewhere
+    # EmploymentPeriod.clean / employees.utils.validate_periods do the job.
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+    schema_editor.execute(
+        f"ALTER TABLE employees_employmentperiod ADD CONSTRAINT {CONSTRAINT} "
+        "EXCLUDE USING gist (employee_id WITH =, "
+        "daterange(start_date, end_date, '[]') WITH &&)"
+    )
+
+
+def drop_exclusion_constraint(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(
+        f"ALTER TABLE employees_employmentperiod DROP CONSTRAINT IF EXISTS {CONSTRAINT}"
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("employees", "0004_employee_employees_e_is_acti_db342b_idx"),
+    ]
+
+    operations = [
+        migrations.RunPython(check_overlapping_periods, migrations.RunPython.noop),
+        migrations.RunPython(add_exclusion_constraint, drop_exclusion_constraint),
+    ]
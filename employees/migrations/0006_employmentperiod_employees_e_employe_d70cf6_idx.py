@@ -0,0 +1,19 @@
+# Generated by Django 5.2.6 on 2026-10-19 02:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("employees", "0005_employmentperiod_no_overlap"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="employmentperiod",
+            index=models.Index(
+                fields=["employee", "start_date"], name="employees_e_employe_d70cf6_idx"
+            ),
+        ),
+    ]
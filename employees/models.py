@@ -7,6 +7,17 @@ from szafa.crypto import decrypt_value
 from szafa.middleware import get_current_user
 
 
+class EmployeeQuerySet(models.QuerySet):
+    def with_current_period(self, day=None):
+        """Annotate period_start / period_end of the current employment period"""
+        from employees.utils import current_period_subquery
+
+        return self.annotate(
+            period_start=current_period_subquery("start_date", day=day),
+            period_end=current_period_subquery("end_date", day=day),
+        )
+
+
 class Employee(models.Model):
     card_number = models.CharField(max_length=20, unique=True)
     _first_name = models.TextField(
@@ -21,6 +32,8 @@ class Employee(models.Model):
     company = models.ForeignKey(Company, on_delete=models.PROTECT)
     is_active = models.BooleanField(default=True)
 
+    objects = EmployeeQuerySet.as_manager()
+
     def __str__(self):
         return f"{self.first_name} {self.last_name} ({self.card_number})"
 
@@ -68,14 +81,14 @@ class Employee(models.Model):
 
     def get_current_employment_period(self):
         """Returns the current period of employment of an employee"""
-        today = date.today()
-        return (
-            self.employment_periods.filter(
-                Q(end_date__isnull=True) | Q(end_date__gte=today), start_date__lte=today
-            )
-            .order_by("-start_date")
-            .first()
-        )
+        from employees.utils import get_current_periods
+
+        if self.pk is None:
+            return None
+        # filled by employees.utils.current_periods_prefetch()
+        if hasattr(self, "current_periods"):
+            return self.current_periods[0] if self.current_periods else None
+        return get_current_periods([self.pk])[self.pk]
 
     def get_active_products(self):
         """Returns active products of the employee"""
@@ -103,11 +116,24 @@ class Employee(models.Model):
     @property
     def current_end_date(self):
         """Returns the end date of the current period of employment"""
+        if "period_start" in self.__dict__:
+            # annotated by Employee.objects.with_current_period()
+            return self.period_end
         period = self.get_current_employment_period()
         return period.end_date if period else None
 
     class Meta:
         ordering = ["_last_name", "_first_name"]
+        indexes = [models.Index(fields=["is_active", "card_number"])]
+
+
+class EmploymentPeriodQuerySet(models.QuerySet):
+    def current(self, day=None):
+        """Periods covering the given day (today by default)"""
+        day = day or date.today()
+        return self.filter(
+            Q(end_date__isnull=True) | Q(end_date__gte=day), start_date__lte=day
+        )
 
 
 class EmploymentPeriod(models.Model):
@@ -117,8 +143,11 @@ class EmploymentPeriod(models.Model):
     start_date = models.DateField()
     end_date = models.DateField(blank=True, null=True)
 
+    objects = EmploymentPeriodQuerySet.as_manager()
+
     class Meta:
         ordering = ["-start_date"]
+        indexes = [models.Index(fields=["employee", "start_date"])]
         verbose_name = "Employment Period"
         verbose_name_plural = "Employment Periods"
 
@@ -153,21 +182,13 @@ class EmploymentPeriod(models.Model):
         super().save(*args, **kwargs)
 
         # Update employee status only if employee exists
+        # (products of ended periods are deactivated by the post_save signal)
         if self.employee and self.employee.pk:
             self.update_employee_status()
 
-            # If the period has ended, move products
-            if self.end_date and self.end_date <= date.today():
-                from employees.signals import deactivate_employee_products
-
-                deactivate_employee_products(self.employee)
-
     def update_employee_status(self):
         """Updates the active status of the employee based on periods"""
-        today = date.today()
-        has_active_period = self.employee.employment_periods.filter(
-            Q(end_date__isnull=True) | Q(end_date__gte=today), start_date__lte=today
-        ).exists()
+        has_active_period = self.employee.employment_periods.current().exists()
 
         if self.employee.is_active != has_active_period:
             self.employee.is_active = has_active_period
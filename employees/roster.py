@@ -0,0 +1,273 @@
+import csv
+from datetime import date, datetime, timedelta
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from openpyxl import load_workbook
+
+from core.models import Company, Department, Position
+from documents.entitlements import schedule_rebuild
+from employees.models import Employee, EmploymentPeriod
+from employees.utils import (
+    recompute_employment_status,
+    sweep_terminated_products,
+    validate_periods,
+)
+from szafa.crypto import decrypt_value, encrypt_value
+
+BATCH_SIZE = 1000
+
+# nagłówki z eksportu HR -> klucze wewnętrzne
+COLUMNS = {
+    "kod pracownika": "card_number",
+    "nr karty": "card_number",
+    "imię": "first_name",
+    "imie": "first_name",
+    "nazwisko": "last_name",
+    "firma": "company",
+    "dział": "department",
+    "dzial": "department",
+    "stanowisko": "position",
+    "data zatrudnienia": "start_date",
+    "data zwolnienia": "end_date",
+    "data zakończenia": "end_date",
+}
+
+
+def _clean(value):
+    if value is None:
+        return ""
+    return str(value).strip()
+
+
+def _parse_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    value = _clean(value)
+    if not value:
+        return None
+    for fmt in ("%Y-%m-%d", "%d.%m.%Y", "%d/%m/%Y"):
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+    raise ValueError(f"Niepoprawna data: {value}")
+
+
+def _rows_from_csv(path):
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        sample = f.read(4096)
+        f.seek(0)
+        dialect = csv.Sniffer().sniff(sample, delimiters=",;\t")
+        reader = csv.reader(f, dialect)
+        yield from reader
+
+
+def _rows_from_xlsx(path):
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        yield from wb.active.iter_rows(values_only=True)
+    finally:
+        wb.close()
+
+
+def read_roster(path):
+    """Stream roster rows as dicts keyed by COLUMNS values"""
+    rows = _rows_from_csv(path) if path.lower().endswith((".csv", ".txt")) else _rows_from_xlsx(path)
+
+    header = next(rows, None)
+    if header is None:
+        return
+    keys = [COLUMNS.get(_clean(name).lower()) for name in header]
+    if "card_number" not in keys:
+        raise ValueError("Brak kolumny 'Kod pracownika' w pliku")
+
+    for row in rows:
+        record = {key: value for key, value in zip(keys, row) if key}
+        if _clean(record.get("card_number")):
+            yield record
+
+
+def _lookup(model, names):
+    """{name: instance} for the given names, creating the missing ones in bulk"""
+    names = {name for name in names if name}
+    existing = {obj.name: obj for obj in model.objects.filter(name__in=names)}
+    missing = names - set(existing)
+    if missing:
+        model.objects.bulk_create([model(name=name) for name in missing], ignore_conflicts=True)
+        existing.update({obj.name: obj for obj in model.objects.filter(name__in=missing)})
+    return existing
+
+
+@transaction.atomic
+def sync_roster(records, terminate_missing=False, dry_run=False):
+    """Upsert employees and employment periods from roster records.
+
+    Records are diffed against the database by card_number; only new or
+    changed employees are (re)encrypted and written, in bulk. With
+    terminate_missing the open periods of employees absent from the roster
+    are closed yesterday. Returns a report dict; dry_run rolls everything back.
+    """
+    report = {
+        "added": [],
+        "changed": [],
+        "terminated": [],
+        "periods_created": 0,
+        "periods_updated": 0,
+        "errors": [],
+    }
+
+    roster = {}
+    for record in records:
+        card_number = _clean(record["card_number"])
+        try:
+            record["start_date"] = _parse_date(record.get("start_date"))
+            record["end_date"] = _parse_date(record.get("end_date"))
+        except ValueError as e:
+            report["errors"].append(f"{card_number}: {e}")
+            continue
+        roster[card_number] = record
+
+    companies = _lookup(Company, {_clean(r.get("company")) for r in roster.values()})
+    departments = _lookup(Department, {_clean(r.get("department")) for r in roster.values()})
+    positions = _lookup(Position, {_clean(r.get("position")) for r in roster.values()})
+
+    existing = Employee.objects.in_bulk(roster, field_name="card_number")
+
+    to_create = []
+    to_update = []
+    for card_number, record in roster.items():
+        first_name = _clean(record.get("first_name"))
+        last_name = _clean(record.get("last_name"))
+        company = companies.get(_clean(record.get("company")))
+        department = departments.get(_clean(record.get("department")))
+        position = positions.get(_clean(record.get("position")))
+
+        employee = existing.get(card_number)
+        if employee is None:
+            if not (first_name and last_name and company and department and position):
+                report["errors"].append(f"{card_number}: niekompletne dane nowego pracownika")
+                continue
+            employee = Employee(
+                card_number=card_number,
+                _first_name=encrypt_value(first_name),
+                _last_name=encrypt_value(last_name),
+                company=company,
+                department=department,
+                position=position,
+            )
+            to_create.append(employee)
+            report["added"].append(card_number)
+            continue
+
+        changed = False
+        # szyfrujemy tylko imiona, które faktycznie się zmieniły
+        if first_name and decrypt_value(employee._first_name) != first_name:
+            employee._first_name = encrypt_value(first_name)
+            changed = True
+        if last_name and decrypt_value(employee._last_name) != last_name:
+            employee._last_name = encrypt_value(last_name)
+            changed = True
+        for field, value in (("company", company), ("department", department), ("position", position)):
+            if value and getattr(employee, f"{field}_id") != value.pk:
+                setattr(employee, field, value)
+                changed = True
+        if changed:
+            to_update.append(employee)
+            report["changed"].append(card_number)
+
+    Employee.objects.bulk_create(to_create, batch_size=BATCH_SIZE)
+    Employee.objects.bulk_update(
+        to_update,
+        ["_first_name", "_last_name", "company", "department", "position"],
+        batch_size=BATCH_SIZE,
+    )
+
+    employees = {**existing, **{e.card_number: e for e in to_create}}
+    _sync_periods(roster, employees, report)
+
+    if terminate_missing:
+        _terminate_missing(roster, report)
+
+    recompute_employment_status()
+    sweep_terminated_products()
+    # harmonogram przydziałów dla zmienionych pracowników (bulk pomija sygnały)
+    touched = set(report["added"]) | set(report["changed"]) | set(report["terminated"])
+    schedule_rebuild(
+        Employee.objects.filter(card_number__in=touched).values_list("pk", flat=True)
+    )
+
+    if dry_run:
+        transaction.set_rollback(True)
+    return report
+
+
+def _sync_periods(roster, employees, report):
+    periods = {}
+    for period in EmploymentPeriod.objects.filter(
+        employee_id__in=[e.pk for e in employees.values()]
+    ):
+        periods.setdefault(period.employee_id, []).append(period)
+
+    today = date.today()
+    to_create = []
+    to_update = []
+    for card_number, record in roster.items():
+        employee = employees.get(card_number)
+        start_date, end_date = record["start_date"], record["end_date"]
+        if employee is None or start_date is None:
+            continue
+        if end_date and end_date <= start_date:
+            report["errors"].append(f"{card_number}: data zwolnienia przed datą zatrudnienia")
+            continue
+
+        own = periods.setdefault(employee.pk, [])
+        period = next((p for p in own if p.start_date == start_date), None)
+        if period is not None and period.end_date == end_date:
+            continue
+
+        # walidujemy cały wynikowy zestaw okresów, także zmienioną datę zwolnienia
+        resulting = [(p.start_date, p.end_date) for p in own if p is not period]
+        resulting.append((start_date, end_date))
+        try:
+            validate_periods(resulting)
+        except ValidationError:
+            report["errors"].append(f"{card_number}: okres {start_date} nakłada się na istniejący")
+            continue
+
+        if period is not None:
+            if end_date and end_date <= today and (period.end_date is None or period.end_date > today):
+                report["terminated"].append(card_number)
+            period.end_date = end_date
+            to_update.append(period)
+            continue
+
+        period = EmploymentPeriod(employee=employee, start_date=start_date, end_date=end_date)
+        own.append(period)
+        to_create.append(period)
+
+    EmploymentPeriod.objects.bulk_create(to_create, batch_size=BATCH_SIZE)
+    EmploymentPeriod.objects.bulk_update(to_update, ["end_date"], batch_size=BATCH_SIZE)
+    report["periods_created"] = len(to_create)
+    report["periods_updated"] = len(to_update)
+
+
+def _terminate_missing(roster, report):
+    yesterday = date.today() - timedelta(days=1)
+    open_periods = (
+        EmploymentPeriod.objects.current()
+        .exclude(employee__card_number__in=roster)
+        .filter(start_date__lte=yesterday)
+        .select_related("employee")
+    )
+
+    closed = []
+    for period in open_periods:
+        period.end_date = yesterday
+        closed.append(period)
+        report["terminated"].append(period.employee.card_number)
+
+    EmploymentPeriod.objects.bulk_update(closed, ["end_date"], batch_size=BATCH_SIZE)
+    report["periods_updated"] += len(closed)
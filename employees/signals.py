@@ -1,31 +1,33 @@
-from django.db.models.signals import post_save, pre_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from datetime import date
 from django.db import transaction
 from django.core.exceptions import ValidationError
 
+from employees.utils import invalidate_current_period
+
 
 @receiver(post_save, sender="employees.EmploymentPeriod")
 def handle_employment_period_change(sender, instance, **kwargs):
     """Processing changes in work periods"""
+    invalidate_current_period(instance.employee_id)
     if instance.end_date and instance.end_date <= date.today():
         deactivate_employee_products(instance.employee)
 
 
+@receiver(post_delete, sender="employees.EmploymentPeriod")
+def handle_employment_period_delete(sender, instance, **kwargs):
+    """Forget the cached current period of the employee"""
+    invalidate_current_period(instance.employee_id)
+
+
 def deactivate_employee_products(employee):
     """Deactivate employee products upon termination"""
     from documents.models import DocumentItem
 
-    active_items = DocumentItem.objects.filter(
+    DocumentItem.objects.filter(
         document__employee=employee, status="active"
-    )
-
-    for item in active_items:
-        item.status = "used"
-        item.auto_deactivated = True
-
-    if active_items:
-        DocumentItem.objects.bulk_update(active_items, ["status", "auto_deactivated"])
+    ).update(status="used", auto_deactivated=True, status_changed_on=date.today())
 
 
 @receiver(post_save, sender="employees.Employee")
@@ -37,12 +39,3 @@ def validate_employment_periods(sender, instance, created, **kwargs):
                 period.full_clean()
             except ValidationError as e:
                 print(f"Validation error for period {period}: {e}")
-
-
-@receiver(pre_save, sender="employees.EmploymentPeriod")
-def validate_employment_period_before_save(sender, instance, **kwargs):
-    """Pre-save validation of employment period"""
-    try:
-        instance.full_clean()
-    except ValidationError as e:
-        print(f"Pre-save validation error: {e}")
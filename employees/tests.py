@@ -1,3 +1,337 @@
+import io
+import os
+import tempfile
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
 from django.test import TestCase
 
-# Create your tests here.
+from core.models import Company, Department, Position, Product, ProductCategory
+from documents.models import DocumentItem, IssueDocument
+from employees.models import Employee, EmploymentPeriod
+from employees.roster import read_roster, sync_roster
+from employees.utils import (
+    employment_period_cache,
+    get_current_periods,
+    recompute_employment_status,
+    sweep_terminated_products,
+)
+from warehouse.models import WarehouseStock
+
+
+class EmployeeFixtureMixin:
+    def setUp(self):
+        self.company = Company.objects.create(name="Firma")
+        self.department = Department.objects.create(name="Dział")
+        self.position = Position.objects.create(name="Magazynier")
+        category = ProductCategory.objects.create(name="Odzież", type="clothing")
+        self.product = Product.objects.create(
+            code="P1", name="Kurtka", category=category, unit_price=10, period_days=365
+        )
+        WarehouseStock.objects.create(product=self.product, size="L", quantity=100)
+
+    def create_employee(self, card_number, start_date=None, end_date=None):
+        employee = Employee.objects.create(
+            card_number=card_number,
+            first_name="Jan",
+            last_name="Kowalski",
+            company=self.company,
+            department=self.department,
+            position=self.position,
+        )
+        if start_date:
+            EmploymentPeriod.objects.create(
+                employee=employee, start_date=start_date, end_date=end_date
+            )
+        return employee
+
+    def issue(self, employee, issue_date, quantity=1):
+        doc = IssueDocument.objects.create(
+            document_type="DW", issue_date=issue_date, employee=employee
+        )
+        return DocumentItem.objects.create(
+            document=doc, product=self.product, quantity=quantity, size="L"
+        )
+
+
+class EmployeeTimelineTests(EmployeeFixtureMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(get_user_model().objects.create_user("tester"))
+        self.today = date.today()
+        self.employee = self.create_employee("T001", self.today - timedelta(days=400))
+
+    def fetch(self, url=None):
+        return self.client.get(url or f"/employees/api/{self.employee.pk}/timeline/?page_size=2")
+
+    def test_items_get_issue_date_until_status_changes(self):
+        item = self.issue(self.employee, self.today - timedelta(days=30))
+        self.assertEqual(item.status_changed_on, self.today - timedelta(days=30))
+
+        item.status = "returned"
+        item.save()
+        self.assertEqual(item.status_changed_on, self.today)
+
+    def test_item_events_paginate_by_status_change_date(self):
+        changed = []
+        for days_ago in (300, 200, 100):
+            item = self.issue(self.employee, self.today - timedelta(days=days_ago))
+            DocumentItem.objects.filter(pk=item.pk).update(
+                status="used", status_changed_on=self.today - timedelta(days=days_ago - 10)
+            )
+            changed.append(item.pk)
+
+        items = []
+        url = None
+        while True:
+            data = self.fetch(url).json()
+            items += [e for e in data["results"] if e["kind"] == "item"]
+            url = data["next"]
+            if not url:
+                break
+
+        self.assertEqual([e["id"] for e in items], changed[::-1])
+        self.assertEqual(
+            [e["date"] for e in items],
+            [(self.today - timedelta(days=d)).isoformat() for d in (90, 190, 290)],
+        )
+
+
+class EmploymentPeriodCacheTests(EmployeeFixtureMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.today = date.today()
+        self.employee = self.create_employee("T001", self.today - timedelta(days=10))
+
+    def test_lookup_is_cached_within_scope(self):
+        with employment_period_cache():
+            with self.assertNumQueries(1):
+                first = get_current_periods([self.employee.pk])
+            with self.assertNumQueries(0):
+                second = get_current_periods([str(self.employee.pk)])
+        self.assertEqual(first, second)
+
+        # poza zakresem każde wywołanie idzie do bazy
+        with self.assertNumQueries(1):
+            get_current_periods([self.employee.pk])
+
+    def test_nested_scope_reuses_outer_cache(self):
+        with employment_period_cache() as outer:
+            get_current_periods([self.employee.pk])
+            with employment_period_cache() as inner:
+                self.assertIs(inner, outer)
+                with self.assertNumQueries(0):
+                    get_current_periods([self.employee.pk])
+            self.assertIn(self.employee.pk, outer)
+
+    def test_missing_period_is_cached_as_none(self):
+        other = self.create_employee("T002")
+        with employment_period_cache():
+            self.assertEqual(get_current_periods([other.pk]), {other.pk: None})
+            with self.assertNumQueries(0):
+                self.assertIsNone(other.get_current_employment_period())
+
+    def test_saving_period_invalidates_cache(self):
+        with employment_period_cache():
+            period = self.employee.get_current_employment_period()
+            self.assertIsNone(period.end_date)
+
+            period.end_date = self.today - timedelta(days=1)
+            period.save()
+
+            self.assertIsNone(self.employee.get_current_employment_period())
+
+    def test_deleting_period_invalidates_cache(self):
+        with employment_period_cache():
+            period = self.employee.get_current_employment_period()
+            period.delete()
+
+            self.assertIsNone(self.employee.get_current_employment_period())
+
+
+class EmploymentStatusTests(EmployeeFixtureMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.today = date.today()
+        self.hired = self.today - timedelta(days=400)
+
+    def terminate(self, employee, days_ago=1):
+        # update() omija sygnał, który od razu dezaktywuje wydania
+        EmploymentPeriod.objects.filter(employee=employee).update(
+            end_date=self.today - timedelta(days=days_ago)
+        )
+
+    def test_recompute_employment_status(self):
+        leaving = self.create_employee("T001", self.hired)
+        self.terminate(leaving)
+        returning = self.create_employee("T002", self.hired)
+        Employee.objects.filter(pk=returning.pk).update(is_active=False)
+        self.create_employee("T003", self.hired)
+
+        activated, deactivated = recompute_employment_status()
+
+        self.assertEqual((activated, deactivated), (["T002"], ["T001"]))
+        states = dict(Employee.objects.values_list("card_number", "is_active"))
+        self.assertEqual(states, {"T001": False, "T002": True, "T003": True})
+        self.assertEqual(recompute_employment_status(), ([], []))
+
+    def test_recompute_dry_run_changes_nothing(self):
+        leaving = self.create_employee("T001", self.hired)
+        self.terminate(leaving)
+
+        self.assertEqual(recompute_employment_status(dry_run=True), ([], ["T001"]))
+        leaving.refresh_from_db()
+        self.assertTrue(leaving.is_active)
+
+    def test_sweep_terminated_products(self):
+        leaving = self.create_employee("T001", self.hired)
+        kept = self.create_employee("T002", self.hired)
+        rehired = self.create_employee("T003", self.hired)
+        items = {
+            employee.card_number: self.issue(employee, self.hired)
+            for employee in (leaving, kept, rehired)
+        }
+        self.terminate(leaving)
+        self.terminate(rehired, days_ago=30)
+        EmploymentPeriod.objects.create(
+            employee=rehired, start_date=self.today - timedelta(days=10)
+        )
+
+        self.assertEqual(sweep_terminated_products(dry_run=True), 1)
+        self.assertEqual(sweep_terminated_products(), 1)
+        self.assertEqual(sweep_terminated_products(), 0)
+
+        for item in items.values():
+            item.refresh_from_db()
+        self.assertEqual(items["T001"].status, "used")
+        self.assertTrue(items["T001"].auto_deactivated)
+        self.assertEqual(items["T001"].status_changed_on, self.today)
+        self.assertEqual(items["T002"].status, "active")
+        self.assertEqual(items["T003"].status, "active")
+
+
+class SyncRosterTests(EmployeeFixtureMixin, TestCase):
+    def record(self, card_number, start_date, end_date="", **extra):
+        return {
+            "card_number": card_number,
+            "first_name": "Anna",
+            "last_name": "Nowak",
+            "company": "Firma",
+            "department": "Dział",
+            "position": "Magazynier",
+            "start_date": start_date,
+            "end_date": end_date,
+            **extra,
+        }
+
+    def test_adds_employees_and_periods(self):
+        report = sync_roster([self.record("N001", "2024-01-01")])
+
+        self.assertEqual(report["added"], ["N001"])
+        self.assertEqual(report["periods_created"], 1)
+        employee = Employee.objects.get(card_number="N001")
+        self.assertEqual(employee.position, self.position)
+        self.assertEqual(
+            list(employee.employment_periods.values_list("start_date", "end_date")),
+            [(date(2024, 1, 1), None)],
+        )
+
+    def test_new_overlapping_period_is_reported(self):
+        employee = self.create_employee("T001", date(2020, 1, 1))
+
+        report = sync_roster([self.record("T001", "2021-01-01")])
+
+        self.assertEqual(len(report["errors"]), 1)
+        self.assertIn("T001", report["errors"][0])
+        self.assertEqual(employee.employment_periods.count(), 1)
+
+    def test_extended_end_date_overlapping_later_period_is_reported(self):
+        employee = self.create_employee("T001", date(2020, 1, 1), date(2021, 1, 1))
+        EmploymentPeriod.objects.create(employee=employee, start_date=date(2021, 6, 1))
+
+        report = sync_roster([self.record("T001", "2020-01-01", "2022-01-01")])
+
+        self.assertEqual(len(report["errors"]), 1)
+        self.assertEqual(report["periods_updated"], 0)
+        self.assertEqual(
+            employee.employment_periods.get(start_date=date(2020, 1, 1)).end_date,
+            date(2021, 1, 1),
+        )
+
+    def test_changed_end_date_terminates(self):
+        employee = self.create_employee("T001", date(2020, 1, 1))
+        yesterday = date.today() - timedelta(days=1)
+
+        report = sync_roster(
+            [self.record("T001", "2020-01-01", yesterday.strftime("%d.%m.%Y"))]
+        )
+
+        self.assertEqual(report["terminated"], ["T001"])
+        self.assertEqual(report["periods_updated"], 1)
+        employee.refresh_from_db()
+        self.assertFalse(employee.is_active)
+
+    def test_dry_run_rolls_back(self):
+        employee = self.create_employee("T001", date(2020, 1, 1))
+
+        report = sync_roster(
+            [
+                self.record("N001", "2024-01-01"),
+                self.record("T001", "2020-01-01", "2020-12-31", position="Kierowca"),
+            ],
+            dry_run=True,
+        )
+
+        self.assertEqual(report["added"], ["N001"])
+        self.assertEqual(report["changed"], ["T001"])
+        self.assertEqual(report["periods_updated"], 1)
+        self.assertFalse(Employee.objects.filter(card_number="N001").exists())
+        self.assertFalse(Position.objects.filter(name="Kierowca").exists())
+        employee.refresh_from_db()
+        self.assertEqual(employee.position, self.position)
+        self.assertIsNone(employee.employment_periods.get().end_date)
+
+    def test_terminate_missing(self):
+        present = self.create_employee("T001", date(2020, 1, 1))
+        missing = self.create_employee("T002", date(2020, 1, 1))
+
+        report = sync_roster([self.record("T001", "2020-01-01")], terminate_missing=True)
+
+        self.assertEqual(report["terminated"], ["T002"])
+        self.assertIsNotNone(missing.employment_periods.get().end_date)
+        self.assertIsNone(present.employment_periods.get().end_date)
+
+    def test_invalid_date_is_reported(self):
+        report = sync_roster([self.record("N001", "31-31-2024")])
+
+        self.assertEqual(report["added"], [])
+        self.assertIn("Niepoprawna data", report["errors"][0])
+
+    def test_read_roster_csv(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False, encoding="utf-8") as f:
+            f.write("Kod pracownika;Imię;Nazwisko;Data zatrudnienia\n")
+            f.write("N001;Anna;Nowak;01.02.2024\n;;;\n")
+        self.addCleanup(os.remove, f.name)
+
+        records = list(read_roster(f.name))
+
+        self.assertEqual(
+            records,
+            [
+                {
+                    "card_number": "N001",
+                    "first_name": "Anna",
+                    "last_name": "Nowak",
+                    "start_date": "01.02.2024",
+                }
+            ],
+        )
+
+    def test_command_reports_unreadable_csv(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False) as f:
+            f.write("abc\nxyz\n")
+        self.addCleanup(os.remove, f.name)
+
+        with self.assertRaises(CommandError):
+            call_command("sync_roster", f.name, stdout=io.StringIO())
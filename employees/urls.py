@@ -15,6 +15,7 @@ urlpatterns = [
     path("<int:pk>/", EmployeeDetailView.as_view(), name="detail"),
     path("<int:pk>/edit/", EditEmployeeView.as_view(), name="edit"),
     path("<int:pk>/delete/", DeleteEmployeeView.as_view(), name="delete"),
+    path("api/", include("employees.api.urls")),
 ]
 
 
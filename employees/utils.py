@@ -0,0 +1,230 @@
+import threading
+from contextlib import contextmanager
+from datetime import date
+
+from django.db import transaction
+from django.core.exceptions import ValidationError
+from django.db.models import Exists, OuterRef, Prefetch, Q, Subquery
+
+_periods = threading.local()
+
+
+def _get_cache():
+    return getattr(_periods, "value", None)
+
+
+@contextmanager
+def employment_period_cache():
+    """Share current employment period lookups for the duration of one operation.
+
+    Nested scopes reuse the outermost cache, so a request wrapped by the
+    middleware and an import wrapped explicitly resolve each employee once.
+    """
+    cache = _get_cache()
+    if cache is not None:
+        yield cache
+        return
+
+    _periods.value = {}
+    try:
+        yield _periods.value
+    finally:
+        _periods.value = None
+
+
+def get_current_periods(employee_ids):
+    """Returns {employee_id: current EmploymentPeriod or None} using one query"""
+    from employees.models import EmploymentPeriod
+
+    cache = _get_cache()
+    result = {}
+    missing = set()
+
+    for employee_id in employee_ids:
+        if employee_id is None:
+            continue
+        # ids from forms arrive as strings; periods are keyed by int
+        employee_id = int(employee_id)
+        if cache is not None and employee_id in cache:
+            result[employee_id] = cache[employee_id]
+        else:
+            missing.add(employee_id)
+
+    if missing:
+        found = dict.fromkeys(missing)
+        periods = (
+            EmploymentPeriod.objects.current()
+            .filter(employee_id__in=missing)
+            .order_by("employee_id", "-start_date")
+        )
+        for period in periods:
+            # ordered by -start_date, so the first one per employee wins
+            if found[period.employee_id] is None:
+                found[period.employee_id] = period
+
+        if cache is not None:
+            cache.update(found)
+        result.update(found)
+
+    return result
+
+
+def current_period_subquery(field, employee_ref="pk", day=None):
+    """Subquery returning `field` of the current period of OuterRef(employee_ref)"""
+    from employees.models import EmploymentPeriod
+
+    return Subquery(
+        EmploymentPeriod.objects.current(day)
+        .filter(employee=OuterRef(employee_ref))
+        .order_by("-start_date")
+        .values(field)[:1]
+    )
+
+
+def current_periods_prefetch(lookup="employment_periods", day=None):
+    """Prefetch current periods into `current_periods` for a list of employees"""
+    from employees.models import EmploymentPeriod
+
+    return Prefetch(
+        lookup,
+        queryset=EmploymentPeriod.objects.current(day).order_by("-start_date"),
+        to_attr="current_periods",
+    )
+
+
+def invalidate_current_period(employee_id):
+    """Drop a cached lookup after the employee's periods changed"""
+    cache = _get_cache()
+    if cache is not None:
+        cache.pop(employee_id, None)
+
+
+@transaction.atomic
+def recompute_employment_status(day=None, dry_run=False):
+    """Sync Employee.is_active with employment periods for everyone at once.
+
+    Employees are active when a period covers the given day (today by
+    default). The change is one UPDATE with an EXISTS subquery; returns
+    (activated, deactivated) card numbers.
+    """
+    from employees.models import Employee, EmploymentPeriod
+
+    day = day or date.today()
+    has_period = Exists(
+        EmploymentPeriod.objects.current(day).filter(employee=OuterRef("pk"))
+    )
+    stale = Employee.objects.annotate(has_period=has_period).filter(
+        Q(is_active=True, has_period=False) | Q(is_active=False, has_period=True)
+    )
+
+    activated = []
+    deactivated = []
+    changed_ids = []
+    for pk, card_number, is_active in stale.values_list("pk", "card_number", "is_active"):
+        (deactivated if is_active else activated).append(card_number)
+        changed_ids.append(pk)
+
+    if not dry_run and changed_ids:
+        stale.update(is_active=has_period)
+
+        from documents.entitlements import schedule_rebuild
+
+        schedule_rebuild(changed_ids)
+
+    return activated, deactivated
+
+
+def terminated_items(day=None):
+    """Active DocumentItems of employees whose employment ended on or before day.
+
+    Employees with a newer period still covering the day are left alone.
+    """
+    from documents.models import DocumentItem
+    from employees.models import EmploymentPeriod
+
+    day = day or date.today()
+    periods = EmploymentPeriod.objects.filter(employee=OuterRef("document__employee"))
+    return DocumentItem.objects.filter(
+        Exists(periods.filter(end_date__lte=day)),
+        ~Exists(periods.current(day)),
+        status="active",
+    )
+
+
+def sweep_terminated_products(day=None, dry_run=False):
+    """Mark products of terminated employees as used with one UPDATE.
+
+    Idempotent: already deactivated items are not active any more, so a
+    repeated run matches nothing. Returns the number of affected items.
+    """
+    items = terminated_items(day)
+    if dry_run:
+        return items.count()
+    return items.update(status="used", auto_deactivated=True, status_changed_on=day or date.today())
+
+
+def validate_periods(periods):
+    """Check (start_date, end_date) pairs of one employee without queries.
+
+    Same rules as EmploymentPeriod.clean: end after start and no overlap
+    (bounds inclusive, open end = ongoing). Raises ValidationError.
+    """
+    ordered = sorted(periods, key=lambda p: p[0])
+    for start_date, end_date in ordered:
+        if end_date and end_date <= start_date:
+            raise ValidationError(
+                {"end_date": "End date must be later than start date"}
+            )
+    for (_, prev_end), (next_start, _) in zip(ordered, ordered[1:]):
+        if prev_end is None or prev_end >= next_start:
+            raise ValidationError("Employment periods cannot overlap")
+
+
+@transaction.atomic
+def sync_employment_periods(employee, periods):
+    """Make the employee's periods equal to `periods` ([(start, end), ...]).
+
+    The whole set is validated once up front, then only the difference is
+    written: periods are matched by start date, changed end dates updated,
+    missing ones created and the rest deleted, each in a single query.
+    """
+    from employees.models import EmploymentPeriod
+
+    validate_periods(periods)
+
+    wanted = dict(periods)
+    existing = {p.start_date: p for p in employee.employment_periods.all()}
+
+    to_update = []
+    for start_date, period in existing.items():
+        if start_date in wanted and period.end_date != wanted[start_date]:
+            period.end_date = wanted[start_date]
+            to_update.append(period)
+
+    removed = [p.pk for start, p in existing.items() if start not in wanted]
+    if removed:
+        EmploymentPeriod.objects.filter(pk__in=removed).delete()
+    # najpierw zamykamy okresy, potem dodajemy nowe — constraint w PG nie zgłosi kolizji
+    if to_update:
+        EmploymentPeriod.objects.bulk_update(to_update, ["end_date"])
+    EmploymentPeriod.objects.bulk_create(
+        [
+            EmploymentPeriod(employee=employee, start_date=start, end_date=end)
+            for start, end in wanted.items()
+            if start not in existing
+        ]
+    )
+
+    # bulk operations skip the model signals
+    invalidate_current_period(employee.pk)
+    is_active = EmploymentPeriod.objects.current().filter(employee=employee).exists()
+    if employee.is_active != is_active:
+        employee.is_active = is_active
+        employee.save(update_fields=["is_active"])
+    terminated_items().filter(document__employee=employee).update(
+        status="used", auto_deactivated=True, status_changed_on=date.today()
+    )
+
+    from documents.entitlements import schedule_rebuild
+
+    schedule_rebuild([employee.pk])
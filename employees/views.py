@@ -1,17 +1,23 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from django.views import View
 from django.urls import reverse
+from django.core.exceptions import ValidationError
 from django.db import IntegrityError, transaction
 from django.contrib import messages
 from datetime import datetime
 
+from szafa.crypto import decrypt_value
 from szafa.middleware import get_current_user
 from .models import Employee, EmploymentPeriod
+from .utils import sync_employment_periods
+from documents.models import DocumentItem
 from core.models import Company, Position, Department
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.db.models import ProtectedError
 
-from django.db.models import Q
+from django.core.paginator import Paginator
+from django.db.models import Count, DecimalField, F, Q, Sum
+from django.db.models.functions import Coalesce
 
 DATE_FMT = "%Y-%m-%d"
 
@@ -27,29 +33,60 @@ def parse_date_or_none(val):
 
 
 class EmployeesListView(LoginRequiredMixin, View):
+    paginate_by = 50
+
+    # dozwolone sortowania: parametr -> pola order_by (zawsze kończymy na pk)
+    ORDERING = {
+        "card_number": ["card_number"],
+        "-card_number": ["-card_number"],
+        "company": ["company__name", "card_number"],
+        "department": ["department__name", "card_number"],
+        "position": ["position__name", "card_number"],
+        "end_date": [F("period_end").asc(nulls_last=True), "card_number"],
+        "-end_date": [F("period_end").desc(nulls_last=True), "card_number"],
+    }
+
     def get(self, request):
         q = request.GET.get("q", "").strip().lower()
         company_id = request.GET.get("company")
         position_id = request.GET.get("position")
-
-        qs = Employee.objects.all().select_related("position", "company", "department")
+        department_id = request.GET.get("department")
+        status = request.GET.get("status", "")
+        end_from = parse_date_or_none(request.GET.get("end_from"))
+        end_to = parse_date_or_none(request.GET.get("end_to"))
+        sort = request.GET.get("sort", "card_number")
+        if sort not in self.ORDERING:
+            sort = "card_number"
+
+        qs = (
+            Employee.objects.with_current_period()
+            .select_related("position", "company", "department")
+        )
 
         if company_id:
             qs = qs.filter(company_id=company_id)
         if position_id:
             qs = qs.filter(position_id=position_id)
+        if department_id:
+            qs = qs.filter(department_id=department_id)
+        if status == "active":
+            qs = qs.filter(is_active=True)
+        elif status == "inactive":
+            qs = qs.filter(is_active=False)
+        if end_from:
+            qs = qs.filter(period_end__gte=end_from)
+        if end_to:
+            qs = qs.filter(period_end__lte=end_to)
 
         if q:
-            # Python-фільтрація по first_name / last_name
-            qs = [
-                e for e in qs
-                if q in e.card_number.lower()
-                or q in e.first_name.lower()
-                or q in e.last_name.lower()
-            ]
+            qs = qs.filter(pk__in=self.search_ids(qs, q))
+
+        paginator = Paginator(qs.order_by(*self.ORDERING[sort], "pk"), self.paginate_by)
+        employees = paginator.get_page(request.GET.get("page", 1))
 
         context = {
-            "employees": qs,
+            "employees": employees,
+            "sort": sort,
             "companies": Company.objects.all(),
             "positions": Position.objects.all(),
             "departments": Department.objects.all(),
@@ -57,6 +94,31 @@ class EmployeesListView(LoginRequiredMixin, View):
         }
         return render(request, "employees/list.html", context)
 
+    def search_ids(self, qs, q):
+        """Ids of employees matching q by card number or (decrypted) name.
+
+        Names are encrypted, so they are matched in Python, but only over the
+        already filtered rows and without building model instances.
+        """
+        user = get_current_user()
+        show_real = bool(user and getattr(user, "can_view_real_employee_names", False))
+
+        ids = []
+        rows = qs.order_by().values_list("pk", "card_number", "_first_name", "_last_name")
+        for pk, card_number, first_name, last_name in rows.iterator():
+            if q in card_number.lower():
+                ids.append(pk)
+                continue
+            for value in (decrypt_value(first_name), decrypt_value(last_name)):
+                if not value:
+                    continue
+                if not show_real:
+                    value = value[0] + "***"
+                if q in value.lower():
+                    ids.append(pk)
+                    break
+        return ids
+
     def post(self, request):
         # POST left intentionally empty per spec
         pass
@@ -135,10 +197,7 @@ class AddEmployeeView(LoginRequiredMixin, View):
                     department_id=department_id,
                     company_id=company_id,
                 )
-                for sd, ed in periods:
-                    EmploymentPeriod.objects.create(
-                        employee=emp, start_date=sd, end_date=ed
-                    )
+                sync_employment_periods(emp, periods)
         except IntegrityError as e:
             errors["card_number"] = "NR Karty musi być unikalny"
             context = {
@@ -150,6 +209,17 @@ class AddEmployeeView(LoginRequiredMixin, View):
                 "errors": errors,
             }
             return render(request, "employees/add.html", context)
+        except ValidationError as e:
+            errors["general"] = "; ".join(e.messages)
+            context = {
+                "companies": Company.objects.all(),
+                "positions": Position.objects.all(),
+                "departments": Department.objects.all(),
+                "active": "employees",
+                "form": request.POST,
+                "errors": errors,
+            }
+            return render(request, "employees/add.html", context)
 
         messages.success(request, "Pracownik dodany")
         return redirect(reverse("employees:list"))
@@ -242,12 +312,8 @@ class EditEmployeeView(LoginRequiredMixin, View):
                 emp.company_id = company_id
                 emp.save()
 
-                # clear and recreate periods (EmploymentPeriod.clean will validate overlaps)
-                emp.employment_periods.all().delete()
-                for sd, ed in periods:
-                    EmploymentPeriod.objects.create(
-                        employee=emp, start_date=sd, end_date=ed
-                    )
+                # validates all periods at once and writes only the difference
+                sync_employment_periods(emp, periods)
         except IntegrityError:
             errors["card_number"] = "NR Karty musi być unikalny"
             context = {
@@ -296,15 +362,67 @@ class DeleteEmployeeView(LoginRequiredMixin, View):
         return redirect(reverse("employees:list"))
 
 class EmployeeDetailView(LoginRequiredMixin, View):
+    paginate_by = 25
+
     def get(self, request, pk):
-        emp = get_object_or_404(Employee, pk=pk)
-        # get "on stock" and "used" via model helper methods (you have these)
-        active_products = emp.get_active_products()  # queryset of DocumentItem
-        used_products = emp.get_used_products()
+        emp = get_object_or_404(
+            Employee.objects.select_related("position", "department", "company"), pk=pk
+        )
+        items = (
+            DocumentItem.objects.filter(document__employee=emp)
+            .select_related("product", "document")
+            .order_by("-document__issue_date", "-id")
+        )
+        active_products = Paginator(items.filter(status="active"), self.paginate_by).get_page(
+            request.GET.get("active_page", 1)
+        )
+        used_products = Paginator(items.filter(status="used"), self.paginate_by).get_page(
+            request.GET.get("used_page", 1)
+        )
+        summary, totals = self.get_summary(emp)
+
         context = {
             "employee": emp,
+            "periods": emp.employment_periods.order_by("-start_date"),
             "active_products": active_products,
             "used_products": used_products,
+            "summary": summary,
+            "totals": totals,
+            "tab": "used" if request.GET.get("tab") == "used" else "active",
             "active": "employees",
         }
         return render(request, "employees/detail.html", context)
+
+    def get_summary(self, emp):
+        """Counts, quantities and values per status and category in one query"""
+        rows = (
+            DocumentItem.objects.filter(document__employee=emp)
+            .values("status", "product__category__name")
+            .annotate(
+                items=Count("id"),
+                qty=Sum("quantity"),
+                value=Sum(
+                    Coalesce(
+                        "total_value",
+                        F("quantity") * F("product__unit_price"),
+                        output_field=DecimalField(max_digits=12, decimal_places=2),
+                    )
+                ),
+            )
+            .order_by("status", "product__category__name")
+        )
+
+        statuses = dict(DocumentItem.ITEM_STATUS)
+        summary = []
+        totals = {}
+        for row in rows:
+            row["status_label"] = statuses.get(row["status"], row["status"])
+            summary.append(row)
+            total = totals.setdefault(
+                row["status"],
+                {"status_label": row["status_label"], "items": 0, "qty": 0, "value": 0},
+            )
+            total["items"] += row["items"]
+            total["qty"] += row["qty"] or 0
+            total["value"] += row["value"] or 0
+        return summary, list(totals.values())
@@ -0,0 +1,20 @@
+from django.contrib import admin
+from .models import Job
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = [
+        "id",
+        "task",
+        "status",
+        "attempts",
+        "progress",
+        "progress_total",
+        "created_by",
+        "created_at",
+        "finished_at",
+    ]
+    list_filter = ["status", "task"]
+    search_fields = ["task", "message"]
+    readonly_fields = ["created_at", "started_at", "finished_at"]
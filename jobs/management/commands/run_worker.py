@@ -0,0 +1,62 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from jobs.worker import claim_job, requeue_stale_jobs, run_job
+
+
+class Command(BaseCommand):
+    help = "Process background jobs from the database queue"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Process the jobs that are due and exit",
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=2.0,
+            help="Seconds to wait when the queue is empty",
+        )
+
+    def requeue(self):
+        requeued = requeue_stale_jobs()
+        if requeued:
+            self.stdout.write(self.style.WARNING(f"Requeued {requeued} stale jobs"))
+
+    def handle(self, *args, **options):
+        self.requeue()
+        last_requeue = time.monotonic()
+
+        processed = 0
+        try:
+            while True:
+                close_old_connections()
+                # zadania po awarii innego workera wracają do kolejki bez restartu
+                if time.monotonic() - last_requeue >= settings.JOBS_REQUEUE_INTERVAL:
+                    self.requeue()
+                    last_requeue = time.monotonic()
+
+                job = claim_job()
+                if job is None:
+                    if options["once"]:
+                        break
+                    time.sleep(options["sleep"])
+                    continue
+
+                self.stdout.write(f"Running {job}")
+                if run_job(job):
+                    self.stdout.write(self.style.SUCCESS(f"Job {job.pk} done"))
+                else:
+                    self.stdout.write(
+                        self.style.ERROR(f"Job {job.pk} failed ({job.status})")
+                    )
+                processed += 1
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(self.style.SUCCESS(f"Processed {processed} jobs"))
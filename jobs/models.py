@@ -0,0 +1,62 @@
+from django.conf import settings
+from django.db import models
+from django.utils import timezone
+
+
+class Job(models.Model):
+    # Background job processed by the run_worker management command
+    STATUS_CHOICES = [
+        ("pending", "Oczekuje"),
+        ("running", "W trakcie"),
+        ("done", "Zakończone"),
+        ("failed", "Błąd"),
+    ]
+
+    task = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="pending")
+    attempts = models.IntegerField(default=0)
+    max_attempts = models.IntegerField(default=3)
+    progress = models.IntegerField(default=0)
+    progress_total = models.IntegerField(default=0)
+    message = models.CharField(max_length=255, blank=True)
+    result = models.JSONField(blank=True, null=True)
+    error = models.TextField(blank=True)
+    run_after = models.DateTimeField(default=timezone.now)
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, blank=True, null=True
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [models.Index(fields=["status", "run_after"])]
+
+    def __str__(self):
+        return f"{self.task} #{self.pk} ({self.status})"
+
+    @property
+    def is_finished(self):
+        return self.status in ("done", "failed")
+
+    @property
+    def percent(self):
+        if self.status == "done":
+            return 100
+        if not self.progress_total:
+            return 0
+        return min(100, int(self.progress * 100 / self.progress_total))
+
+    def set_progress(self, progress, total=None, message=None):
+        """Store progress without touching the rest of the row"""
+        self.progress = progress
+        fields = {"progress": progress}
+        if total is not None:
+            self.progress_total = total
+            fields["progress_total"] = total
+        if message is not None:
+            self.message = message[:255]
+            fields["message"] = self.message
+        Job.objects.filter(pk=self.pk).update(**fields)
@@ -0,0 +1,49 @@
+_tasks = {}
+
+
+def task(name):
+    """Register a function as a background task handler.
+
+    The handler is called as handler(job, **job.payload) by the worker.
+    """
+
+    def decorator(func):
+        _tasks[name] = func
+        return func
+
+    return decorator
+
+
+def get_task(name):
+    return _tasks.get(name)
+
+
+def enqueue(name, payload=None, user=None, max_attempts=3):
+    """Create a pending job; the worker sees it once the transaction commits"""
+    from jobs.models import Job
+
+    if name not in _tasks:
+        raise ValueError(f"Unknown task: {name}")
+
+    if user is not None and not user.is_authenticated:
+        user = None
+
+    return Job.objects.create(
+        task=name,
+        payload=payload or {},
+        created_by=user,
+        max_attempts=max_attempts,
+    )
+
+
+
+def active_job(name, **payload):
+    """Pending or running job of task `name` with the given payload values"""
+    from jobs.models import Job
+
+    lookups = {f"payload__{key}": value for key, value in payload.items()}
+    return (
+        Job.objects.filter(task=name, status__in=["pending", "running"], **lookups)
+        .order_by("id")
+        .first()
+    )
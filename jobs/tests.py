@@ -0,0 +1,135 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from jobs.models import Job
+from jobs.registry import active_job, enqueue, task
+from jobs.worker import claim_job, requeue_stale_jobs, run_job
+
+calls = []
+
+
+@task("tests.ok")
+def ok_task(job, value):
+    calls.append(value)
+    return {"value": value}
+
+
+@task("tests.broken")
+def broken_task(job):
+    raise RuntimeError("boom")
+
+
+@override_settings(JOBS_RETRY_DELAY=10, JOBS_STALE_AFTER=60)
+class WorkerTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_claim_marks_job_running(self):
+        job = enqueue("tests.ok", {"value": 1})
+
+        claimed = claim_job()
+
+        self.assertEqual(claimed.pk, job.pk)
+        job.refresh_from_db()
+        self.assertEqual(job.status, "running")
+        self.assertEqual(job.attempts, 1)
+        self.assertIsNotNone(job.started_at)
+
+    def test_claim_skips_running_and_future_jobs(self):
+        enqueue("tests.ok", {"value": 1})
+        Job.objects.create(task="tests.ok", run_after=timezone.now() + timedelta(hours=1))
+
+        first = claim_job()
+
+        self.assertIsNotNone(first)
+        # перше завдання вже "running", друге ще не на часі
+        self.assertIsNone(claim_job())
+
+    def test_claim_uses_skip_locked(self):
+        enqueue("tests.ok", {"value": 1})
+        with mock.patch.object(
+            Job.objects, "select_for_update", wraps=Job.objects.select_for_update
+        ) as select_for_update:
+            claim_job()
+        select_for_update.assert_called_once_with(skip_locked=True)
+
+    def test_run_job_success(self):
+        enqueue("tests.ok", {"value": 7})
+
+        self.assertTrue(run_job(claim_job()))
+
+        job = Job.objects.get()
+        self.assertEqual(job.status, "done")
+        self.assertEqual(job.result, {"value": 7})
+        self.assertEqual(calls, [7])
+
+    def test_failed_job_is_retried_with_backoff(self):
+        enqueue("tests.broken", max_attempts=3)
+
+        before = timezone.now()
+        with self.assertLogs("jobs.worker", "ERROR"):
+            self.assertFalse(run_job(claim_job()))
+        job = Job.objects.get()
+        self.assertEqual(job.status, "pending")
+        self.assertIn("boom", job.error)
+        self.assertGreaterEqual(job.run_after, before + timedelta(seconds=10))
+
+        Job.objects.update(run_after=timezone.now())
+        before = timezone.now()
+        with self.assertLogs("jobs.worker", "ERROR"):
+            run_job(claim_job())
+        job.refresh_from_db()
+        self.assertEqual(job.attempts, 2)
+        # затримка подвоюється з кожною спробою
+        self.assertGreaterEqual(job.run_after, before + timedelta(seconds=20))
+        self.assertLess(job.run_after, before + timedelta(seconds=30))
+
+    def test_job_fails_when_attempts_run_out(self):
+        enqueue("tests.broken", max_attempts=2)
+
+        for _ in range(2):
+            Job.objects.update(run_after=timezone.now())
+            with self.assertLogs("jobs.worker", "ERROR"):
+                run_job(claim_job())
+
+        job = Job.objects.get()
+        self.assertEqual(job.status, "failed")
+        self.assertEqual(job.attempts, 2)
+        self.assertIsNotNone(job.finished_at)
+        self.assertIsNone(claim_job())
+
+    def test_unknown_task_fails_without_retry(self):
+        Job.objects.create(task="tests.missing")
+
+        with self.assertLogs("jobs.worker", "ERROR"):
+            self.assertFalse(run_job(claim_job()))
+        self.assertEqual(Job.objects.get().status, "failed")
+
+    def test_requeue_stale_jobs(self):
+        stale = Job.objects.create(
+            task="tests.ok",
+            status="running",
+            started_at=timezone.now() - timedelta(seconds=120),
+        )
+        fresh = Job.objects.create(
+            task="tests.ok", status="running", started_at=timezone.now()
+        )
+
+        self.assertEqual(requeue_stale_jobs(), 1)
+
+        stale.refresh_from_db()
+        fresh.refresh_from_db()
+        self.assertEqual(stale.status, "pending")
+        self.assertEqual(fresh.status, "running")
+        self.assertEqual(claim_job().pk, stale.pk)
+
+    def test_active_job_matches_payload(self):
+        job = enqueue("tests.ok", {"value": 1})
+        enqueue("tests.ok", {"value": 2})
+
+        self.assertEqual(active_job("tests.ok", value=1).pk, job.pk)
+        Job.objects.filter(pk=job.pk).update(status="done")
+        self.assertIsNone(active_job("tests.ok", value=1))
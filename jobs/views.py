@@ -0,0 +1,49 @@
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404, render
+from django.views import View
+
+from .models import Job
+
+
+def visible_jobs(user):
+    qs = Job.objects.select_related("created_by")
+    if user.is_staff:
+        return qs
+    return qs.filter(created_by=user)
+
+
+class JobListView(LoginRequiredMixin, View):
+    def get(self, request):
+        jobs = visible_jobs(request.user)[:100]
+        context = {
+            "jobs": jobs,
+            "active": "system",
+        }
+        return render(request, "jobs/list.html", context)
+
+
+class JobDetailView(LoginRequiredMixin, View):
+    def get(self, request, pk):
+        job = get_object_or_404(visible_jobs(request.user), pk=pk)
+
+        if request.GET.get("format") == "json":
+            return JsonResponse(
+                {
+                    "id": job.pk,
+                    "task": job.task,
+                    "status": job.status,
+                    "progress": job.progress,
+                    "progress_total": job.progress_total,
+                    "percent": job.percent,
+                    "message": job.message,
+                    "result": job.result,
+                    "attempts": job.attempts,
+                }
+            )
+
+        context = {
+            "job": job,
+            "active": "system",
+        }
+        return render(request, "jobs/detail.html", context)
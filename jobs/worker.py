@@ -0,0 +1,72 @@
+import logging
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from jobs.models import Job
+from jobs.registry import get_task
+
+logger = logging.getLogger(__name__)
+
+
+def claim_job():
+    """Lock the next due job and mark it as running; None when the queue is empty"""
+    now = timezone.now()
+    with transaction.atomic():
+        job = (
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(status="pending", run_after__lte=now)
+            .order_by("run_after", "id")
+            .first()
+        )
+        if job is None:
+            return None
+
+        job.status = "running"
+        job.attempts += 1
+        job.started_at = now
+        job.save(update_fields=["status", "attempts", "started_at"])
+    return job
+
+
+def run_job(job):
+    """Execute a claimed job and record the outcome, scheduling a retry on failure"""
+    handler = get_task(job.task)
+    try:
+        if handler is None:
+            raise LookupError(f"No handler registered for task {job.task}")
+        result = handler(job, **job.payload)
+    except Exception:
+        logger.exception("Job %s (%s) failed", job.pk, job.task)
+        job.error = traceback.format_exc()
+        if handler is not None and job.attempts < job.max_attempts:
+            delay = settings.JOBS_RETRY_DELAY * 2 ** (job.attempts - 1)
+            job.status = "pending"
+            job.run_after = timezone.now() + timedelta(seconds=delay)
+        else:
+            job.status = "failed"
+            job.finished_at = timezone.now()
+        job.save(update_fields=["status", "error", "run_after", "finished_at"])
+        return False
+
+    job.status = "done"
+    job.result = result
+    job.error = ""
+    job.progress = max(job.progress, job.progress_total)
+    job.finished_at = timezone.now()
+    job.save(
+        update_fields=["status", "result", "error", "progress", "finished_at"]
+    )
+    return True
+
+
+def requeue_stale_jobs():
+    """Return jobs left running by a crashed worker to the queue"""
+    cutoff = timezone.now() - timedelta(seconds=settings.JOBS_STALE_AFTER)
+    return Job.objects.filter(status="running", started_at__lt=cutoff).update(
+        status="pending", run_after=timezone.now()
+    )
+
@@ -1,3 +1,19 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import ReportResult
+
+
+@admin.register(ReportResult)
+class ReportResultAdmin(admin.ModelAdmin):
+    list_display = [
+        "id",
+        "report_type",
+        "output",
+        "status",
+        "size",
+        "created_by",
+        "created_at",
+        "expires_at",
+    ]
+    list_filter = ["status", "report_type", "output"]
+    readonly_fields = ["key", "created_at", "finished_at"]
@@ -0,0 +1,447 @@
+"""Report datasets shared by the screen view and background exports.
+
+A dataset turns normalized filters into a ReportData: the template context
+for the screen version plus export columns and (lazy) rows.
+"""
+from datetime import date, timedelta
+
+from django.db.models import Q, Sum
+
+from core.models import Product
+from documents.models import DocumentItem, ReceiptItem
+from employees.utils import current_period_subquery
+from warehouse.models import StockMovement, WarehouseStock
+
+from .forecast import forecast_demand
+
+# відомі фільтри кожного звіту з типовими значеннями
+DEFAULT_FILTERS = {
+    "demand": {
+        "company": "",
+        "department": "",
+        "date_from": "",
+        "date_to": "",
+        "sort_by": "employee_end_date",
+    },
+    "issues": {
+        "company": "",
+        "department": "",
+        "date_from": "",
+        "date_to": "",
+        "sort_by": "employee_end_date",
+    },
+    "receipts": {"supplier": "", "recipient": "", "date_from": "", "date_to": ""},
+    "order_demand": {"months_ahead": 1, "show_zero_demand": False},
+    "stock_correction": {"date_from": "", "date_to": "", "product": ""},
+    "forecast": {"months": 6},
+}
+
+# звіти з іменами працівників - маскування залежить від користувача
+NAMED_REPORTS = {"demand", "issues"}
+
+
+class ReportData:
+    def __init__(self, title, basename, columns, rows, context):
+        self.title = title
+        self.basename = basename
+        self.columns = columns
+        self.rows = rows
+        self.context = context
+
+
+def normalize_filters(report_type, params):
+    """Known filters of the report with defaults applied and values coerced.
+
+    Equivalent requests (other parameter order, extra parameters, blank
+    values) give the same dict, so it can be used as a cache key.
+    """
+    filters = {}
+    for name, default in DEFAULT_FILTERS[report_type].items():
+        value = params.get(name, default)
+        if isinstance(default, bool):
+            value = value is True or value == "true"
+        elif isinstance(default, int):
+            try:
+                value = int(value)
+            except (TypeError, ValueError):
+                value = default
+        else:
+            value = str(value).strip()
+        filters[name] = value
+
+    if report_type == "forecast":
+        filters["months"] = min(max(filters["months"], 1), 24)
+    return filters
+
+
+def build_report(report_type, filters):
+    return DATASETS[report_type](**filters)
+
+
+def order_demand_report(months_ahead, show_zero_demand):
+    today = date.today()
+    start_date = today
+    end_date = today + timedelta(days=30 * months_ahead)
+
+    # --- Прогноз майбутніх видань, по (продукт, розмір) ---
+    forecast_map = {}
+    for row in (
+        DocumentItem.objects.filter(
+            next_issue_date__range=[start_date, end_date], status="active"
+        )
+        .values("product_id", "size")
+        .annotate(total_needed=Sum("quantity"))
+    ):
+        key = (row["product_id"], row["size"] or "")
+        forecast_map[key] = forecast_map.get(key, 0) + row["total_needed"]
+
+    # --- Стан складу, по (продукт, розмір) ---
+    stock_map = {}
+    for row in WarehouseStock.objects.values("product_id", "size").annotate(
+        on_hand=Sum("quantity")
+    ):
+        key = (row["product_id"], row["size"] or "")
+        stock_map[key] = stock_map.get(key, 0) + row["on_hand"]
+
+    # --- Продукти: лише ті, що можуть мати потребу (або всі) ---
+    products_qs = Product.objects.all()
+    if not show_zero_demand:
+        products_qs = products_qs.filter(
+            Q(id__in={pid for pid, _ in forecast_map}) | Q(min_qty_on_stock__gt=0)
+        )
+    products = {
+        p["id"]: p
+        for p in products_qs.values("id", "code", "name", "size", "min_qty_on_stock")
+    }
+
+    # мінімальний стан стосується розміру, в якому продукт приймається на склад
+    keys = set(forecast_map) | {(pid, size) for pid, size in stock_map if pid in products}
+    keys |= {(pid, p["size"] or "") for pid, p in products.items()}
+
+    order_demand_data = []
+    for product_id, size in keys:
+        product = products.get(product_id)
+        if product is None:
+            continue
+        current_stock = stock_map.get((product_id, size), 0)
+        min_stock = (
+            product["min_qty_on_stock"] or 0
+            if size == (product["size"] or "")
+            else 0
+        )
+        forecast_issues = forecast_map.get((product_id, size), 0)
+
+        order_need = max(0, (forecast_issues + min_stock) - current_stock)
+
+        # Якщо не показуємо нульову потребу — пропускаємо
+        if not show_zero_demand and order_need == 0:
+            continue
+
+        order_demand_data.append(
+            {
+                "product_code": product["code"],
+                "product_name": product["name"],
+                "size": size or "-",
+                "current_stock": current_stock,
+                "min_stock": min_stock,
+                "forecast_issues": forecast_issues,
+                "order_need": order_need,
+                "period": f"{start_date} - {end_date}",
+            }
+        )
+    order_demand_data.sort(key=lambda i: (i["product_code"], i["size"]))
+
+    rows = (
+        [
+            item["product_code"],
+            item["order_need"],
+            item["product_name"],
+            item["size"],
+            item["forecast_issues"],
+            item["min_stock"],
+            item["current_stock"],
+        ]
+        for item in order_demand_data
+    )
+    columns = [
+        "Kod produktu",
+        "Do zamówienia",
+        "Produkt",
+        "Rozmiar",
+        "Prognoza wydań",
+        "Min. stan",
+        "Stan magazynowy",
+    ]
+    context = {
+        "order_demand_data": order_demand_data,
+        "total_order_need": sum(i["order_need"] for i in order_demand_data),
+        "filters": {"start_date": start_date, "end_date": end_date},
+    }
+    return ReportData(
+        "Zapotrzebowanie na zamówienie",
+        "zapotrzebowanie_na_zamówienie",
+        columns,
+        rows,
+        context,
+    )
+
+
+def forecast_report(months):
+    """Прогноз потреб по місяцях з урахуванням повторних циклів видачі"""
+    months_labels, forecast_data = forecast_demand(months)
+
+    rows = (
+        [row["product_code"], row["product_name"], row["size"], *row["monthly"],
+         row["total"], row["current_stock"], row["order_need"]]
+        for row in forecast_data
+    )
+    columns = [
+        "Kod produktu", "Produkt", "Rozmiar", *months_labels,
+        "Razem", "Stan magazynowy", "Do zamówienia",
+    ]
+    context = {
+        "forecast_data": forecast_data,
+        "months_labels": months_labels,
+        "monthly_totals": [
+            sum(row["monthly"][i] for row in forecast_data)
+            for i in range(len(months_labels))
+        ],
+        "total_forecast": sum(row["total"] for row in forecast_data),
+    }
+    return ReportData(
+        "Prognoza zapotrzebowania", "prognoza_zapotrzebowania", columns, rows, context
+    )
+
+
+def demand_report(company, department, date_from, date_to, sort_by):
+    # Базовий запит для активних продуктів працівників
+    document_items = (
+        DocumentItem.objects.filter(status="active", next_issue_date__isnull=False)
+        .select_related("document__employee", "product")
+        .annotate(
+            contract_end=current_period_subquery(
+                "end_date", employee_ref="document__employee"
+            )
+        )
+    )
+
+    # Застосовуємо фільтри
+    if company:
+        document_items = document_items.filter(document__employee__company_id=company)
+    if department:
+        document_items = document_items.filter(
+            document__employee__department_id=department
+        )
+    if date_from:
+        document_items = document_items.filter(next_issue_date__gte=date_from)
+    if date_to:
+        document_items = document_items.filter(next_issue_date__lte=date_to)
+
+    # Сортування
+    if sort_by == "employee_end_date":
+        document_items = document_items.order_by(
+            "document__employee__id", "next_issue_date"
+        )
+    elif sort_by == "end_date_employee":
+        document_items = document_items.order_by(
+            "next_issue_date", "document__employee__id"
+        )
+
+    rows = (
+        [
+            item.document.employee.id,
+            item.document.employee.last_name,
+            item.document.employee.first_name,
+            item.product.name,
+            item.size or "-",
+            (
+                item.next_issue_date.strftime("%Y-%m-%d")
+                if item.next_issue_date
+                else ""
+            ),
+            item.quantity,
+            item.contract_end.strftime("%Y-%m-%d") if item.contract_end else "",
+        ]
+        for item in document_items.iterator(chunk_size=2000)
+    )
+    columns = [
+        "ID pracownika",
+        "Nazwisko",
+        "Imię",
+        "Produkt",
+        "Rozmiar",
+        "Data zakończenia",
+        "Ilość",
+        "Umowa do",
+    ]
+    return ReportData(
+        "Raport zapotrzebowania",
+        "raport_zapotrzebowania",
+        columns,
+        rows,
+        {"document_items": document_items},
+    )
+
+
+def issues_report(company, department, date_from, date_to, sort_by):
+    # Базовий запит для документів видань
+    document_items = DocumentItem.objects.select_related(
+        "document__employee", "product"
+    )
+
+    # Фільтр по даті видачі
+    if date_from:
+        document_items = document_items.filter(document__issue_date__gte=date_from)
+    if date_to:
+        document_items = document_items.filter(document__issue_date__lte=date_to)
+
+    # Додаткові фільтри
+    if company:
+        document_items = document_items.filter(document__employee__company_id=company)
+    if department:
+        document_items = document_items.filter(
+            document__employee__department_id=department
+        )
+
+    # Сортування
+    if sort_by == "employee_end_date":
+        document_items = document_items.order_by(
+            "document__employee__id", "document__issue_date"
+        )
+    elif sort_by == "end_date_employee":
+        document_items = document_items.order_by(
+            "document__issue_date", "document__employee__id"
+        )
+
+    rows = (
+        [
+            item.document.employee.id,
+            item.document.employee.last_name,
+            item.document.employee.first_name,
+            item.product.name,
+            item.size or "-",
+            (
+                item.document.issue_date.strftime("%Y-%m-%d")
+                if item.document.issue_date
+                else ""
+            ),
+            item.quantity,
+        ]
+        for item in document_items.iterator(chunk_size=2000)
+    )
+    columns = [
+        "ID pracownika",
+        "Nazwisko",
+        "Imię",
+        "Produkt",
+        "Rozmiar",
+        "Data wydania",
+        "Ilość",
+    ]
+    return ReportData(
+        "Raport wydań", "raport_wydan", columns, rows, {"document_items": document_items}
+    )
+
+
+def receipts_report(supplier, recipient, date_from, date_to):
+    # Базовий запит для документів надходження
+    receipt_items = ReceiptItem.objects.select_related(
+        "document__supplier", "document__recipient", "product"
+    )
+
+    if date_from:
+        receipt_items = receipt_items.filter(document__issue_date__gte=date_from)
+    if date_to:
+        receipt_items = receipt_items.filter(document__issue_date__lte=date_to)
+    if supplier:
+        receipt_items = receipt_items.filter(document__supplier_id=supplier)
+    if recipient:
+        receipt_items = receipt_items.filter(document__recipient_id=recipient)
+
+    rows = (
+        [
+            item.document.supplier.name if item.document.supplier else "-",
+            item.document.recipient.name if item.document.recipient else "-",
+            item.product.code or "-",
+            item.product.name,
+            item.size or "-",
+            str(item.quantity),
+            str(item.unit_price) if item.unit_price is not None else "-",
+            str(item.total_value) if item.total_value is not None else "-",
+            (
+                item.document.issue_date.strftime("%Y-%m-%d")
+                if item.document.issue_date
+                else ""
+            ),
+            item.document.document_number or "-",
+        ]
+        for item in receipt_items.iterator(chunk_size=2000)
+    )
+    columns = [
+        "Dostawca",
+        "Odbiorca",
+        "Kod produktu",
+        "Nazwa produktu",
+        "Rozmiar",
+        "Ilość",
+        "Cena",
+        "Wartość",
+        "Data przyjęcia",
+        "Nr dokumentu",
+    ]
+    return ReportData(
+        "Raport przyjęć", "raport_przyjec", columns, rows, {"receipt_items": receipt_items}
+    )
+
+
+def stock_correction_report(date_from, date_to, product):
+    # Фільтруємо StockMovement по типу 'stock_correction'
+    stock_movements = StockMovement.objects.filter(
+        movement_type="stock_correction"
+    ).select_related("product")
+
+    if date_from:
+        stock_movements = stock_movements.filter(movement_date__gte=date_from)
+    if date_to:
+        stock_movements = stock_movements.filter(movement_date__lte=date_to)
+    if product:
+        stock_movements = stock_movements.filter(product_id=product)
+
+    rows = (
+        [
+            item.product.code if item.product else "-",
+            item.product.name if item.product else "-",
+            item.size or "-",
+            item.quantity,
+            item.notes or "-",
+            item.movement_date.strftime("%Y-%m-%d %H:%M"),
+            item.document_number or "-",
+        ]
+        for item in stock_movements.iterator(chunk_size=2000)
+    )
+    columns = [
+        "Kod produktu",
+        "Nazwa produktu",
+        "Rozmiar",
+        "Ilość",
+        "Uwagi",
+        "Data korekty",
+        "Nr dokumentu",
+    ]
+    return ReportData(
+        "Raport korekty stanu magazynowego",
+        "raport_korekta_stanu",
+        columns,
+        rows,
+        {"stock_movements": stock_movements},
+    )
+
+
+DATASETS = {
+    "demand": demand_report,
+    "issues": issues_report,
+    "receipts": receipts_report,
+    "order_demand": order_demand_report,
+    "stock_correction": stock_correction_report,
+    "forecast": forecast_report,
+}
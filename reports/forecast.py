@@ -0,0 +1,162 @@
+"""Multi-month demand forecast.
+
+Every active issued item is replaced each `period_days` starting from its
+next_issue_date; kit entitlements that were never issued (new hires) start
+at their due date, in the product's size. Cycles stop at the end of the
+employee's current contract; employees without a current period get none.
+Cycles per month are counted arithmetically with NumPy and summed per
+(product, size, month).
+"""
+from datetime import date
+
+import numpy as np
+import pandas as pd
+from django.db.models import Sum
+
+from core.models import Product
+from documents.models import DocumentItem, Entitlement
+from employees.utils import current_period_subquery
+from warehouse.models import WarehouseStock
+
+def month_starts(today, months):
+    """First days of the `months` months starting with today's month, plus the end bound"""
+    first = np.datetime64(today.replace(day=1), "M")
+    return (first + np.arange(months + 1)).astype("datetime64[D]")
+
+
+def load_sources(today):
+    """Active items and never-issued entitlements as one DataFrame"""
+    items = pd.DataFrame.from_records(
+        DocumentItem.objects.filter(status="active", next_issue_date__isnull=False)
+        .annotate(
+            period_id=current_period_subquery("pk", employee_ref="document__employee"),
+            contract_end=current_period_subquery("end_date", employee_ref="document__employee"),
+        )
+        .values_list(
+            "product_id",
+            "size",
+            "quantity",
+            "next_issue_date",
+            "product__period_days",
+            "period_id",
+            "contract_end",
+        ),
+        columns=["product_id", "size", "quantity", "start", "period_days", "period_id", "contract_end"],
+    )
+
+    # nowi pracownicy: pozycje zestawu jeszcze nie wydane, w rozmiarze produktu
+    hires = pd.DataFrame.from_records(
+        Entitlement.objects.filter(last_issue_date__isnull=True)
+        .annotate(
+            period_id=current_period_subquery("pk", employee_ref="employee"),
+            contract_end=current_period_subquery("end_date", employee_ref="employee"),
+        )
+        .values_list(
+            "product_id",
+            "product__size",
+            "quantity",
+            "due_date",
+            "product__period_days",
+            "period_id",
+            "contract_end",
+        ),
+        columns=["product_id", "size", "quantity", "start", "period_days", "period_id", "contract_end"],
+    )
+
+    frames = [df for df in (items, hires) if not df.empty]
+    if not frames:
+        return items
+    df = pd.concat(frames, ignore_index=True)
+    df["size"] = df["size"].fillna("")
+    return df
+
+
+def project(df, today, months):
+    """Quantities per (product_id, size) and month as a (groups, months) array.
+
+    Returns (index DataFrame with product_id/size, counts ndarray).
+    """
+    bounds = month_starts(today, months)
+    if df.empty:
+        return pd.DataFrame(columns=["product_id", "size"]), np.zeros((0, months), dtype=np.int64)
+
+    today_d = np.datetime64(today, "D")
+    start = pd.to_datetime(df["start"]).values.astype("datetime64[D]")
+    start = np.maximum(start, today_d)  # overdue items are due now
+
+    # cykle kończą się z końcem umowy (włącznie z dniem końca);
+    # bez bieżącego okresu zatrudnienia nie ma już czego wydawać
+    end = np.full(len(df), bounds[-1])
+    contract_end = pd.to_datetime(df["contract_end"]).values.astype("datetime64[D]")
+    has_end = ~np.isnat(contract_end)
+    end[has_end] = np.minimum(end[has_end], contract_end[has_end] + np.timedelta64(1, "D"))
+    no_period = df["period_id"].isna().to_numpy()
+    end[no_period] = start[no_period]
+
+    period = df["period_days"].fillna(0).to_numpy(dtype=np.int64)
+    span = (end - start).astype(np.int64)
+    repeat = period > 0
+    cycles = np.where(span > 0, 1, 0)
+    cycles[repeat] = np.where(
+        span[repeat] > 0, -(-span[repeat] // period[repeat]), 0
+    )
+
+    # cycles due before each month bound: ceil((bound - start) / period),
+    # clipped to [0, cycles]; memory is items x months whatever the period
+    step = np.where(repeat, period, 1)  # one-off items have at most one cycle
+    offset = (bounds[None, :] - start[:, None]).astype(np.int64)
+    due_before = np.clip(-(-offset // step[:, None]), 0, cycles[:, None])
+    per_item = np.diff(due_before, axis=1) * df["quantity"].to_numpy(dtype=np.int64)[:, None]
+
+    codes, groups = pd.MultiIndex.from_frame(df[["product_id", "size"]]).factorize()
+    groups = groups.to_frame(index=False, name=["product_id", "size"])
+    counts = np.zeros((len(groups), months), dtype=np.int64)
+    np.add.at(counts, codes, per_item)
+    return groups, counts
+
+
+def forecast_demand(months=6, today=None):
+    """Monthly forecast rows for the report.
+
+    Returns (month labels, rows) where each row has product code/name, size,
+    per-month quantities, total, on-hand stock and the quantity to order.
+    """
+    today = today or date.today()
+    groups, counts = project(load_sources(today), today, months)
+    labels = [str(m)[:7] for m in month_starts(today, months)[:-1]]
+
+    product_ids = set(groups["product_id"]) if len(groups) else set()
+    products = {
+        p["id"]: p
+        for p in Product.objects.filter(id__in=product_ids).values(
+            "id", "code", "name", "size", "min_qty_on_stock"
+        )
+    }
+    stock = {}
+    for row in WarehouseStock.objects.filter(product_id__in=product_ids).values(
+        "product_id", "size"
+    ).annotate(on_hand=Sum("quantity")):
+        key = (row["product_id"], row["size"] or "")
+        stock[key] = stock.get(key, 0) + row["on_hand"]
+
+    rows = []
+    for (product_id, size), monthly in zip(groups.itertuples(index=False), counts):
+        product = products.get(product_id)
+        if product is None or not monthly.any():
+            continue
+        total = int(monthly.sum())
+        on_hand = stock.get((product_id, size), 0)
+        min_stock = (product["min_qty_on_stock"] or 0) if size == (product["size"] or "") else 0
+        rows.append(
+            {
+                "product_code": product["code"],
+                "product_name": product["name"],
+                "size": size or "-",
+                "monthly": [int(v) for v in monthly],
+                "total": total,
+                "current_stock": on_hand,
+                "order_need": max(0, total + min_stock - on_hand),
+            }
+        )
+    rows.sort(key=lambda r: (r["product_code"], r["size"]))
+    return labels, rows
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from reports.services import purge_expired_results
+
+
+class Command(BaseCommand):
+    help = "Delete expired report files and their results (run periodically)"
+
+    def handle(self, *args, **options):
+        deleted = purge_expired_results()
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} report results"))
@@ -0,0 +1,105 @@
+# Generated by Django 5.2.6 on 2026-10-19 02:46
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ("jobs", "0001_initial"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ReportResult",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("key", models.CharField(max_length=64)),
+                (
+                    "report_type",
+                    models.CharField(
+                        choices=[
+                            ("demand", "Raport zapotrzebowania"),
+                            ("issues", "Raport wydań"),
+                            ("receipts", "Raport przyjęć"),
+                            ("order_demand", "Zapotrzebowanie na zamówienie"),
+                            ("forecast", "Prognoza zapotrzebowania"),
+                            ("stock_correction", "Korekta stanu magazynowego"),
+                        ],
+                        max_length=30,
+                    ),
+                ),
+                ("filters", models.JSONField(blank=True, default=dict)),
+                ("output", models.CharField(max_length=10)),
+                ("real_names", models.BooleanField(default=False)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "Oczekuje"),
+                            ("running", "W trakcie"),
+                            ("done", "Gotowy"),
+                            ("failed", "Błąd"),
+                        ],
+                        default="pending",
+                        max_length=10,
+                    ),
+                ),
+                ("path", models.CharField(blank=True, max_length=255)),
+                ("filename", models.CharField(blank=True, max_length=255)),
+                ("size", models.BigIntegerField(default=0)),
+                ("error", models.TextField(blank=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("finished_at", models.DateTimeField(blank=True, null=True)),
+                ("expires_at", models.DateTimeField(blank=True, null=True)),
+                (
+                    "created_by",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "job",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        to="jobs.job",
+                    ),
+                ),
+                (
+                    "users",
+                    models.ManyToManyField(
+                        blank=True,
+                        related_name="report_results",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-created_at"],
+                "indexes": [
+                    models.Index(
+                        fields=["key", "status"], name="reports_rep_key_8cf44c_idx"
+                    )
+                ],
+            },
+        ),
+    ]
@@ -1,3 +1,65 @@
+from django.conf import settings
 from django.db import models
+from django.utils import timezone
 
-# Create your models here.
+
+class ReportResult(models.Model):
+    # Report file generated in the background; identical requests share it until it expires
+    REPORT_TYPE_CHOICES = [
+        ("demand", "Raport zapotrzebowania"),
+        ("issues", "Raport wydań"),
+        ("receipts", "Raport przyjęć"),
+        ("order_demand", "Zapotrzebowanie na zamówienie"),
+        ("forecast", "Prognoza zapotrzebowania"),
+        ("stock_correction", "Korekta stanu magazynowego"),
+    ]
+    STATUS_CHOICES = [
+        ("pending", "Oczekuje"),
+        ("running", "W trakcie"),
+        ("done", "Gotowy"),
+        ("failed", "Błąd"),
+    ]
+
+    # sha256 of (report_type, filters, output, real_names)
+    key = models.CharField(max_length=64)
+    report_type = models.CharField(max_length=30, choices=REPORT_TYPE_CHOICES)
+    filters = models.JSONField(default=dict, blank=True)
+    output = models.CharField(max_length=10)
+    real_names = models.BooleanField(default=False)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="pending")
+    job = models.ForeignKey(
+        "jobs.Job", on_delete=models.SET_NULL, blank=True, null=True
+    )
+    path = models.CharField(max_length=255, blank=True)
+    filename = models.CharField(max_length=255, blank=True)
+    size = models.BigIntegerField(default=0)
+    error = models.TextField(blank=True)
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name="+",
+    )
+    # everyone who requested this result ("Moje raporty")
+    users = models.ManyToManyField(
+        settings.AUTH_USER_MODEL, related_name="report_results", blank=True
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+    expires_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [models.Index(fields=["key", "status"])]
+
+    def __str__(self):
+        return f"{self.get_report_type_display()} ({self.output}, {self.status})"
+
+    @property
+    def is_expired(self):
+        return self.expires_at is not None and self.expires_at <= timezone.now()
+
+    @property
+    def is_ready(self):
+        return self.status == "done" and not self.is_expired
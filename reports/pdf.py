@@ -0,0 +1,166 @@
+"""PDF rendering for reports.
+
+Fonts and styles are set up once per process. Short cells are passed to
+reportlab as plain strings and only text that needs wrapping becomes a
+Paragraph. Rows are split into page-sized tables, so layout cost stays
+linear in the number of rows instead of re-splitting one giant table; a
+cell too tall for a page is cut with an ellipsis.
+"""
+import os
+from functools import lru_cache
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4, landscape
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.platypus import PageBreak, Paragraph, SimpleDocTemplate, Table, TableStyle
+
+FONT_NAME = "DejaVuSans"
+FONT_SIZE = 8.5
+LEADING = 10
+PADDING_X = 4
+PADDING_Y = 3
+MARGIN = 20
+PAGE_SIZE = landscape(A4)
+
+TITLE_HEIGHT = 18
+
+TABLE_STYLE = TableStyle(
+    [
+        ("FONTNAME", (0, 0), (-1, -1), FONT_NAME),
+        ("FONTSIZE", (0, 0), (-1, -1), FONT_SIZE),
+        ("LEADING", (0, 0), (-1, -1), LEADING),
+        ("BACKGROUND", (0, 0), (-1, 0), colors.gray),
+        ("TEXTCOLOR", (0, 0), (-1, 0), colors.whitesmoke),
+        ("ALIGN", (0, 0), (-1, -1), "CENTER"),
+        ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+        ("LEFTPADDING", (0, 0), (-1, -1), PADDING_X),
+        ("RIGHTPADDING", (0, 0), (-1, -1), PADDING_X),
+        ("TOPPADDING", (0, 0), (-1, -1), PADDING_Y),
+        ("BOTTOMPADDING", (0, 0), (-1, -1), PADDING_Y),
+        ("BACKGROUND", (0, 1), (-1, -1), colors.beige),
+        ("GRID", (0, 0), (-1, -1), 0.25, colors.grey),
+    ]
+)
+
+
+@lru_cache(maxsize=None)
+def register_fonts():
+    """Register the report font once per process"""
+    font_path = os.path.join(settings.BASE_DIR, "static", "fonts", "DejaVuSans.ttf")
+    pdfmetrics.registerFont(TTFont(FONT_NAME, font_path))
+    return FONT_NAME
+
+
+@lru_cache(maxsize=None)
+def get_styles():
+    register_fonts()
+    return {
+        "cell": ParagraphStyle(
+            name="Polish",
+            fontName=FONT_NAME,
+            fontSize=FONT_SIZE,
+            leading=LEADING,
+            wordWrap="CJK",
+            alignment=1,
+        ),
+        "title": ParagraphStyle(
+            name="PolishTitle",
+            fontName=FONT_NAME,
+            fontSize=14,
+            leading=TITLE_HEIGHT,
+            alignment=1,
+        ),
+    }
+
+
+def _paragraph(text):
+    return Paragraph(escape(text).replace("\n", "<br/>"), get_styles()["cell"])
+
+
+def _fit_paragraph(text, text_width, max_height):
+    """Paragraph of `text`, cut with an ellipsis to at most `max_height` points"""
+    paragraph = _paragraph(text)
+    height = paragraph.wrap(text_width, PAGE_SIZE[1])[1]
+    if height <= max_height:
+        return paragraph, height
+
+    # wiersz wyższy niż strona - reportlab rzuciłby LayoutError, więc obcinamy
+    low, high = 0, len(text)
+    while low < high:
+        middle = (low + high + 1) // 2
+        candidate = _paragraph(text[:middle] + "…")
+        if candidate.wrap(text_width, PAGE_SIZE[1])[1] <= max_height:
+            low = middle
+        else:
+            high = middle - 1
+    paragraph = _paragraph(text[:low] + "…")
+    return paragraph, paragraph.wrap(text_width, PAGE_SIZE[1])[1]
+
+
+def build_row(values, text_width, max_height=PAGE_SIZE[1]):
+    """Cells for one row and its height in points (at most `max_height`)"""
+    register_fonts()
+    max_text_height = max(LEADING, max_height - 2 * PADDING_Y)
+    cells = []
+    text_height = LEADING
+    for value in values:
+        text = "" if value is None else str(value)
+        if "\n" not in text and pdfmetrics.stringWidth(text, FONT_NAME, FONT_SIZE) <= text_width:
+            cells.append(text)
+            continue
+        # tylko długi tekst wymaga zawijania przez Paragraph
+        paragraph, height = _fit_paragraph(text, text_width, max_text_height)
+        text_height = max(text_height, height)
+        cells.append(paragraph)
+    return cells, text_height + 2 * PADDING_Y
+
+
+def _table(rows, col_widths):
+    table = Table(rows, colWidths=col_widths, repeatRows=1)
+    table.setStyle(TABLE_STYLE)
+    return table
+
+
+def render_pdf(data, columns, title, out):
+    """Write the report to the file-like `out`.
+
+    `data` is any iterable of rows and is consumed once.
+    """
+    styles = get_styles()
+    doc = SimpleDocTemplate(
+        out,
+        pagesize=PAGE_SIZE,
+        leftMargin=MARGIN,
+        rightMargin=MARGIN,
+        topMargin=MARGIN,
+        bottomMargin=MARGIN,
+        title=title,
+    )
+    col_width = doc.width / len(columns)
+    col_widths = [col_width] * len(columns)
+    text_width = col_width - 2 * PADDING_X
+
+    # ramka strony ma 6pt paddingu z każdej strony; zostawiamy mały zapas
+    frame_height = (doc.height - 12) * 0.97
+    header, header_height = build_row(columns, text_width, frame_height / 4)
+    # każdy wiersz musi zmieścić się na stronie z tytułem i nagłówkiem
+    max_row_height = frame_height - TITLE_HEIGHT - header_height
+
+    elements = [Paragraph(escape(title), styles["title"])]
+    available = frame_height - TITLE_HEIGHT
+    chunk, used = [header], header_height
+    for values in data:
+        cells, height = build_row(values, text_width, max_row_height)
+        if used + height > available and len(chunk) > 1:
+            elements += [_table(chunk, col_widths), PageBreak()]
+            available = frame_height
+            chunk, used = [header], header_height
+        chunk.append(cells)
+        used += height
+    elements.append(_table(chunk, col_widths))
+
+    doc.build(elements)
@@ -0,0 +1,138 @@
+import hashlib
+import json
+import tempfile
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from jobs.registry import enqueue
+from szafa.middleware import as_current_user
+
+from .datasets import NAMED_REPORTS, build_report
+from .models import ReportResult
+from .utils import OUTPUT_FORMATS, write_report
+
+
+def result_key(report_type, filters, output, real_names):
+    raw = json.dumps([report_type, filters, output, real_names], sort_keys=True)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def stale_results():
+    """Pending/running results past their generation deadline (worker died)"""
+    now = timezone.now()
+    timeout = timedelta(seconds=settings.REPORT_GENERATION_TIMEOUT)
+    return ReportResult.objects.filter(status__in=["pending", "running"]).filter(
+        Q(expires_at__lte=now) | Q(expires_at__isnull=True, created_at__lte=now - timeout)
+    )
+
+
+def fail_stale_results():
+    return stale_results().update(
+        status="failed",
+        error="Przekroczono czas generowania raportu",
+        finished_at=timezone.now(),
+    )
+
+
+def live_results():
+    """Results that are queued, running or done and not yet expired"""
+    now = timezone.now()
+    timeout = timedelta(seconds=settings.REPORT_GENERATION_TIMEOUT)
+    return ReportResult.objects.exclude(status="failed").filter(
+        Q(expires_at__gt=now) | Q(expires_at__isnull=True, created_at__gt=now - timeout)
+    )
+
+
+@transaction.atomic
+def request_report(report_type, filters, output, user):
+    """Return (result, created) for a report request.
+
+    An identical request (same report, normalized filters, output and - for
+    reports with employee names - name visibility) within REPORT_RESULT_TTL
+    reuses the existing result; otherwise a new one is queued for the
+    background worker.
+    """
+    real_names = report_type in NAMED_REPORTS and bool(
+        getattr(user, "can_view_real_employee_names", False)
+    )
+    key = result_key(report_type, filters, output, real_names)
+
+    fail_stale_results()
+    result = live_results().filter(key=key).order_by("-created_at").first()
+    created = result is None
+    if created:
+        result = ReportResult.objects.create(
+            key=key,
+            report_type=report_type,
+            filters=filters,
+            output=output,
+            real_names=real_names,
+            created_by=user,
+            # термін на генерацію; після успіху замінюється на REPORT_RESULT_TTL
+            expires_at=timezone.now()
+            + timedelta(seconds=settings.REPORT_GENERATION_TIMEOUT),
+        )
+        result.job = enqueue(
+            "reports.generate", {"result_id": result.pk}, user=user, max_attempts=1
+        )
+        result.save(update_fields=["job"])
+
+    result.users.add(user)
+    return result, created
+
+
+def generate_result(result):
+    """Build the dataset, write the file to storage and mark the result done"""
+    ReportResult.objects.filter(pk=result.pk).update(status="running")
+    extension = OUTPUT_FORMATS[result.output][0]
+
+    # імена працівників маскуються так само, як для того, хто замовив звіт
+    with as_current_user(result.created_by), tempfile.TemporaryFile() as tmp:
+        report = build_report(result.report_type, result.filters)
+        write_report(result.output, report.rows, report.columns, report.title, tmp)
+        tmp.seek(0)
+        path = default_storage.save(
+            f"reports/{result.key[:2]}/{result.pk}.{extension}", File(tmp)
+        )
+
+    now = timezone.now()
+    result.path = path
+    result.filename = f"{report.basename}.{extension}"
+    result.size = default_storage.size(path)
+    result.status = "done"
+    result.finished_at = now
+    result.expires_at = now + timedelta(seconds=settings.REPORT_RESULT_TTL)
+    result.save(
+        update_fields=["path", "filename", "size", "status", "finished_at", "expires_at"]
+    )
+    return result
+
+
+def purge_expired_results():
+    """Delete expired results and failed ones older than the TTL, with their files.
+
+    Pending/running results past REPORT_GENERATION_TIMEOUT are marked failed
+    first, so a dead worker does not block identical requests forever.
+    """
+    fail_stale_results()
+    now = timezone.now()
+    stale = ReportResult.objects.filter(
+        Q(expires_at__lte=now)
+        | Q(
+            status="failed",
+            created_at__lte=now - timedelta(seconds=settings.REPORT_RESULT_TTL),
+        )
+    )
+    count = 0
+    for result in stale.iterator():
+        if result.path:
+            default_storage.delete(result.path)
+        result.delete()
+        count += 1
+    return count
@@ -0,0 +1,21 @@
+from jobs.registry import task
+
+
+@task("reports.generate")
+def generate_report_task(job, result_id):
+    """Generate a requested report file outside of the web request"""
+    from reports.models import ReportResult
+    from reports.services import generate_result
+
+    result = ReportResult.objects.select_related("created_by").filter(pk=result_id).first()
+    if result is None or result.status == "failed":
+        # результат уже видалено (purge_report_results) або прострочено
+        return {"result_id": result_id, "skipped": True}
+    job.set_progress(0, 1, f"Generowanie: {result.get_report_type_display()}")
+    try:
+        result = generate_result(result)
+    except Exception as e:
+        ReportResult.objects.filter(pk=result_id).update(status="failed", error=str(e))
+        raise
+    job.set_progress(1)
+    return {"result_id": result.pk, "filename": result.filename, "size": result.size}
@@ -1,3 +1,451 @@
-from django.test import TestCase
+import gzip
+import io
+import shutil
+import tempfile
+from datetime import date, timedelta
 
-# Create your tests here.
+import numpy as np
+import pandas as pd
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.http import StreamingHttpResponse
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from openpyxl import load_workbook
+
+from core.models import Company, Department, Position, Product, ProductCategory
+from documents.models import DocumentItem, Entitlement, IssueDocument
+from employees.models import Employee, EmploymentPeriod
+from jobs.models import Job
+from jobs.worker import claim_job, run_job
+from reports.datasets import order_demand_report
+from reports.forecast import forecast_demand, project
+from reports.models import ReportResult
+from reports.pdf import build_row, render_pdf
+from reports.services import purge_expired_results, request_report
+from reports.utils import export_to_csv, write_excel
+from warehouse.models import WarehouseStock
+
+
+class ReportFixtureMixin:
+    def setUp(self):
+        self.today = date.today()
+        self.category = ProductCategory.objects.create(name="Odzież", type="clothing")
+        self.employee = Employee.objects.create(
+            card_number="T001",
+            first_name="Jan",
+            last_name="Kowalski",
+            company=Company.objects.create(name="Firma"),
+            department=Department.objects.create(name="Dział"),
+            position=Position.objects.create(name="Magazynier"),
+        )
+        self.period = EmploymentPeriod.objects.create(
+            employee=self.employee, start_date=self.today - timedelta(days=400)
+        )
+
+    def product(self, code, size="", period_days=365, min_qty=0):
+        return Product.objects.create(
+            code=code,
+            name=f"Produkt {code}",
+            category=self.category,
+            unit_price=10,
+            size=size,
+            period_days=period_days,
+            min_qty_on_stock=min_qty,
+        )
+
+    def issue(self, product, size, quantity, next_issue_date, employee=None):
+        WarehouseStock.objects.get_or_create(product=product, size=size, defaults={"quantity": 1000})
+        doc = IssueDocument.objects.create(
+            document_type="DW",
+            issue_date=self.today - timedelta(days=100),
+            employee=employee or self.employee,
+        )
+        return DocumentItem.objects.create(
+            document=doc,
+            product=product,
+            quantity=quantity,
+            size=size,
+            next_issue_date=next_issue_date,
+        )
+
+    def set_stock(self, product, size, quantity):
+        WarehouseStock.objects.update_or_create(
+            product=product, size=size, defaults={"quantity": quantity}
+        )
+
+
+class RenderPdfTests(SimpleTestCase):
+    columns = ["Kod", "Nazwa", "Uwagi"]
+
+    def render(self, rows):
+        out = io.BytesIO()
+        render_pdf(rows, self.columns, "Raport", out)
+        return out.getvalue()
+
+    def test_renders_rows(self):
+        pdf = self.render([["P1", "Kurtka", ""], ["P2", "Buty", None]])
+        self.assertTrue(pdf.startswith(b"%PDF"))
+
+    def test_cell_taller_than_page_is_cut(self):
+        long_text = "bardzo długi opis pozycji " * 2000
+        pdf = self.render([["P1", "Kurtka", "krótko"], ["P2", "Buty", long_text]])
+        self.assertTrue(pdf.startswith(b"%PDF"))
+
+    def test_long_text_in_every_column(self):
+        rows = [["x" * 5000, "ż\n" * 500, "y" * 3000] for _ in range(3)]
+        self.assertTrue(self.render(rows).startswith(b"%PDF"))
+
+    def test_build_row_caps_height(self):
+        cells, height = build_row(["a", "słowo " * 3000], 100, max_height=200)
+        self.assertLessEqual(height, 200)
+        self.assertTrue(cells[1].text.endswith("…"))
+
+
+class OrderDemandReportTests(ReportFixtureMixin, TestCase):
+    def rows(self, **filters):
+        report = order_demand_report(**{"months_ahead": 1, "show_zero_demand": False, **filters})
+        return {
+            (row["product_code"], row["size"]): row
+            for row in report.context["order_demand_data"]
+        }
+
+    def test_demand_per_size(self):
+        jacket = self.product("P1", size="L")
+        soon = self.today + timedelta(days=10)
+        self.issue(jacket, "L", 3, soon)
+        self.issue(jacket, "M", 2, soon)
+        self.issue(jacket, "M", 1, self.today + timedelta(days=90))  # poza okresem
+        self.set_stock(jacket, "L", 1)
+        self.set_stock(jacket, "M", 0)
+
+        rows = self.rows()
+
+        self.assertEqual(rows[("P1", "L")]["forecast_issues"], 3)
+        self.assertEqual(rows[("P1", "L")]["order_need"], 2)
+        self.assertEqual(rows[("P1", "M")]["forecast_issues"], 2)
+        self.assertEqual(rows[("P1", "M")]["order_need"], 2)
+
+    def test_minimum_applies_to_product_size(self):
+        gloves = self.product("P2", size="L", min_qty=5)
+        self.issue(gloves, "M", 1, self.today + timedelta(days=5))
+        self.set_stock(gloves, "L", 2)
+        self.set_stock(gloves, "M", 0)
+
+        rows = self.rows()
+
+        self.assertEqual(rows[("P2", "L")]["min_stock"], 5)
+        self.assertEqual(rows[("P2", "L")]["order_need"], 3)
+        self.assertEqual(rows[("P2", "M")]["min_stock"], 0)
+        self.assertEqual(rows[("P2", "M")]["order_need"], 1)
+
+    def test_minimum_without_stock_row_is_reported(self):
+        self.product("P3", size="XL", min_qty=4)
+
+        rows = self.rows()
+
+        self.assertEqual(rows[("P3", "XL")]["current_stock"], 0)
+        self.assertEqual(rows[("P3", "XL")]["order_need"], 4)
+
+    def test_zero_demand_only_on_request(self):
+        self.set_stock(self.product("P4", size="L"), "L", 10)
+
+        self.assertNotIn(("P4", "L"), self.rows())
+        self.assertEqual(self.rows(show_zero_demand=True)[("P4", "L")]["order_need"], 0)
+
+    def test_query_count_does_not_grow_with_products(self):
+        for i in range(10):
+            product = self.product(f"Q{i}", size="L", min_qty=1)
+            self.issue(product, "L", 1, self.today + timedelta(days=3))
+
+        with self.assertNumQueries(3):
+            self.rows()
+
+
+class ForecastProjectionTests(SimpleTestCase):
+    today = date(2026, 1, 15)
+
+    def frame(self, *rows):
+        return pd.DataFrame.from_records(
+            rows,
+            columns=[
+                "product_id", "size", "quantity", "start", "period_days", "period_id", "contract_end",
+            ],
+        )
+
+    def project(self, *rows):
+        groups, counts = project(self.frame(*rows), self.today, 3)
+        return {
+            (product_id, size): list(monthly)
+            for (product_id, size), monthly in zip(groups.itertuples(index=False), counts)
+        }
+
+    def test_repeated_cycles_per_month(self):
+        result = self.project(
+            # 20.01, 19.02, 21.03
+            (1, "L", 2, date(2026, 1, 20), 30, 1, None),
+            # ten sam produkt i rozmiar, 31.03
+            (1, "L", 1, date(2026, 3, 31), 365, 1, None),
+        )
+        self.assertEqual(result, {(1, "L"): [2, 2, 3]})
+
+    def test_overdue_one_off_item_is_due_now(self):
+        result = self.project((2, "", 1, date(2025, 12, 1), None, 1, None))
+        self.assertEqual(result, {(2, ""): [1, 0, 0]})
+
+    def test_cycles_stop_at_contract_end_inclusive(self):
+        # 20.01, 27.01, 03.02 (dzień końca umowy), 10.02 już nie
+        result = self.project((3, "M", 1, date(2026, 1, 20), 7, 1, date(2026, 2, 3)))
+        self.assertEqual(result, {(3, "M"): [2, 1, 0]})
+
+    def test_no_current_period_means_no_demand(self):
+        result = self.project((4, "L", 5, date(2026, 1, 20), 30, None, None))
+        self.assertEqual(result, {(4, "L"): [0, 0, 0]})
+
+    def test_short_period_does_not_need_a_cycle_matrix(self):
+        rows = [(5, "L", 1, date(2026, 1, 15), 1, 1, None)] * 1000
+        groups, counts = project(self.frame(*rows), self.today, 3)
+        # 17 + 28 + 31 dni po 1000 sztuk
+        np.testing.assert_array_equal(counts, [[17000, 28000, 31000]])
+
+
+class ForecastDemandTests(ReportFixtureMixin, TestCase):
+    def test_forecast_rows(self):
+        jacket = self.product("P1", size="L", period_days=180, min_qty=2)
+        boots = self.product("P2", size="42", period_days=365)
+        self.issue(jacket, "L", 1, self.today + timedelta(days=5))
+        self.set_stock(jacket, "L", 1)
+        # nowy pracownik: pozycja zestawu jeszcze nie wydana, w rozmiarze produktu
+        Entitlement.objects.create(employee=self.employee, product=boots, due_date=self.today)
+
+        labels, rows = forecast_demand(months=3, today=self.today)
+
+        self.assertEqual(len(labels), 3)
+        by_key = {(row["product_code"], row["size"]): row for row in rows}
+        self.assertEqual(set(by_key), {("P1", "L"), ("P2", "42")})
+        self.assertEqual(by_key[("P1", "L")]["total"], 1)
+        self.assertEqual(by_key[("P1", "L")]["order_need"], 2)
+        self.assertEqual(by_key[("P2", "42")]["monthly"], [1, 0, 0])
+
+    def test_employee_without_current_period_is_skipped(self):
+        jacket = self.product("P1", size="L", period_days=30)
+        self.issue(jacket, "L", 1, self.today + timedelta(days=5))
+        EmploymentPeriod.objects.filter(pk=self.period.pk).update(
+            end_date=self.today - timedelta(days=1)
+        )
+
+        self.assertEqual(forecast_demand(months=3, today=self.today)[1], [])
+
+
+class WriteExcelTests(SimpleTestCase):
+    def test_rows_from_generator(self):
+        out = io.BytesIO()
+        write_excel(([i, f"Produkt {i}", None] for i in range(3)), ["Lp", "Nazwa", "Uwagi"], out)
+
+        out.seek(0)
+        sheet = load_workbook(out).active
+        rows = list(sheet.iter_rows(values_only=True))
+        self.assertEqual(rows[0], ("Lp", "Nazwa", "Uwagi"))
+        self.assertEqual(rows[1:], [(0, "Produkt 0", None), (1, "Produkt 1", None), (2, "Produkt 2", None)])
+        self.assertTrue(sheet["A1"].font.bold)
+
+
+class CsvExportTests(SimpleTestCase):
+    columns = ["Kod", "Nazwa"]
+    rows = [["P1", "Kurtka; zimowa"], ["P2", 'Buty "S3"']]
+
+    def content(self, response):
+        return b"".join(response.streaming_content)
+
+    def test_csv_stream(self):
+        response = export_to_csv(iter(self.rows), self.columns, filename="raport.csv")
+
+        self.assertIsInstance(response, StreamingHttpResponse)
+        self.assertEqual(response["Content-Type"], "text/csv; charset=utf-8")
+        self.assertIn('filename="raport.csv"', response["Content-Disposition"])
+        self.assertEqual(
+            self.content(response).decode("utf-8"),
+            '\ufeffKod,Nazwa\r\nP1,Kurtka; zimowa\r\nP2,"Buty ""S3"""\r\n',
+        )
+
+    def test_tsv_stream(self):
+        response = export_to_csv(self.rows, self.columns, filename="raport.tsv", delimiter="\t")
+
+        self.assertEqual(response["Content-Type"], "text/tab-separated-values; charset=utf-8")
+        lines = self.content(response).decode("utf-8-sig").splitlines()
+        self.assertEqual(lines, ["Kod\tNazwa", "P1\tKurtka; zimowa", 'P2\t"Buty ""S3"""'])
+
+    def test_gzip_stream(self):
+        rows = [[f"P{i}", "ż" * 50] for i in range(5000)]
+        response = export_to_csv(iter(rows), self.columns, filename="raport.csv", compress=True)
+
+        self.assertEqual(response["Content-Type"], "application/gzip")
+        self.assertIn('filename="raport.csv.gz"', response["Content-Disposition"])
+        chunks = list(response.streaming_content)
+        self.assertGreater(len(chunks), 1)
+        text = gzip.decompress(b"".join(chunks)).decode("utf-8-sig")
+        self.assertEqual(text.splitlines()[0], "Kod,Nazwa")
+        self.assertEqual(text.splitlines()[-1], f"P4999,{'ż' * 50}")
+
+    def test_rows_are_consumed_lazily(self):
+        consumed = []
+
+        def rows():
+            for row in self.rows:
+                consumed.append(row)
+                yield row
+
+        response = export_to_csv(rows(), self.columns)
+        self.assertEqual(consumed, [])
+        self.content(response)
+        self.assertEqual(len(consumed), 2)
+
+
+class ReportStreamingViewTests(TestCase):
+    def setUp(self):
+        self.client.force_login(get_user_model().objects.create_user("tester"))
+
+    def test_csv_output_is_streamed_inline(self):
+        response = self.client.get("/reports/", {"report_type": "receipts", "output": "csv"})
+
+        self.assertIsInstance(response, StreamingHttpResponse)
+        header = b"".join(response.streaming_content).decode("utf-8-sig").splitlines()[0]
+        self.assertTrue(header.startswith("Dostawca,Odbiorca,Kod produktu"))
+
+    def test_gzipped_tsv_output(self):
+        response = self.client.get("/reports/", {"report_type": "receipts", "output": "tsv_gz"})
+
+        self.assertIn('filename="raport_przyjec.tsv.gz"', response["Content-Disposition"])
+        text = gzip.decompress(b"".join(response.streaming_content)).decode("utf-8-sig")
+        self.assertTrue(text.startswith("Dostawca\tOdbiorca"))
+
+
+@override_settings(REPORT_RESULT_TTL=3600, REPORT_GENERATION_TIMEOUT=600)
+class ReportResultTests(TestCase):
+    filters = {"supplier": "", "recipient": "", "date_from": "", "date_to": ""}
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        User = get_user_model()
+        self.user = User.objects.create_user("tester")
+        self.other = User.objects.create_user("other")
+        self.client.force_login(self.user)
+
+    def request(self, user=None, output="xls", **filters):
+        return request_report("receipts", {**self.filters, **filters}, output, user or self.user)
+
+    def test_identical_request_reuses_result(self):
+        result, created = self.request()
+        again, created_again = self.request(user=self.other)
+
+        self.assertTrue(created)
+        self.assertFalse(created_again)
+        self.assertEqual(again.pk, result.pk)
+        self.assertEqual(Job.objects.count(), 1)
+        self.assertEqual(set(result.users.all()), {self.user, self.other})
+        self.assertIsNotNone(result.expires_at)
+
+    def test_other_filters_or_output_create_new_result(self):
+        result, _ = self.request()
+
+        self.assertTrue(self.request(date_from="2024-01-01")[1])
+        self.assertTrue(self.request(output="pdf")[1])
+        self.assertEqual(ReportResult.objects.count(), 3)
+
+    def test_names_visibility_is_part_of_the_key(self):
+        privileged = get_user_model().objects.create_user(
+            "boss", can_view_real_employee_names=True
+        )
+        filters = {"company": "", "department": "", "date_from": "", "date_to": "", "sort_by": ""}
+
+        masked, _ = request_report("issues", filters, "xls", self.user)
+        real, created = request_report("issues", filters, "xls", privileged)
+
+        self.assertTrue(created)
+        self.assertNotEqual(masked.key, real.key)
+
+    def test_stale_pending_result_is_failed_and_replaced(self):
+        result, _ = self.request()
+        ReportResult.objects.filter(pk=result.pk).update(
+            expires_at=timezone.now() - timedelta(seconds=1)
+        )
+
+        new, created = self.request()
+
+        self.assertTrue(created)
+        self.assertNotEqual(new.pk, result.pk)
+        result.refresh_from_db()
+        self.assertEqual(result.status, "failed")
+        self.assertEqual(result.error, "Przekroczono czas generowania raportu")
+
+    def test_stale_result_without_deadline_is_failed(self):
+        result, _ = self.request()
+        ReportResult.objects.filter(pk=result.pk).update(
+            status="running",
+            expires_at=None,
+            created_at=timezone.now() - timedelta(seconds=601),
+        )
+
+        self.assertTrue(self.request()[1])
+        result.refresh_from_db()
+        self.assertEqual(result.status, "failed")
+
+    def test_generated_file_is_downloaded_and_reused(self):
+        result, _ = self.request()
+        self.assertTrue(run_job(claim_job()))
+
+        result.refresh_from_db()
+        self.assertEqual(result.status, "done")
+        self.assertEqual(result.filename, "raport_przyjec.xlsx")
+        self.assertTrue(default_storage.exists(result.path))
+        self.assertGreater(result.expires_at, timezone.now() + timedelta(seconds=3000))
+
+        response = self.client.get(
+            "/reports/", {"report_type": "receipts", "output": "xls"}
+        )
+        self.assertRedirects(
+            response,
+            reverse("reports:download", args=[result.pk]),
+            fetch_redirect_response=False,
+        )
+        response = self.client.get(reverse("reports:download", args=[result.pk]))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(b"".join(response.streaming_content).startswith(b"PK"))
+        response.close()
+
+    def test_other_users_cannot_download(self):
+        result, _ = self.request()
+        run_job(claim_job())
+
+        self.client.force_login(self.other)
+        response = self.client.get(reverse("reports:download", args=[result.pk]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_purge_removes_expired_results_and_files(self):
+        result, _ = self.request()
+        run_job(claim_job())
+        result.refresh_from_db()
+        ReportResult.objects.filter(pk=result.pk).update(
+            expires_at=timezone.now() - timedelta(seconds=1)
+        )
+        live, _ = self.request(date_from="2024-01-01")
+
+        self.assertEqual(purge_expired_results(), 1)
+        self.assertFalse(ReportResult.objects.filter(pk=result.pk).exists())
+        self.assertFalse(default_storage.exists(result.path))
+        self.assertTrue(ReportResult.objects.filter(pk=live.pk).exists())
+
+    def test_job_skips_failed_result(self):
+        result, _ = self.request()
+        ReportResult.objects.filter(pk=result.pk).update(status="failed")
+
+        self.assertTrue(run_job(claim_job()))
+        self.assertEqual(Job.objects.get().result["skipped"], True)
+        result.refresh_from_db()
+        self.assertEqual(result.status, "failed")
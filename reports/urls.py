@@ -4,6 +4,8 @@ from . import views
 
 urlpatterns = [
     path("", views.ReportsView.as_view(), name="main"),
+    path("my/", views.MyReportsView.as_view(), name="my_reports"),
+    path("results/<int:pk>/download/", views.ReportDownloadView.as_view(), name="download"),
 ]
 
 app_name = "reports"
@@ -1,102 +1,122 @@
-import io
-import os
-from django.conf import settings
-from django.http import HttpResponse
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import A4, landscape
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-import pandas as pd
-
-
-def export_to_excel(data, columns, filename="report.xlsx"):
-    df = pd.DataFrame(data, columns=columns)
-    output = io.BytesIO()
-    with pd.ExcelWriter(output, engine="openpyxl") as writer:
-        df.to_excel(writer, index=False, sheet_name="Report")
-    output.seek(0)
-
-    response = HttpResponse(
-        output,
-        content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-    )
-    response["Content-Disposition"] = f'attachment; filename="{filename}"'
-    return response
+import csv
+import gzip
+import zlib
 
+from django.http import StreamingHttpResponse
+from django.utils.http import content_disposition_header
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font
 
-def export_to_pdf(data, columns, title="Raport", filename="report.pdf"):
-    buffer = io.BytesIO()
-    doc = SimpleDocTemplate(
-        buffer,
-        pagesize=landscape(A4),
-        leftMargin=20,
-        rightMargin=20,
-        topMargin=20,
-        bottomMargin=20,
-    )
-
-    font_path = os.path.join(settings.BASE_DIR, "static", "fonts", "DejaVuSans.ttf")
-    pdfmetrics.registerFont(TTFont("DejaVuSans", font_path))
-
-    styles = getSampleStyleSheet()
-    styles.add(
-        ParagraphStyle(
-            name="Polish",
-            fontName="DejaVuSans",
-            fontSize=8.5,
-            leading=10,
-            wordWrap="CJK",
-        )
-    )
-    styles.add(
-        ParagraphStyle(
-            name="PolishTitle",
-            fontName="DejaVuSans",
-            fontSize=14,
-            leading=18,
-            alignment=1,
-        )
-    )
+from .pdf import render_pdf
+
+# output -> (file extension, content type)
+OUTPUT_FORMATS = {
+    "xls": ("xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    "pdf": ("pdf", "application/pdf"),
+    "csv": ("csv", "text/csv; charset=utf-8"),
+    "tsv": ("tsv", "text/tab-separated-values; charset=utf-8"),
+    "csv_gz": ("csv.gz", "application/gzip"),
+    "tsv_gz": ("tsv.gz", "application/gzip"),
+}
+
+
+def write_excel(data, columns, out):
+    """Write rows to `out` as .xlsx.
+
+    `data` may be any iterable (e.g. a generator over queryset.iterator());
+    openpyxl's write-only mode keeps memory flat regardless of row count.
+    """
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Report")
+
+    header = []
+    for col in columns:
+        cell = WriteOnlyCell(ws, value=str(col))
+        cell.font = Font(bold=True)
+        header.append(cell)
+    ws.append(header)
+
+    for row in data:
+        ws.append(list(row))
+
+    wb.save(out)
 
-    elements = [Paragraph(title, styles["PolishTitle"])]
 
-    table_data = []
-    table_data.append([Paragraph(str(col), styles["Polish"]) for col in columns])
+class Echo:
+    """Pseudo-buffer: csv.writer.writerow() returns the line instead of storing it"""
+
+    def write(self, value):
+        return value
+
+
+def _csv_lines(data, columns, delimiter):
+    writer = csv.writer(Echo(), delimiter=delimiter)
+    # BOM, щоб Excel правильно відкрив польські літери
+    yield "\ufeff" + writer.writerow(columns)
     for row in data:
-        table_data.append([Paragraph(str(cell), styles["Polish"]) for cell in row])
-
-    table = Table(table_data, repeatRows=1)
-
-    table.setStyle(
-        TableStyle(
-            [
-                ("FONTNAME", (0, 0), (-1, -1), "DejaVuSans"),
-                ("FONTSIZE", (0, 0), (-1, -1), 8.5),
-                ("BACKGROUND", (0, 0), (-1, 0), colors.gray),
-                ("TEXTCOLOR", (0, 0), (-1, 0), colors.whitesmoke),
-                ("ALIGN", (0, 0), (-1, -1), "CENTER"),
-                ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
-                ("LEFTPADDING", (0, 0), (-1, -1), 4),
-                ("RIGHTPADDING", (0, 0), (-1, -1), 4),
-                ("TOPPADDING", (0, 0), (-1, -1), 3),
-                ("BOTTOMPADDING", (0, 0), (-1, -1), 3),
-                ("BACKGROUND", (0, 1), (-1, -1), colors.beige),
-                ("GRID", (0, 0), (-1, -1), 0.25, colors.grey),
-            ]
+        yield writer.writerow(row)
+
+
+def _gzip_chunks(lines, chunk_size=64 * 1024):
+    compressor = zlib.compressobj(wbits=31)  # wbits=31 -> gzip container
+    buffer = []
+    size = 0
+    for line in lines:
+        encoded = line.encode("utf-8")
+        buffer.append(encoded)
+        size += len(encoded)
+        if size >= chunk_size:
+            chunk = compressor.compress(b"".join(buffer))
+            buffer, size = [], 0
+            if chunk:
+                yield chunk
+    yield compressor.compress(b"".join(buffer)) + compressor.flush()
+
+
+def export_to_csv(data, columns, filename="report.csv", delimiter=",", compress=False):
+    """Stream rows as CSV/TSV (optionally gzipped) with StreamingHttpResponse.
+
+    `data` is consumed lazily, so the first bytes are sent before the query
+    finishes and memory does not depend on the number of rows.
+    """
+    lines = _csv_lines(data, columns, delimiter)
+    content_type = "text/tab-separated-values" if delimiter == "\t" else "text/csv"
+    if compress:
+        response = StreamingHttpResponse(_gzip_chunks(lines), content_type="application/gzip")
+        filename += ".gz"
+    else:
+        response = StreamingHttpResponse(
+            (line.encode("utf-8") for line in lines),
+            content_type=f"{content_type}; charset=utf-8",
         )
-    )
+    response["Content-Disposition"] = content_disposition_header(True, filename)
+    return response
 
-    available_width = landscape(A4)[0] - doc.leftMargin - doc.rightMargin
-    num_cols = len(columns)
-    col_widths = [available_width / num_cols for _ in range(num_cols)]
-    table._argW = col_widths
 
-    elements.append(table)
-    doc.build(elements)
-    buffer.seek(0)
+def write_csv(data, columns, out, delimiter=",", compress=False):
+    """Write rows to `out` as CSV/TSV, gzipped when `compress` is set"""
+    stream = gzip.GzipFile(fileobj=out, mode="wb") if compress else out
+    for line in _csv_lines(data, columns, delimiter):
+        stream.write(line.encode("utf-8"))
+    if compress:
+        stream.close()  # writes the gzip trailer, `out` stays open
 
-    response = HttpResponse(buffer, content_type="application/pdf")
-    response["Content-Disposition"] = f'inline; filename="{filename}"'
-    return response
\ No newline at end of file
+
+def write_report(output, data, columns, title, out):
+    """Write rows in one of OUTPUT_FORMATS to the binary file `out`"""
+    fmt, _, compress = output.partition("_")
+    if fmt == "xls":
+        write_excel(data, columns, out)
+    elif fmt == "pdf":
+        render_pdf(data, columns, title, out)
+    elif fmt in ("csv", "tsv"):
+        write_csv(
+            data,
+            columns,
+            out,
+            delimiter="\t" if fmt == "tsv" else ",",
+            compress=compress == "gz",
+        )
+    else:
+        raise ValueError(f"Unknown report output: {output}")
@@ -1,4 +1,7 @@
 import threading
+from contextlib import contextmanager
+
+from employees.utils import employment_period_cache
 
 _user = threading.local()
 
@@ -7,6 +10,17 @@ def get_current_user():
     return getattr(_user, "value", None)
 
 
+@contextmanager
+def as_current_user(user):
+    """Act as `user` outside a request, e.g. in a background job"""
+    previous = get_current_user()
+    _user.value = user
+    try:
+        yield
+    finally:
+        _user.value = previous
+
+
 class CurrentUserMiddleware:
 
     def __init__(self, get_response):
@@ -18,4 +32,18 @@ class CurrentUserMiddleware:
 
         response = self.get_response(request)
 
-        return response
\ No newline at end of file
+        return response
+
+
+class EmploymentPeriodCacheMiddleware:
+    """Resolve each employee's current employment period once per request"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+
+        with employment_period_cache():
+            response = self.get_response(request)
+
+        return response
@@ -54,6 +54,7 @@ INSTALLED_APPS = [
     "drf_spectacular",
     "drf_spectacular_sidecar",
     "accounts",
+    "jobs",
 ]
 
 MIDDLEWARE = [
@@ -67,6 +68,7 @@ MIDDLEWARE = [
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "szafa.middleware.CurrentUserMiddleware",
+    "szafa.middleware.EmploymentPeriodCacheMiddleware",
 ]
 
 ROOT_URLCONF = "szafa.urls"
@@ -144,6 +146,31 @@ MEDIA_ROOT = BASE_DIR / "media"
 LUSTRO_URL = os.environ.get("LUSTRO_URL")
 HOSTING_URL = os.environ.get("HOSTING_URL")
 
+# OCR outbox (python manage.py send_ocr_outbox)
+LUSTRO_CONNECT_TIMEOUT = float(os.environ.get("LUSTRO_CONNECT_TIMEOUT", 5))
+LUSTRO_READ_TIMEOUT = float(os.environ.get("LUSTRO_READ_TIMEOUT", 30))
+# stored import responses (IdempotencyKey) are replayed for this long, then purged
+IDEMPOTENCY_KEY_TTL = int(os.environ.get("IDEMPOTENCY_KEY_TTL", 7 * 24 * 3600))
+OCR_POOL_SIZE = int(os.environ.get("OCR_POOL_SIZE", 10))
+OCR_OUTBOX_BATCH_SIZE = int(os.environ.get("OCR_OUTBOX_BATCH_SIZE", 20))
+OCR_OUTBOX_MAX_ATTEMPTS = int(os.environ.get("OCR_OUTBOX_MAX_ATTEMPTS", 5))
+OCR_OUTBOX_RETRY_DELAY = int(os.environ.get("OCR_OUTBOX_RETRY_DELAY", 30))
+OCR_OUTBOX_LEASE = int(os.environ.get("OCR_OUTBOX_LEASE", 300))
+UPLOAD_WORKERS = int(os.environ.get("UPLOAD_WORKERS", 4))
+
+# Background jobs (python manage.py run_worker)
+JOBS_RETRY_DELAY = int(os.environ.get("JOBS_RETRY_DELAY", 30))
+JOBS_STALE_AFTER = int(os.environ.get("JOBS_STALE_AFTER", 3600))
+JOBS_REQUEUE_INTERVAL = int(os.environ.get("JOBS_REQUEUE_INTERVAL", 60))
+PENDING_RECEIPT_ASYNC_THRESHOLD = int(
+    os.environ.get("PENDING_RECEIPT_ASYNC_THRESHOLD", 200)
+)
+
+# Report files generated in the background (python manage.py purge_report_results)
+REPORT_RESULT_TTL = int(os.environ.get("REPORT_RESULT_TTL", 3600))
+# pending/running results older than this are treated as failed (dead worker)
+REPORT_GENERATION_TIMEOUT = int(os.environ.get("REPORT_GENERATION_TIMEOUT", 1800))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -36,6 +36,7 @@ urlpatterns = [
     path("documents/", include("documents.urls")),
     path("warehouse/", include("warehouse.urls")),
     path("reports/", include("reports.urls")),
+    path("jobs/", include("jobs.urls")),
     path("api/schema/", SpectacularAPIView.as_view(), name="schema"),
 
     path(
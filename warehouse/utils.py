@@ -0,0 +1,47 @@
+from django.utils import timezone
+
+from warehouse.models import StockMovement, WarehouseStock
+
+
+def apply_stock_deltas(deltas):
+    """Apply {(product_id, size): quantity_change} to WarehouseStock in bulk.
+
+    Mirrors WarehouseStock.update_stock: missing rows are created and the
+    resulting quantity never drops below zero. Must run inside a transaction.
+    """
+    deltas = {key: change for key, change in deltas.items() if change}
+    if not deltas:
+        return
+
+    product_ids = {product_id for product_id, _ in deltas}
+    stocks = {
+        (stock.product_id, stock.size): stock
+        for stock in WarehouseStock.objects.select_for_update().filter(
+            product_id__in=product_ids
+        )
+    }
+
+    now = timezone.now()
+    to_create = []
+    to_update = []
+    for (product_id, size), change in deltas.items():
+        stock = stocks.get((product_id, size))
+        if stock is None:
+            to_create.append(
+                WarehouseStock(product_id=product_id, size=size, quantity=max(0, change))
+            )
+        else:
+            stock.quantity = max(0, stock.quantity + change)
+            stock.last_updated = now
+            to_update.append(stock)
+
+    if to_create:
+        WarehouseStock.objects.bulk_create(to_create)
+    if to_update:
+        WarehouseStock.objects.bulk_update(to_update, ["quantity", "last_updated"])
+
+
+def record_movements(movements):
+    """Store prepared StockMovement instances with one INSERT"""
+    if movements:
+        StockMovement.objects.bulk_create(movements)